@@ -49,6 +49,16 @@ def format_genres(genres: str | None) -> str:
         return f"{', '.join(formatted[:-1])}, and {formatted[-1]}"
 
 
+def format_rating(average_rating: float | None, num_votes: int | None) -> str:
+    """
+    Apply formatting to the IMDb rating of a movie
+    Example: (8.7, 2100000) -> " Rated 8.7/10 by 2,100,000 users."
+    """
+    if average_rating is None or not num_votes:
+        return ""
+    return f" Rated {average_rating:.1f}/10 by {num_votes:,} user{plural_s(num_votes)}."
+
+
 def is_dead_or_alive(is_dead: bool) -> str:
     """Return 'is' or 'was' based on is_dead boolean"""
     return "had" if is_dead else "has"
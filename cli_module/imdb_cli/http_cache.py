@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Entries kept on disk, the least recently stored ones are dropped first
+MAX_ENTRIES = 200
+
+# Response headers stored along with the body
+STORED_HEADERS = ("ETag", "Content-Type", "X-Estimated-Total", "X-Next-Cursor")
+
+
+def cache_file() -> Path:
+    """File of the cached responses, under IMDB_CLI_CACHE_DIR or the user cache directory"""
+    directory = os.getenv("IMDB_CLI_CACHE_DIR")
+    if not directory:
+        base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+        directory = Path(base) / "imdb-cli"
+    return Path(directory) / "responses.json"
+
+
+def request_key(url: str, params: dict) -> str:
+    return hashlib.sha256(
+        json.dumps([url, params], sort_keys=True).encode()
+    ).hexdigest()
+
+
+def load_entries() -> dict:
+    try:
+        entries = json.loads(cache_file().read_text())
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+
+def save_entries(entries: dict):
+    newest = sorted(entries.items(), key=lambda item: item[1]["stored_at"])[-MAX_ENTRIES:]
+    path = cache_file()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(dict(newest)))
+        tmp_path.replace(path)
+    except OSError:
+        # The cache is an optimization, a read-only home must not break the CLI
+        pass
+
+
+def cached_response(url: str, entry: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response._content = entry["body"].encode()
+    return response
+
+
+def get(url: str, params: dict, timeout: float) -> requests.Response:
+    """
+    GET revalidating the response stored by a previous call
+
+    The stored ETag is sent in If-None-Match and a 304 from the API is
+    answered with the stored body, so unchanged results are not transferred
+    or searched again.
+    """
+    key = request_key(url, params)
+    entries = load_entries()
+    entry = entries.get(key)
+
+    headers = {"If-None-Match": entry["headers"]["ETag"]} if entry else {}
+    response = requests.get(url, params=params, headers=headers, timeout=timeout)
+
+    if entry and response.status_code == 304:
+        return cached_response(url, entry)
+
+    etag = response.headers.get("ETag")
+    if response.status_code == 200 and isinstance(etag, str):
+        entries[key] = {
+            "stored_at": time.time(),
+            "headers": {
+                name: response.headers[name]
+                for name in STORED_HEADERS
+                if name in response.headers
+            },
+            "body": response.text,
+        }
+        save_entries(entries)
+
+    return response
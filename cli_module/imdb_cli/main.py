@@ -3,10 +3,12 @@ import requests
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from imdb_cli import http_cache
 from imdb_cli.models import MovieResponse, ActorResponse
 from imdb_cli.formatters import (
     format_professions,
     format_genres,
+    format_rating,
     is_dead_or_alive,
     plural_s,
 )
@@ -17,6 +19,18 @@ load_dotenv(dotenv_path)
 
 server = os.getenv("API_URL", "http://localhost:8000")
 
+# Largest page the API returns for a search
+MAX_LIMIT = 1000
+ESTIMATED_TOTAL_HEADER = "X-Estimated-Total"
+
+
+def format_found(response: requests.Response, received: int, noun: str) -> str:
+    """Number of matches, estimated by the API when it returned only the first page"""
+    total = response.headers.get(ESTIMATED_TOTAL_HEADER)
+    if isinstance(total, str) and total.isdigit() and int(total) > received:
+        return f"Found about {int(total)} {noun}s."
+    return f"Found {received} {noun}{plural_s(received)}."
+
 
 @click.group()
 def cli():
@@ -63,8 +77,16 @@ def actor(name, limit):
         $ imdb actor "Tom Hanks" --limit 5
         $ imdb actor --limit 5 "Tom Hanks"
     """
+    if limit < 1:
+        click.echo("Error: Result number must be at least 1.", err=True)
+        return
+
     try:
-        response = requests.get(f"{server}/actors/search?name={name}", timeout=10)
+        response = http_cache.get(
+            f"{server}/actors/search",
+            params={"name": name, "limit": min(limit, MAX_LIMIT)},
+            timeout=10,
+        )
         response.raise_for_status()
 
         data = response.json()
@@ -76,13 +98,9 @@ def actor(name, limit):
             click.echo(f"Actor named '{name}' not found.", err=True)
             return
 
-        if limit < 1:
-            click.echo("Error: Result number must be at least 1.", err=True)
-            return
-
         shown = min(limit, number_of_actors)
         click.echo(
-            f"Found {number_of_actors} actor{plural_s(number_of_actors)}.\n"
+            f"{format_found(response, number_of_actors, 'actor')}\n"
             f"Showing {shown} actor{plural_s(shown)}."
         )
         for i, actor in enumerate(actor_data.actors[:limit], 1):
@@ -139,9 +157,15 @@ def movie(title, limit):
       imdb movie "Matrix" --limit 10
       imdb movie --limit 10 "Matrix"
     """
+    if limit < 1:
+        click.echo("Error: Result number must be at least 1.", err=True)
+        return
+
     try:
-        response = requests.get(
-            f"{server}/movies/search", params={"title": title}, timeout=10
+        response = http_cache.get(
+            f"{server}/movies/search",
+            params={"title": title, "limit": min(limit, MAX_LIMIT)},
+            timeout=10,
         )
         response.raise_for_status()
 
@@ -153,13 +177,9 @@ def movie(title, limit):
             click.echo(f"Movie titled '{title}' not found.", err=True)
             return
 
-        if limit < 1:
-            click.echo("Error: Result number must be at least 1.", err=True)
-            return
-
         shown = min(limit, number_of_movies)
         click.echo(
-            f"Found {number_of_movies} movie{plural_s(number_of_movies)}.\n"
+            f"{format_found(response, number_of_movies, 'movie')}\n"
             f"Showing {shown} movie{plural_s(shown)}."
         )
 
@@ -167,6 +187,7 @@ def movie(title, limit):
             click.echo(
                 f"{i}. {movie.primary_title}, originally titled '{movie.original_title}', "
                 f"is {format_genres(movie.genres)}."
+                f"{format_rating(movie.average_rating, movie.num_votes)}"
             )
 
     except requests.exceptions.HTTPError as e:
@@ -8,6 +8,8 @@ class Movie(BaseModel):
     primary_title: str
     original_title: str | None
     genres: str | None
+    average_rating: float | None = None
+    num_votes: int | None = None
 
 
 class MovieResponse(BaseModel):
@@ -95,6 +95,22 @@ class TestActorCommand:
             assert 'Tom Hanks' in result.output
             assert 'Robert De Niro' not in result.output
 
+    def test_limit_sent_to_server(self, runner, mock_formatters, sample_actor_data):
+        """Test the limit is applied by the API and its estimated total is shown."""
+        with patch('imdb_cli.main.requests.get') as mock_get:
+            mock_response = MagicMock()
+            mock_response.raise_for_status.return_value = None
+            mock_response.json.return_value = sample_actor_data
+            mock_response.headers = {"X-Estimated-Total": "4610"}
+            mock_get.return_value = mock_response
+            
+            result = runner.invoke(cli, ['actor', 'Tom', '--limit=1'])
+            
+            assert result.exit_code == 0
+            assert mock_get.call_args.kwargs["params"] == {"name": "Tom", "limit": 1}
+            assert 'Found about 4610 actors.' in result.output
+            assert 'Showing 1 actor.' in result.output
+
     def test_http_404_error(self, runner, mock_formatters):
         """Test HTTP 404 error handling."""
         with patch('imdb_cli.main.requests.get') as mock_get:
@@ -88,6 +88,22 @@ class TestMovieCommand:
             assert 'Showing 1 movie' in result.output
             assert "The Matrix" not in result.output
 
+    def test_limit_sent_to_server(self, runner, mock_formatters, sample_movie_data):
+        """Test the limit is applied by the API and its estimated total is shown."""
+        with patch('imdb_cli.main.requests.get') as mock_get:
+            mock_response = MagicMock()
+            mock_response.raise_for_status.return_value = None
+            mock_response.json.return_value = sample_movie_data
+            mock_response.headers = {"X-Estimated-Total": "553"}
+            mock_get.return_value = mock_response
+            
+            result = runner.invoke(cli, ['movie', 'Shrek', '--limit=1'])
+            
+            assert result.exit_code == 0
+            assert mock_get.call_args.kwargs["params"] == {"title": "Shrek", "limit": 1}
+            assert 'Found about 553 movies.' in result.output
+            assert 'Showing 1 movie.' in result.output
+
     def test_movie_http_404_error(self, runner, mock_formatters):
         """Test movie 404 error handling."""
         with patch('imdb_cli.main.requests.get') as mock_get:
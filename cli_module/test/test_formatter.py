@@ -2,6 +2,7 @@ import pytest
 from imdb_cli.formatters import (
     format_professions,
     format_genres,
+    format_rating,
     is_dead_or_alive,
     plural_s,
 )
@@ -71,6 +72,21 @@ class TestIsDeadOrAlive:
         assert result == "has"
 
 
+class TestFormatRating:
+    """Test format_rating function."""
+
+    def test_format_rating(self):
+        """Test rating with votes."""
+        result = format_rating(8.7, 2100000)
+        assert result == " Rated 8.7/10 by 2,100,000 users."
+
+    @pytest.mark.parametrize("rating,votes", [(None, None), (7.0, 0), (None, 10)])
+    def test_format_rating_unrated(self, rating, votes):
+        """Test unrated movies show nothing."""
+        result = format_rating(rating, votes)
+        assert result == ""
+
+
 class TestPluralS:
     """Test plural_s function."""
 
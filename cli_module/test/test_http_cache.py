@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from requests.structures import CaseInsensitiveDict
+
+from imdb_cli import http_cache
+
+URL = "http://localhost:8000/movies/search"
+PARAMS = {"title": "Matrix", "limit": 1}
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep the cached responses of every test in its own directory."""
+    monkeypatch.setenv("IMDB_CLI_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def make_response(status_code, body="", headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.text = body
+    response.headers = CaseInsensitiveDict(headers or {})
+    return response
+
+
+class TestHttpCache:
+    """Tests for the on-disk ETag revalidation cache."""
+
+    def test_first_request_is_stored(self, cache_dir):
+        """Test a response with an ETag is stored and no validator is sent."""
+        with patch('imdb_cli.http_cache.requests.get') as mock_get:
+            mock_get.return_value = make_response(
+                200, '[{"tconst": "tt0133093"}]', {"ETag": 'W/"v1"'}
+            )
+
+            http_cache.get(URL, PARAMS, timeout=10)
+
+            assert mock_get.call_args.kwargs["headers"] == {}
+            assert (cache_dir / "responses.json").exists()
+
+    def test_not_modified_uses_stored_body(self):
+        """Test a 304 is answered with the stored body and headers."""
+        with patch('imdb_cli.http_cache.requests.get') as mock_get:
+            mock_get.return_value = make_response(
+                200,
+                '[{"tconst": "tt0133093"}]',
+                {"ETag": 'W/"v1"', "X-Estimated-Total": "42"},
+            )
+            http_cache.get(URL, PARAMS, timeout=10)
+
+            mock_get.return_value = make_response(304)
+            response = http_cache.get(URL, PARAMS, timeout=10)
+
+            assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": 'W/"v1"'}
+            assert response.status_code == 200
+            assert response.json() == [{"tconst": "tt0133093"}]
+            assert response.headers["X-Estimated-Total"] == "42"
+
+    def test_responses_without_etag_are_not_stored(self, cache_dir):
+        """Test responses the API does not tag are not cached."""
+        with patch('imdb_cli.http_cache.requests.get') as mock_get:
+            mock_get.return_value = make_response(200, "[]")
+
+            http_cache.get(URL, PARAMS, timeout=10)
+
+            assert not (cache_dir / "responses.json").exists()
+
+    def test_corrupt_cache_is_ignored(self, cache_dir):
+        """Test an unreadable cache file does not break the request."""
+        (cache_dir / "responses.json").write_text("not json")
+
+        with patch('imdb_cli.http_cache.requests.get') as mock_get:
+            mock_get.return_value = make_response(200, "[]", {"ETag": 'W/"v1"'})
+
+            response = http_cache.get(URL, PARAMS, timeout=10)
+
+            assert response.status_code == 200
+            assert mock_get.call_args.kwargs["headers"] == {}
@@ -1,7 +1,7 @@
 import logging
 import pandas as pd
 import requests
-from typing import Iterator
+from typing import Iterator, Optional
 from utils.constants import IMDB_URL, CHUNK_SIZE
 from utils.metadata import load_metadata, save_metadata, should_reload
 
@@ -9,15 +9,24 @@ from utils.metadata import load_metadata, save_metadata, should_reload
 class DataExtractor:
     """Extract raw data from IMDb using pandas built-in URL streaming."""
 
-    def should_download(self, filename: str) -> bool:
+    def should_download(
+        self, filename: str, sample: Optional[str] = None, key: Optional[str] = None
+    ) -> bool:
         """Check if file needs to be downloaded based on ETag comparison"""
         url = f"{IMDB_URL}{filename}"
         stored_metadata = load_metadata()
-        logging.info(f"Checking for updates to {filename}")
-
-        return should_reload(stored_metadata, url)
-
-    def read_chunks(self, filename: str, cols: list[str], dtype: dict) -> Iterator[pd.DataFrame]:
+        logging.info(f"Checking for updates to {key or filename}")
+
+        return should_reload(stored_metadata, url, sample, key)
+
+    def read_chunks(
+        self,
+        filename: str,
+        cols: list[str],
+        dtype: dict,
+        sample: Optional[str] = None,
+        key: Optional[str] = None,
+    ) -> Iterator[pd.DataFrame]:
         """
         Read file in chunks directly from URL and streams it
 
@@ -26,6 +35,8 @@ class DataExtractor:
             filename: IMDb filename (e.g., 'name.basics.tsv.gz')
             cols: Columns that should be used from the downloaded file
             dtype: Type association for the data of the retrieved columns
+            sample: Sampling key stored with the ETag, None for a full load
+            key: Metadata entry name, defaults to the filename
 
         Yields
         ----------
@@ -39,21 +50,9 @@ class DataExtractor:
         try:
             etag = self._get_file_metadata(url)
 
-            for chunk in pd.read_csv(
-                url,
-                sep="\t",
-                chunksize=CHUNK_SIZE,
-                na_values=["\\N"],
-                keep_default_na=True,
-                compression="gzip",
-                on_bad_lines="warn",
-                engine="c",
-                usecols=cols,
-                dtype=dtype
-            ):
-                yield chunk
-
-            save_metadata(filename, etag)
+            yield from self.stream(filename, cols, dtype)
+
+            save_metadata(key or filename, etag, sample)
 
             logging.info(f"Successfully streamed {filename}")
 
@@ -61,6 +60,21 @@ class DataExtractor:
             logging.error(f"Failed to stream {filename}: {e}")
             raise
 
+    def stream(self, filename: str, cols: list[str], dtype: dict) -> Iterator[pd.DataFrame]:
+        """Read file in chunks from URL, without recording its ETag in the metadata"""
+        return pd.read_csv(
+            f"{IMDB_URL}{filename}",
+            sep="\t",
+            chunksize=CHUNK_SIZE,
+            na_values=["\\N"],
+            keep_default_na=True,
+            compression="gzip",
+            on_bad_lines="warn",
+            engine="c",
+            usecols=cols,
+            dtype=dtype
+        )
+
     def _get_file_metadata(self, url: str) -> str:
         """Get ETag and file size using HEAD request (doesn't download file)"""
         try:
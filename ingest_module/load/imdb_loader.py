@@ -1,7 +1,7 @@
 import logging
 import csv
 from io import StringIO
-from sqlalchemy import Engine
+from sqlalchemy import Engine, text
 from utils.datasets_config import DatasetConfig
 from alive_progress import alive_bar
 import pandas as pd
@@ -95,3 +95,33 @@ class DatabaseLoader:
 
         logging.info(f"Total: {total_rows:,} rows loaded to {table_name}")
         return total_rows
+
+    def save_search_ranks(self, dataset_config: DatasetConfig):
+        """Store the position of every row in the search order as its search_rank.
+
+        The API sorts the matches of a search by exact match and then by this
+        integer, so an index on it returns the first K matches in order
+        without sorting the whole match set. Ranks are unique, the order
+        ends with the ID.
+
+        Args
+        ----------
+            dataset_config: Configuration object containing the target table name,
+                its ID column and the search order.
+        """
+        table_name = dataset_config.table_name
+        id_column = dataset_config.mapping[dataset_config.id_column]
+
+        with self.engine.begin() as connection:
+            connection.execute(text(
+                f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS search_rank INTEGER"
+            ))
+            result = connection.execute(text(
+                f"UPDATE {table_name} AS target SET search_rank = ranked.search_rank "
+                f"FROM (SELECT {id_column}, row_number() OVER "
+                f"(ORDER BY {dataset_config.search_rank_order}) AS search_rank "
+                f"FROM {table_name}) AS ranked "
+                f"WHERE target.{id_column} = ranked.{id_column}"
+            ))
+
+        logging.info(f"Search ranks saved for {result.rowcount:,} rows of {table_name}")
@@ -1,42 +1,106 @@
+import argparse
 import logging
+from typing import Optional
 from extract.imdb_extractor import DataExtractor
 from transform.imdb_transformer import DataTransformer
 from load.imdb_loader import DatabaseLoader
-from utils.database import get_database_engine
-from utils.datasets_config import DatasetConfig,DATASETS
+from utils.database import get_database_engine, get_database_url, save_dataset_version
+from utils.datasets_config import DatasetConfig,DATASETS,DATASETS_BY_TABLE
+from utils.id_index import IdBitmap, IdLookup, parse_ids
+from utils.metadata import load_metadata, save_metadata
+from utils.sampling import SampleConfig, load_sample_ids, sample_chunk
+from utils.snapshot import export_snapshot, find_snapshot, get_remote_etags, restore_snapshot, snapshot_key
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def run_etl_pipeline(dataset_config: DatasetConfig):
+def sample_links(
+    extractor: DataExtractor, dataset_config: DatasetConfig, sample: SampleConfig
+) -> Optional[IdBitmap]:
+    """
+    IDs of the dataset needed by the datasets that reference it and are
+    sampled by another column, e.g. the episodes of the sampled series in movies
+    """
+    children = [
+        child for child in DATASETS
+        if child.sample_column
+        and child.references.get(child.id_column) == dataset_config.table_name
+    ]
+    if not sample.enabled or not children:
+        return None
+
+    ids = IdBitmap()
+    for child in children:
+        columns = [child.id_column, child.sample_column]
+        dtype = {column: "object" for column in columns}
+        for chunk in extractor.stream(child.filename, columns, dtype):
+            chunk = sample_chunk(chunk, child.sample_column, sample)
+            ids.add(parse_ids(chunk[child.id_column]))
+
+    logging.info(f"Sampling {len(ids):,} {dataset_config.table_name} IDs needed by their children")
+    return ids
+
+
+def run_etl_pipeline(
+    dataset_config: DatasetConfig,
+    sample: SampleConfig = SampleConfig(),
+    id_indexes: Optional[dict[str, IdBitmap]] = None,
+    force: bool = False,
+):
     """Run ETL for a single dataset"""
     filename = dataset_config.filename
     table_name = dataset_config.table_name
+    id_indexes = id_indexes if id_indexes is not None else {}
     
     logging.info(f"{'='*60}")
     logging.info(f"Processing {filename} to {table_name}")
     logging.info(f"{'='*60}")
     
     extractor = DataExtractor()
-    transformer = DataTransformer()
+    transformer = DataTransformer(sample, id_indexes)
     engine = get_database_engine()
     loader = DatabaseLoader(engine)
     
     try:
-        if not extractor.should_download(filename):
+        if not force and not extractor.should_download(
+            filename, sample.key, dataset_config.metadata_key
+        ):
             logging.info(f"Skipping {filename}")
             return
         
         logging.info("Starting pipeline")
 
+        for parent_table in set(dataset_config.references.values()):
+            if parent_table not in id_indexes:
+                parent_config = DATASETS_BY_TABLE[parent_table]
+                id_column = parent_config.mapping[parent_config.id_column]
+                id_indexes[parent_table] = IdBitmap.from_database(engine, parent_table, id_column)
+
+        for lookup_table, columns in dataset_config.lookups.items():
+            lookup_config = DATASETS_BY_TABLE[lookup_table]
+            id_column = lookup_config.mapping[lookup_config.id_column]
+            transformer.lookups[lookup_table] = IdLookup.from_database(
+                engine, lookup_table, id_column, columns
+            )
+
+        transformer.sample_linked_ids = sample_links(extractor, dataset_config, sample)
+
         #extract
-        raw_chunks = extractor.read_chunks(filename, dataset_config.columns, dataset_config.dtype_map)
+        raw_chunks = extractor.read_chunks(
+            filename,
+            dataset_config.columns,
+            dataset_config.dtype_map,
+            sample.key,
+            dataset_config.metadata_key,
+        )
         #transform
         transformed_chunks = transformer.transform_chunks(raw_chunks, dataset_config)
         #load
         total_rows = loader.load_chunks(transformed_chunks, dataset_config)
+        if dataset_config.search_rank_order:
+            loader.save_search_ranks(dataset_config)
         
         logging.info(f"Success {filename}: {total_rows:,} rows loaded")
         return total_rows
@@ -45,17 +109,141 @@ def run_etl_pipeline(dataset_config: DatasetConfig):
         engine.dispose()
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="IMDb ETL Pipeline")
+    parser.add_argument(
+        "--sample-fraction",
+        type=float,
+        default=None,
+        help="Keep only a deterministic fraction (0-1] of the rows, chosen by ID hash",
+    )
+    parser.add_argument(
+        "--sample-ids",
+        default=None,
+        help="File with nconst/tconst IDs (one per line) that are always kept when sampling",
+    )
+    parser.add_argument(
+        "--restore-snapshot",
+        action="store_true",
+        help="Restore the database from a snapshot when one matches the current dataset ETags",
+    )
+    parser.add_argument(
+        "--export-snapshot",
+        action="store_true",
+        help="Export the loaded and indexed tables as a snapshot and exit",
+    )
+    return parser.parse_args()
+
+
+def build_sample_config(args: argparse.Namespace) -> SampleConfig:
+    """Build the sampling configuration from the command line arguments"""
+    ids = load_sample_ids(args.sample_ids) if args.sample_ids else frozenset()
+
+    if args.sample_fraction is None:
+        fraction = 0.0 if ids else 1.0
+    elif not 0 < args.sample_fraction <= 1:
+        raise ValueError("--sample-fraction must be in the (0, 1] range")
+    else:
+        fraction = args.sample_fraction
+
+    return SampleConfig(fraction=fraction, ids=ids)
+
+
+def restore_from_snapshot(sample: SampleConfig) -> bool:
+    """Restore every dataset from a snapshot if one matches the remote ETags"""
+    filenames = sorted({dataset_config.filename for dataset_config in DATASETS})
+    etags = get_remote_etags(filenames)
+    if not etags:
+        return False
+
+    stored_metadata = load_metadata()
+    if all(
+        stored_metadata.get(d.metadata_key, {}).get("etag") == etags[d.filename]
+        and stored_metadata.get(d.metadata_key, {}).get("sample") == sample.key
+        for d in DATASETS
+    ):
+        logging.info("Database already up to date, snapshot not needed")
+        return False
+
+    path = find_snapshot(snapshot_key(etags, sample.key))
+    if not path:
+        logging.info("No snapshot for the current datasets")
+        return False
+
+    restore_snapshot(get_database_url(), path)
+    for dataset_config in DATASETS:
+        save_metadata(dataset_config.metadata_key, etags[dataset_config.filename], sample.key)
+    return True
+
+
+def export_to_snapshot(sample: SampleConfig):
+    """Export a snapshot of the tables loaded from the stored dataset ETags"""
+    stored_metadata = load_metadata()
+    etags = {}
+    for dataset_config in DATASETS:
+        entry = stored_metadata.get(dataset_config.metadata_key, {})
+        if not entry.get("etag") or entry.get("sample") != sample.key:
+            raise ValueError(f"{dataset_config.metadata_key} has not been loaded, run the pipeline first")
+        if etags.setdefault(dataset_config.filename, entry["etag"]) != entry["etag"]:
+            raise ValueError(f"{dataset_config.metadata_key} is out of date, run the pipeline first")
+
+    tables = [dataset_config.table_name for dataset_config in DATASETS]
+    export_snapshot(get_database_url(), tables, etags, sample.key)
+
+
+def update_dataset_version(sample: SampleConfig):
+    """Save the version of the loaded datasets, derived from their stored ETags"""
+    stored_metadata = load_metadata()
+    etags = {
+        dataset_config.metadata_key: stored_metadata.get(dataset_config.metadata_key, {}).get("etag")
+        for dataset_config in DATASETS
+    }
+
+    engine = get_database_engine()
+    try:
+        save_dataset_version(engine, snapshot_key(etags, sample.key))
+    finally:
+        engine.dispose()
+
+
 def main():
     """Run pipeline for all datasets"""
+    args = parse_args()
+    sample = build_sample_config(args)
+
+    if args.export_snapshot:
+        export_to_snapshot(sample)
+        return
+
     logging.info("Starting IMDb ETL Pipeline")
+    if sample.enabled:
+        logging.info(f"Sampling enabled ({sample.key})")
+
+    if args.restore_snapshot:
+        try:
+            if restore_from_snapshot(sample):
+                update_dataset_version(sample)
+                logging.info("Pipeline complete from snapshot!!")
+                return
+        except Exception as e:
+            logging.error(f"Failed to restore snapshot, running the pipeline: {e}")
     
+    id_indexes = {}
+    reloaded = set()
+
     for dataset_config in DATASETS:
+        # Datasets depending on a reloaded table are reloaded too to stay consistent
+        force = bool(dataset_config.dependencies & reloaded)
         try:
-            run_etl_pipeline(dataset_config)
+            if run_etl_pipeline(dataset_config, sample, id_indexes, force) is not None:
+                reloaded.add(dataset_config.table_name)
         except Exception as e:
             logging.error(f"Failed {dataset_config.filename}: {e}")
+            # A partial index would drop valid rows, children rebuild it from the table
+            id_indexes.pop(dataset_config.table_name, None)
             continue
-    
+
+    update_dataset_version(sample)
     logging.info("Pipeline complete!!")
 
 
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from utils.id_index import IdBitmap, IdLookup, parse_ids
+
+
+def test_parse_ids():
+    """Test IMDb IDs are converted to their integer part"""
+    ids = pd.Series(["nm0000158", "tt10872600", None, "ttXYZ"])
+
+    result = parse_ids(ids)
+
+    assert list(result) == [158, 10872600, -1, -1]
+
+
+def test_id_bitmap_add_and_contains():
+    """Test membership of added IDs"""
+    index = IdBitmap()
+    index.add(np.array([1, 158, 10872600]))
+
+    result = index.contains(np.array([1, 2, 158, 10872600, 99999999, -1]))
+
+    assert list(result) == [True, False, True, True, False, False]
+    assert len(index) == 3
+
+
+def test_id_bitmap_is_compact():
+    """Test the bitmap uses one bit per possible ID"""
+    index = IdBitmap()
+    index.add(np.arange(0, 8_000_000, 7))
+
+    assert index.nbytes <= 1_000_000
+    assert len(index) == len(range(0, 8_000_000, 7))
+
+
+def test_id_bitmap_add_duplicates():
+    """Test adding the same ID twice counts it once"""
+    index = IdBitmap()
+    index.add(np.array([5, 5, 5]))
+    index.add(np.array([5]))
+
+    assert len(index) == 1
+
+
+def test_id_lookup_get():
+    """Test values are returned in the requested order with nulls for missing IDs"""
+    values = pd.DataFrame({"average_rating": [9.3, 8.7], "num_votes": [3000000, 2000000]}).convert_dtypes()
+    lookup = IdLookup(np.array([111161, 133093]), values)
+
+    result = lookup.get(np.array([133093, 1, 111161]))
+
+    assert list(result["num_votes"].fillna(0)) == [2000000, 0, 3000000]
+    assert result["average_rating"].isna().tolist() == [False, True, False]
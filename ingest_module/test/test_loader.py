@@ -156,3 +156,33 @@ class TestLoadChunks:
 
         table_name = mock_to_sql.call_args[0][0]
         assert table_name == "movies"
+
+
+class TestSaveSearchRanks:
+    """Test save_search_ranks method."""
+
+    def test_adds_column_and_ranks_rows(self, database_loader, mock_engine):
+        """Test the rank column is added and filled from the search order."""
+        connection = mock_engine.begin.return_value.__enter__.return_value
+        connection.execute.return_value.rowcount = 1
+
+        database_loader.save_search_ranks(MOVIES_CONFIG)
+
+        statements = [str(call[0][0]) for call in connection.execute.call_args_list]
+        assert statements[0] == "ALTER TABLE movies ADD COLUMN IF NOT EXISTS search_rank INTEGER"
+        assert (
+            "row_number() OVER (ORDER BY num_votes DESC NULLS LAST, length(primary_title), tconst)"
+            in statements[1]
+        )
+        assert "WHERE target.tconst = ranked.tconst" in statements[1]
+
+    def test_uses_mapped_id_column(self, database_loader, mock_engine):
+        """Test actors are ranked by name length and joined on nconst."""
+        connection = mock_engine.begin.return_value.__enter__.return_value
+        connection.execute.return_value.rowcount = 1
+
+        database_loader.save_search_ranks(ACTORS_CONFIG)
+
+        update = str(connection.execute.call_args_list[1][0][0])
+        assert "UPDATE actors AS target" in update
+        assert "ORDER BY length(primary_name), nconst" in update
@@ -114,3 +114,37 @@ def test_save_metadata_overwrites_existing(temp_metadata_file):
     metadata = load_metadata()
     
     assert metadata["test.tsv.gz"]["etag"] == "etag2"
+
+
+def test_should_reload_sample_mismatch(temp_metadata_file):
+    """Test should_reload returns True when the stored load used a different sample"""
+    stored_metadata = {
+        "test.tsv.gz": {
+            "etag": "etag123",
+            "sample": "fraction=0.01"
+        }
+    }
+    url = "https://example.com/test.tsv.gz"
+    
+    with patch("utils.metadata.requests.head") as mock_head:
+        result = should_reload(stored_metadata, url)
+    
+    assert result is True
+    mock_head.assert_not_called()
+
+
+def test_should_reload_uses_key(temp_metadata_file):
+    """Test should_reload checks the entry of the key instead of the filename"""
+    stored_metadata = {
+        "test.tsv.gz": {
+            "etag": "etag123"
+        }
+    }
+    url = "https://example.com/test.tsv.gz"
+    
+    mock_response = MagicMock()
+    mock_response.headers = {"ETag": "etag123"}
+    
+    with patch("utils.metadata.requests.head", return_value=mock_response):
+        assert should_reload(stored_metadata, url) is False
+        assert should_reload(stored_metadata, url, key="test.tsv.gz:other") is True
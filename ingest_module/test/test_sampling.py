@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from utils.id_index import IdBitmap
+from utils.sampling import SampleConfig, sample_chunk
+
+
+def make_chunk(n):
+    """Create a chunk with n sequential actor IDs"""
+    return pd.DataFrame({"nconst": [f"nm{i:07d}" for i in range(n)], "value": range(n)})
+
+
+def test_sample_chunk_disabled_keeps_all_rows():
+    """Test a full load keeps every row"""
+    chunk = make_chunk(100)
+
+    result = sample_chunk(chunk, "nconst", SampleConfig())
+
+    assert len(result) == 100
+
+
+def test_sample_chunk_is_deterministic():
+    """Test the same IDs are kept regardless of how the data is chunked"""
+    chunk = make_chunk(10000)
+    sample = SampleConfig(fraction=0.1)
+
+    whole = sample_chunk(chunk, "nconst", sample)
+    split = pd.concat(
+        [sample_chunk(chunk.iloc[:3333], "nconst", sample),
+         sample_chunk(chunk.iloc[3333:], "nconst", sample)]
+    )
+
+    assert list(whole["nconst"]) == list(split["nconst"])
+    assert 800 < len(whole) < 1200
+
+
+def test_sample_chunk_keeps_allowlisted_ids():
+    """Test allowlisted IDs are always kept"""
+    chunk = make_chunk(1000)
+    sample = SampleConfig(fraction=0.0, ids=frozenset({"nm0000158", "tt0111161"}))
+
+    result = sample_chunk(chunk, "nconst", sample)
+
+    assert list(result["nconst"]) == ["nm0000158"]
+
+
+def test_sample_chunk_keeps_linked_ids():
+    """Test IDs needed by a dataset sampled on another column are kept"""
+    chunk = make_chunk(1000)
+    linked = IdBitmap()
+    linked.add(np.array([42, 420]))
+
+    result = sample_chunk(chunk, "nconst", SampleConfig(fraction=0.0), linked)
+
+    assert list(result["nconst"]) == ["nm0000042", "nm0000420"]
+
+
+def test_sample_key():
+    """Test the sampling key stored in the metadata"""
+    assert SampleConfig().key is None
+    assert SampleConfig(fraction=0.01).key == "fraction=0.01"
+    assert SampleConfig(fraction=0.01, ids=frozenset({"nm1"})).key.startswith("fraction=0.01;ids=")
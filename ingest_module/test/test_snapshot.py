@@ -0,0 +1,90 @@
+import json
+import subprocess
+from pathlib import Path
+import pytest
+from unittest.mock import patch
+
+import utils.snapshot as snapshot_module
+from utils.snapshot import export_snapshot, find_snapshot, restore_snapshot, snapshot_key
+
+DATABASE_URL = "postgresql+psycopg2://user:pass@db:5432/imdb"
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    """Use a temporary snapshot directory"""
+    monkeypatch.setattr(snapshot_module, "SNAPSHOT_DIR", tmp_path)
+    return tmp_path
+
+
+def fake_pg_dump(command, check):
+    """Create the dump directory like pg_dump would"""
+    target = next(arg for arg in command if arg.startswith("--file="))
+    Path(target.split("=", 1)[1]).mkdir()
+
+
+def test_snapshot_key_changes_with_etags():
+    """Test the key depends on the ETags and the sample"""
+    key = snapshot_key({"a.tsv.gz": "etag1"})
+
+    assert key == snapshot_key({"a.tsv.gz": "etag1"})
+    assert key != snapshot_key({"a.tsv.gz": "etag2"})
+    assert key != snapshot_key({"a.tsv.gz": "etag1"}, "fraction=0.01")
+
+
+def test_export_snapshot_runs_pg_dump(snapshot_dir):
+    """Test the pg_dump command and the manifest"""
+    etags = {"a.tsv.gz": "etag1"}
+
+    with patch("utils.snapshot.subprocess.run", side_effect=fake_pg_dump) as mock_run:
+        path = export_snapshot(DATABASE_URL, ["actors", "movies"], etags, jobs=4)
+
+    command = mock_run.call_args[0][0]
+    assert command[0] == "pg_dump"
+    assert "--format=directory" in command
+    assert "--jobs=4" in command
+    assert "--dbname=postgresql://user:pass@db:5432/imdb" in command
+    assert "--table=actors" in command and "--table=movies" in command
+
+    manifest = json.loads((path / "manifest.json").read_text())
+    assert manifest["etags"] == etags
+    assert find_snapshot(snapshot_key(etags)) == path
+
+
+def test_export_snapshot_skips_existing(snapshot_dir):
+    """Test an existing snapshot is reused"""
+    etags = {"a.tsv.gz": "etag1"}
+
+    with patch("utils.snapshot.subprocess.run", side_effect=fake_pg_dump) as mock_run:
+        first = export_snapshot(DATABASE_URL, ["actors"], etags)
+        second = export_snapshot(DATABASE_URL, ["actors"], etags)
+
+    assert first == second
+    mock_run.assert_called_once()
+
+
+def test_export_snapshot_failure_cleans_up(snapshot_dir):
+    """Test a failed dump leaves no snapshot behind"""
+    error = subprocess.CalledProcessError(1, "pg_dump")
+
+    with patch("utils.snapshot.subprocess.run", side_effect=error):
+        with pytest.raises(subprocess.CalledProcessError):
+            export_snapshot(DATABASE_URL, ["actors"], {"a.tsv.gz": "etag1"})
+
+    assert list(snapshot_dir.iterdir()) == []
+
+
+def test_restore_snapshot_runs_pg_restore(snapshot_dir):
+    """Test the pg_restore command"""
+    path = snapshot_dir / "key"
+    path.mkdir()
+    (path / "manifest.json").write_text(json.dumps({"key": "key", "tables": ["actors"]}))
+
+    with patch("utils.snapshot.subprocess.run") as mock_run:
+        manifest = restore_snapshot(DATABASE_URL, path, jobs=2)
+
+    command = mock_run.call_args[0][0]
+    assert command[0] == "pg_restore"
+    assert "--clean" in command and "--jobs=2" in command
+    assert command[-1] == str(path)
+    assert manifest["tables"] == ["actors"]
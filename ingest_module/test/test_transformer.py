@@ -1,6 +1,19 @@
+import io
+import numpy as np
 import pandas as pd
-from transform.imdb_transformer import DataTransformer
-from utils.datasets_config import ACTORS_CONFIG, MOVIES_CONFIG
+from dataclasses import replace
+from sqlalchemy import create_engine
+from transform.imdb_transformer import DataTransformer, normalize_text
+from utils.datasets_config import (
+    ACTOR_TITLES_CONFIG,
+    ACTORS_CONFIG,
+    AKAS_CONFIG,
+    EPISODES_CONFIG,
+    MOVIES_CONFIG,
+    RATINGS_CONFIG,
+)
+from utils.id_index import IdBitmap, IdLookup, parse_ids
+from utils.sampling import SampleConfig, sample_chunk
 
 
 class TestTransformChunksMovies:
@@ -158,6 +171,254 @@ class TestTransformChunksMovies:
         assert len(chunks) == 1
 
 
+class TestNormalizeText:
+    """Test accent and case folding of search columns."""
+
+    def test_normalize_text_folds_accents_and_case(self):
+        """Accents and case should be removed while other scripts are kept."""
+        values = pd.Series(["Penélope Cruz", "LA VITA È BELLA", "千と千尋の神隠し", "Ærøskøbing"])
+
+        result = normalize_text(values)
+
+        assert list(result) == ["penelope cruz", "la vita e bella", "千と千尋の神隠し", "ærøskøbing"]
+
+    def test_transform_chunks_adds_normalized_title(self):
+        """Movies should get a normalized title column."""
+        transformer = DataTransformer()
+
+        df = pd.DataFrame(
+            {
+                "tconst": ["tt0118799"],
+                "primaryTitle": ["La vita è bella"],
+                "originalTitle": ["La vita è bella"],
+                "genres": ["Comedy,Drama"],
+            }
+        )
+
+        _, chunk_df = list(transformer.transform_chunks(iter([df]), MOVIES_CONFIG))[0]
+
+        assert chunk_df.iloc[0]["primary_title_normalized"] == "la vita e bella"
+
+
+class TestLookups:
+    """Test columns joined from lookup tables."""
+
+    def test_transform_chunks_joins_ratings(self):
+        """Movies should get the rating of their tconst, null when unrated."""
+        ratings = IdLookup(
+            np.array([133093]),
+            pd.DataFrame({"average_rating": [8.7], "num_votes": [2100000]}).convert_dtypes(),
+        )
+        transformer = DataTransformer(lookups={"ratings": ratings})
+
+        df = pd.DataFrame(
+            {
+                "tconst": ["tt0133093", "tt0000001"],
+                "primaryTitle": ["The Matrix", "Carmencita"],
+                "originalTitle": ["The Matrix", "Carmencita"],
+                "genres": ["Action,Sci-Fi", "Documentary,Short"],
+            }
+        )
+
+        _, chunk_df = list(transformer.transform_chunks(iter([df]), MOVIES_CONFIG))[0]
+
+        assert chunk_df.iloc[0]["num_votes"] == 2100000
+        assert chunk_df.iloc[0]["average_rating"] == 8.7
+        assert pd.isna(chunk_df.iloc[1]["num_votes"])
+
+    def test_loaded_rating_keeps_its_decimal(self):
+        """The rating loaded into movies should be the one of the source file."""
+        engine = create_engine("sqlite://")
+        source = "tconst\taverageRating\tnumVotes\ntt0133093\t8.7\t2100000\n"
+        raw = pd.read_csv(io.StringIO(source), sep="\t", dtype=RATINGS_CONFIG.dtype_map)
+        _, ratings = list(DataTransformer().transform_chunks(iter([raw]), RATINGS_CONFIG))[0]
+        ratings.to_sql("ratings", engine, index=False)
+
+        lookup = IdLookup.from_database(
+            engine, "ratings", "tconst", ["average_rating", "num_votes"]
+        )
+        transformer = DataTransformer(lookups={"ratings": lookup})
+        df = pd.DataFrame(
+            {
+                "tconst": ["tt0133093"],
+                "primaryTitle": ["The Matrix"],
+                "originalTitle": ["The Matrix"],
+                "genres": ["Action,Sci-Fi"],
+            }
+        )
+        _, movies = list(transformer.transform_chunks(iter([df]), MOVIES_CONFIG))[0]
+        movies.to_sql("movies", engine, index=False)
+
+        loaded = pd.read_sql("SELECT average_rating FROM movies", engine)
+        assert loaded["average_rating"].tolist() == [8.7]
+
+
+class TestReferentialFiltering:
+    """Test duplicate and orphan filtering across chunks."""
+
+    def test_transform_chunks_drops_duplicates_across_chunks(self):
+        """Rows repeating an ID from a previous chunk should be dropped."""
+        transformer = DataTransformer()
+
+        def sample_chunks():
+            for ids in (["tt0000001", "tt0000002", "tt0000002"], ["tt0000002", "tt0000003"]):
+                yield pd.DataFrame(
+                    {
+                        "tconst": ids,
+                        "primaryTitle": ["Movie"] * len(ids),
+                        "originalTitle": ["Movie"] * len(ids),
+                        "genres": ["Drama"] * len(ids),
+                    }
+                )
+
+        chunks = list(transformer.transform_chunks(sample_chunks(), MOVIES_CONFIG))
+
+        loaded = [tconst for _, chunk_df in chunks for tconst in chunk_df["tconst"]]
+        assert loaded == ["tt0000001", "tt0000002", "tt0000003"]
+        assert transformer.stats["duplicates"] == 2
+        assert len(transformer.id_indexes["movies"]) == 3
+
+    def test_transform_chunks_drops_orphans(self):
+        """Rows referencing IDs missing from the parent table should be dropped."""
+        parents = IdBitmap()
+        parents.add(np.array([1]))
+        transformer = DataTransformer(id_indexes={"movies": parents})
+        config = replace(ACTORS_CONFIG, references={"knownFor": "movies"}, columns=ACTORS_CONFIG.columns + ["knownFor"])
+
+        df = pd.DataFrame(
+            {
+                "nconst": ["nm0000001", "nm0000002"],
+                "primaryName": ["Actor1", "Actor2"],
+                "birthYear": [1990, 1991],
+                "deathYear": [None, None],
+                "primaryProfession": ["actor", "actor"],
+                "knownFor": ["tt0000001", "tt0000002"],
+            }
+        )
+
+        chunks = list(transformer.transform_chunks(iter([df]), config))
+
+        _, chunk_df = chunks[0]
+        assert list(chunk_df["nconst"]) == ["nm0000001"]
+        assert transformer.stats["orphans"] == 1
+
+
+    def test_transform_chunks_dedups_akas_per_title(self):
+        """Akas repeating a normalized title of the same movie should be dropped, also across chunks."""
+        movies = IdBitmap()
+        movies.add(np.array([118799]))
+        transformer = DataTransformer(id_indexes={"movies": movies})
+
+        def sample_chunks():
+            yield pd.DataFrame(
+                {
+                    "titleId": ["tt0118799", "tt0118799", "tt0118799"],
+                    "title": ["La vita è bella", "Life Is Beautiful", "La vita e bella"],
+                    "region": ["IT", "US", "ES"],
+                    "language": [None, None, None],
+                }
+            )
+            yield pd.DataFrame(
+                {
+                    "titleId": ["tt0118799", "tt0118799", "tt9999999"],
+                    "title": ["LIFE IS BEAUTIFUL", "La vida es bella", "Orphan"],
+                    "region": ["GB", "MX", "US"],
+                    "language": [None, None, None],
+                }
+            )
+
+        chunks = list(transformer.transform_chunks(sample_chunks(), AKAS_CONFIG))
+
+        titles = [title for _, chunk_df in chunks for title in chunk_df["title"]]
+        assert titles == ["La vita è bella", "Life Is Beautiful", "La vida es bella"]
+        assert transformer.stats["duplicates"] == 2
+        assert transformer.stats["orphans"] == 1
+
+
+    def test_transform_chunks_episodes_use_integer_ids(self):
+        """Episodes should be stored with integer IDs and require a loaded parent."""
+        movies = IdBitmap()
+        movies.add(np.array([903747, 959621, 1232456]))
+        transformer = DataTransformer(id_indexes={"movies": movies})
+
+        df = pd.DataFrame(
+            {
+                "tconst": ["tt0959621", "tt1232456", "tt0000002"],
+                "parentTconst": ["tt0903747", "tt0903747", None],
+                "seasonNumber": pd.array([1, 1, None], dtype="Int16"),
+                "episodeNumber": pd.array([1, 2, None], dtype="Int32"),
+            }
+        )
+
+        _, chunk_df = list(transformer.transform_chunks(iter([df]), EPISODES_CONFIG))[0]
+
+        assert list(chunk_df["episode_id"]) == [959621, 1232456]
+        assert list(chunk_df["parent_id"]) == [903747, 903747]
+        assert list(chunk_df["episode_number"]) == [1, 2]
+
+    def test_sampled_series_keep_every_episode(self):
+        """A sampled series should keep all its episodes, which the movies sample keeps too."""
+        sample = SampleConfig(fraction=0.0, ids=frozenset({"tt0903747"}))
+        episode_ids = [f"tt{959621 + i:07d}" for i in range(20)]
+        episodes = pd.DataFrame(
+            {
+                "tconst": episode_ids + ["tt9999999"],
+                "parentTconst": ["tt0903747"] * 20 + ["tt0000001"],
+                "seasonNumber": pd.array([1] * 21, dtype="Int16"),
+                "episodeNumber": pd.array(list(range(1, 22)), dtype="Int32"),
+            }
+        )
+        titles = ["tt0903747", "tt0000001", "tt9999999"] + episode_ids
+        movies = pd.DataFrame(
+            {
+                "tconst": titles,
+                "primaryTitle": titles,
+                "originalTitle": titles,
+                "genres": ["Drama"] * len(titles),
+            }
+        )
+
+        linked = IdBitmap()
+        linked.add(parse_ids(sample_chunk(episodes, "parentTconst", sample)["tconst"]))
+        movies_transformer = DataTransformer(sample, sample_linked_ids=linked)
+        _, movies_df = list(movies_transformer.transform_chunks(iter([movies]), MOVIES_CONFIG))[0]
+        transformer = DataTransformer(sample, movies_transformer.id_indexes)
+        _, episodes_df = list(transformer.transform_chunks(iter([episodes]), EPISODES_CONFIG))[0]
+
+        assert list(movies_df["tconst"]) == ["tt0903747"] + episode_ids
+        assert list(episodes_df["episode_id"]) == list(range(959621, 959641))
+
+    def test_transform_chunks_explodes_known_for_titles(self):
+        """Known for titles should be split into one row per loaded actor and title."""
+        actors = IdBitmap()
+        actors.add(np.array([158, 138]))
+        movies = IdBitmap()
+        movies.add(np.array([109830, 111161, 1375666]))
+        transformer = DataTransformer(id_indexes={"actors": actors, "movies": movies})
+
+        df = pd.DataFrame(
+            {
+                "nconst": ["nm0000158", "nm0000138", "nm0000001", "nm0000002"],
+                "knownForTitles": [
+                    "tt0109830,tt0111161,tt9999999",
+                    "tt1375666",
+                    "tt0111161",
+                    None,
+                ],
+            }
+        )
+
+        _, chunk_df = list(transformer.transform_chunks(iter([df]), ACTOR_TITLES_CONFIG))[0]
+
+        assert list(chunk_df.columns) == ["nconst", "tconst"]
+        assert list(zip(chunk_df["nconst"], chunk_df["tconst"])) == [
+            ("nm0000158", "tt0109830"),
+            ("nm0000158", "tt0111161"),
+            ("nm0000138", "tt1375666"),
+        ]
+        assert transformer.stats["orphans"] == 2
+
+
 class TestFilterCriticalNulls:
     """Test _filter_critical_nulls method."""
 
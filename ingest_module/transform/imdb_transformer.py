@@ -1,18 +1,56 @@
 import logging
+import numpy as np
 import pandas as pd
-from typing import Iterator
+from typing import Iterator, Optional
 from utils.datasets_config import DatasetConfig
+from utils.id_index import IdBitmap, IdLookup, parse_ids
+from utils.sampling import SampleConfig, sample_chunk
+
+# Unicode combining diacritical marks left as separate characters by NFKD
+COMBINING_MARKS = r"[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]"
+
+
+def normalize_text(values: pd.Series) -> pd.Series:
+    """
+    Fold accents and case so searches match regardless of them
+
+    Example: "Penélope Cruz" -> "penelope cruz". The API applies the same
+    normalization to the search terms.
+    """
+    return (
+        values.str.normalize("NFKD")
+        .str.replace(COMBINING_MARKS, "", regex=True)
+        .str.casefold()
+    )
 
 
 class DataTransformer:
     """Transform and clean IMDb data"""
 
+    def __init__(
+        self,
+        sample: Optional[SampleConfig] = None,
+        id_indexes: Optional[dict[str, IdBitmap]] = None,
+        lookups: Optional[dict[str, IdLookup]] = None,
+        sample_linked_ids: Optional[IdBitmap] = None,
+    ):
+        self.sample = sample or SampleConfig()
+        self.id_indexes = id_indexes if id_indexes is not None else {}
+        self.lookups = lookups if lookups is not None else {}
+        self.sample_linked_ids = sample_linked_ids
+        self.stats = {"duplicates": 0, "orphans": 0}
+
     def transform_chunks(
         self, raw_chunks: Iterator[pd.DataFrame], dataset_config: DatasetConfig
     ) -> Iterator[tuple[int, pd.DataFrame]]:
         """
         Transform raw chunks with data quality filters
 
+        Rows whose referenced IDs are not loaded in the parent tables and rows
+        repeating an ID already seen in a previous chunk are dropped. The IDs
+        that survive are registered in `id_indexes` under the table name so
+        the datasets loaded afterwards can reference them.
+
         Args
         ----------
             raw_chunks: Iterator of raw DataFrames from DataExtractor
@@ -24,6 +62,10 @@ class DataTransformer:
         """
         table_name = dataset_config.table_name
         mapping = dataset_config.mapping
+        seen_ids = IdBitmap()
+        self.id_indexes[table_name] = seen_ids
+        self.stats = {"duplicates": 0, "orphans": 0}
+        self._last_group = (None, set())
 
         for i, chunk in enumerate(raw_chunks):
 
@@ -33,22 +75,55 @@ class DataTransformer:
                 ]
                 chunk = chunk[available_cols].copy()
 
+            chunk = sample_chunk(
+                chunk,
+                dataset_config.sample_column or dataset_config.id_column,
+                self.sample,
+                self.sample_linked_ids,
+            )
+
             if chunk.empty:
                 logging.debug(f"Chunk {i} empty after filtering")
                 continue
 
             chunk = self._filter_critical_nulls(chunk, table_name)
 
+            if dataset_config.explode_column:
+                chunk = self._explode(chunk, dataset_config.explode_column)
+
+            chunk = self._filter_orphans(chunk, dataset_config)
+
+            if dataset_config.unique_id:
+                chunk = self._drop_duplicates(chunk, dataset_config.id_column, seen_ids)
+
             chunk = chunk.rename(columns=mapping)
 
             chunk = chunk.where(pd.notnull(chunk), None)
 
+            for column, normalized_column in dataset_config.normalized_columns.items():
+                chunk[normalized_column] = normalize_text(chunk[column])
+
+            for column in dataset_config.integer_id_columns:
+                chunk[column] = parse_ids(chunk[column]).astype(np.int32)
+
+            if dataset_config.dedup_column:
+                chunk = self._drop_group_duplicates(
+                    chunk, mapping[dataset_config.id_column], dataset_config.dedup_column
+                )
+
+            chunk = self._join_lookups(chunk, dataset_config)
+
             if table_name == "actors" and "death_year" in chunk.columns:
                 chunk["is_dead"] = chunk["death_year"].notna()
                 chunk = chunk.drop(columns=["death_year"])
 
             yield i, chunk
 
+        logging.info(
+            f"{table_name}: dropped {self.stats['duplicates']:,} duplicate and "
+            f"{self.stats['orphans']:,} orphan rows"
+        )
+
     def _filter_critical_nulls(
         self, chunk: pd.DataFrame, table_name: str
     ) -> pd.DataFrame:
@@ -67,4 +142,96 @@ class DataTransformer:
                 & chunk["genres"].notna()
             ]
 
+        elif table_name == "movie_akas":
+            chunk = chunk[chunk["title"].notna()]
+
+        elif table_name == "episodes":
+            chunk = chunk[chunk["parentTconst"].notna()]
+
+        elif table_name == "actor_titles":
+            chunk = chunk[chunk["knownForTitles"].notna()]
+
+        return chunk
+
+    def _explode(self, chunk: pd.DataFrame, column: str) -> pd.DataFrame:
+        """Split the comma separated values of the column into one row per value"""
+        return chunk.assign(**{column: chunk[column].str.split(",")}).explode(
+            column, ignore_index=True
+        )
+
+    def _filter_orphans(
+        self, chunk: pd.DataFrame, dataset_config: DatasetConfig
+    ) -> pd.DataFrame:
+        """Filter rows referencing IDs that are not loaded in the parent tables"""
+        if not dataset_config.references or chunk.empty:
+            return chunk
+
+        keep = np.ones(len(chunk), dtype=bool)
+        for column, parent_table in dataset_config.references.items():
+            keep &= self.id_indexes[parent_table].contains(parse_ids(chunk[column]))
+
+        self.stats["orphans"] += int((~keep).sum())
+        return chunk[keep]
+
+    def _join_lookups(
+        self, chunk: pd.DataFrame, dataset_config: DatasetConfig
+    ) -> pd.DataFrame:
+        """Copy the configured columns of the lookup tables, null when the ID is missing"""
+        if not dataset_config.lookups:
+            return chunk
+
+        ids = parse_ids(chunk[dataset_config.mapping[dataset_config.id_column]])
+        for table_name, columns in dataset_config.lookups.items():
+            if table_name not in self.lookups:
+                logging.warning(f"No {table_name} lookup, {', '.join(columns)} left empty")
+                chunk[columns] = None
+                continue
+
+            values = self.lookups[table_name].get(ids)
+            for column in columns:
+                chunk[column] = values[column].array
+
+        return chunk
+
+    def _drop_duplicates(
+        self, chunk: pd.DataFrame, id_column: str, seen_ids: IdBitmap
+    ) -> pd.DataFrame:
+        """Drop rows whose ID already appeared in this or a previous chunk"""
+        if chunk.empty:
+            return chunk
+
+        ids = parse_ids(chunk[id_column])
+        duplicated = seen_ids.contains(ids) | pd.Series(ids).duplicated().to_numpy()
+        seen_ids.add(ids[~duplicated])
+
+        self.stats["duplicates"] += int(duplicated.sum())
+        return chunk[~duplicated]
+
+    def _drop_group_duplicates(
+        self, chunk: pd.DataFrame, id_column: str, column: str
+    ) -> pd.DataFrame:
+        """
+        Drop rows repeating a value of the column within the same ID
+
+        The IMDb files are sorted by ID, so only the last ID of the previous
+        chunk can continue in the current one and its values are carried over.
+        """
+        if chunk.empty:
+            return chunk
+
+        last_id, last_values = self._last_group
+        duplicated = (
+            chunk.duplicated(subset=[id_column, column])
+            | ((chunk[id_column] == last_id) & chunk[column].isin(last_values))
+        ).to_numpy()
+        chunk = chunk[~duplicated]
+        self.stats["duplicates"] += int(duplicated.sum())
+
+        if not chunk.empty:
+            group_id = chunk[id_column].iloc[-1]
+            group_values = set(chunk.loc[chunk[id_column] == group_id, column])
+            if group_id == last_id:
+                group_values |= last_values
+            self._last_group = (group_id, group_values)
+
         return chunk
@@ -3,3 +3,6 @@ IMDB_URL = "https://datasets.imdbws.com/"
 CHUNK_SIZE = 100000
 DOWNLOAD_CHUNK_SIZE = 8192
 MAX_RETRIES = 3
+SAMPLE_BUCKETS = 10000
+SNAPSHOT_KEEP = 2
+SNAPSHOT_COMPRESSION = 6
@@ -1,17 +1,38 @@
 import os
 import logging
-from sqlalchemy import create_engine, Engine
+from sqlalchemy import create_engine, text, Engine
 from dotenv import load_dotenv, find_dotenv
 
 load_dotenv(find_dotenv())
 
-def get_database_engine() -> Engine:
-    """Create database engine with connection pooling"""
+def get_database_url() -> str:
+    """Read the database URL from the environment"""
     database_url = os.getenv("DATABASE_URL")
     if not database_url:
         raise ValueError("DATABASE_URL environment variable not set")
+    return database_url
+
+
+def get_database_engine() -> Engine:
+    """Create database engine with connection pooling"""
+    database_url = get_database_url()
     
     logging.info("Connecting to database")
     engine = create_engine(database_url)
     logging.info("Database engine created")
     return engine
+
+
+def save_dataset_version(engine: Engine, version: str):
+    """Store the version of the loaded datasets, the API drops its caches when it changes"""
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS dataset_version "
+            "(version TEXT NOT NULL, loaded_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+        ))
+        connection.execute(text("DELETE FROM dataset_version"))
+        connection.execute(
+            text("INSERT INTO dataset_version (version) VALUES (:version)"),
+            {"version": version},
+        )
+    logging.info(f"Dataset version {version} saved")
@@ -1,5 +1,5 @@
 # config/datasets.py
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 
 
@@ -9,14 +9,46 @@ class DatasetConfig:
 
     filename: str
     table_name: str
+    id_column: str
     columns: List[str]
     dtype_map: Dict[str, str]
     mapping: Dict[str, str]
+    # False when id_column is not a primary key (e.g. several akas per title)
+    unique_id: bool = True
+    # Column whose values must be unique within each ID, requires rows sorted by ID
+    dedup_column: Optional[str] = None
+    # Raw column -> parent table whose IDs the column must reference
+    references: Dict[str, str] = field(default_factory=dict)
+    # Column -> new column with its accent and case folded text, used for searches
+    normalized_columns: Dict[str, str] = field(default_factory=dict)
+    # Mapped ID columns stored as the integer part of the ID ('tt0111161' -> 111161)
+    integer_id_columns: List[str] = field(default_factory=list)
+    # Table keyed by the same ID -> columns copied from it into this dataset
+    lookups: Dict[str, List[str]] = field(default_factory=dict)
+    # Raw column holding a comma separated list, split into one row per value
+    explode_column: Optional[str] = None
+    # Metadata entry name, required when the file is loaded by several datasets
+    alias: Optional[str] = None
+    # ORDER BY of the searches besides exact matches, stored as the search_rank column
+    search_rank_order: Optional[str] = None
+    # Raw column the sample is keyed on instead of id_column, e.g. the series of an episode
+    sample_column: Optional[str] = None
+
+    @property
+    def metadata_key(self) -> str:
+        """Name of the metadata entry tracking the ETag of this dataset"""
+        return self.alias or self.filename
+
+    @property
+    def dependencies(self) -> set[str]:
+        """Tables that must be loaded before this dataset"""
+        return set(self.references.values()) | set(self.lookups)
 
 
 ACTORS_CONFIG = DatasetConfig(
     filename="name.basics.tsv.gz",
     table_name="actors",
+    id_column="nconst",
     columns=["nconst", "primaryName", "birthYear", "deathYear", "primaryProfession"],
     dtype_map={
         "nconst": "object",
@@ -32,11 +64,14 @@ ACTORS_CONFIG = DatasetConfig(
         "deathYear": "death_year",
         "primaryProfession": "primary_profession",
     },
+    normalized_columns={"primary_name": "primary_name_normalized"},
+    search_rank_order="length(primary_name), nconst",
 )
 
 MOVIES_CONFIG = DatasetConfig(
     filename="title.basics.tsv.gz",
     table_name="movies",
+    id_column="tconst",
     columns=["tconst", "primaryTitle", "originalTitle", "genres"],
     dtype_map={
         "tconst": "object",
@@ -50,7 +85,103 @@ MOVIES_CONFIG = DatasetConfig(
         "originalTitle": "original_title",
         "genres": "genres",
     },
+    normalized_columns={"primary_title": "primary_title_normalized"},
+    lookups={"ratings": ["average_rating", "num_votes"]},
+    search_rank_order="num_votes DESC NULLS LAST, length(primary_title), tconst",
+)
+
+RATINGS_CONFIG = DatasetConfig(
+    filename="title.ratings.tsv.gz",
+    table_name="ratings",
+    id_column="tconst",
+    columns=["tconst", "averageRating", "numVotes"],
+    dtype_map={
+        "tconst": "object",
+        "averageRating": "float64",
+        "numVotes": "Int32",
+    },
+    mapping={
+        "tconst": "tconst",
+        "averageRating": "average_rating",
+        "numVotes": "num_votes",
+    },
+)
+
+
+AKAS_CONFIG = DatasetConfig(
+    filename="title.akas.tsv.gz",
+    table_name="movie_akas",
+    id_column="titleId",
+    columns=["titleId", "title", "region", "language"],
+    dtype_map={
+        "titleId": "object",
+        "title": "object",
+        "region": "object",
+        "language": "object",
+    },
+    mapping={
+        "titleId": "tconst",
+        "title": "title",
+        "region": "region",
+        "language": "language",
+    },
+    unique_id=False,
+    dedup_column="title_normalized",
+    references={"titleId": "movies"},
+    normalized_columns={"title": "title_normalized"},
 )
 
+EPISODES_CONFIG = DatasetConfig(
+    filename="title.episode.tsv.gz",
+    table_name="episodes",
+    id_column="tconst",
+    columns=["tconst", "parentTconst", "seasonNumber", "episodeNumber"],
+    dtype_map={
+        "tconst": "object",
+        "parentTconst": "object",
+        "seasonNumber": "Int16",
+        "episodeNumber": "Int32",
+    },
+    mapping={
+        "tconst": "episode_id",
+        "parentTconst": "parent_id",
+        "seasonNumber": "season_number",
+        "episodeNumber": "episode_number",
+    },
+    references={"tconst": "movies", "parentTconst": "movies"},
+    integer_id_columns=["episode_id", "parent_id"],
+    sample_column="parentTconst",
+)
+
+ACTOR_TITLES_CONFIG = DatasetConfig(
+    filename="name.basics.tsv.gz",
+    table_name="actor_titles",
+    id_column="nconst",
+    columns=["nconst", "knownForTitles"],
+    dtype_map={
+        "nconst": "object",
+        "knownForTitles": "object",
+    },
+    mapping={
+        "nconst": "nconst",
+        "knownForTitles": "tconst",
+    },
+    unique_id=False,
+    dedup_column="tconst",
+    references={"nconst": "actors", "knownForTitles": "movies"},
+    explode_column="knownForTitles",
+    alias="name.basics.tsv.gz:known_for",
+)
+
+
+# Parents must come before the datasets referencing them
+DATASETS = [
+    ACTORS_CONFIG,
+    RATINGS_CONFIG,
+    MOVIES_CONFIG,
+    AKAS_CONFIG,
+    EPISODES_CONFIG,
+    ACTOR_TITLES_CONFIG,
+]
 
-DATASETS = [ACTORS_CONFIG, MOVIES_CONFIG]
+DATASETS_BY_TABLE = {dataset.table_name: dataset for dataset in DATASETS}
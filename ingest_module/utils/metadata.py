@@ -24,19 +24,20 @@ def load_metadata() -> dict:
     return {}
 
 
-def save_metadata(filename: str, etag: Optional[str]):
+def save_metadata(filename: str, etag: Optional[str], sample: Optional[str] = None):
     """
     Save metadata after successful download
 
     Args:
         filename: File name (e.g., 'name.basics.tsv.gz')
         etag: ETag header from response
-        size_bytes: File size in bytes
+        sample: Sampling key of the load, None for a full load
     """
     metadata = load_metadata()
 
     metadata[filename] = {
-        "etag": etag
+        "etag": etag,
+        "sample": sample,
     }
 
     try:
@@ -47,23 +48,33 @@ def save_metadata(filename: str, etag: Optional[str]):
         logging.error(f"Failed to save metadata: {e}")
 
 
-def should_reload(stored_metadata: dict, url: str) -> bool:
+def should_reload(
+    stored_metadata: dict, url: str, sample: Optional[str] = None, key: Optional[str] = None
+) -> bool:
     """
     Check if file needs re-download based on ETag comparison
 
     Args:
         stored_metadata: Previously loaded metadata dict
         url: Full URL to check
+        sample: Sampling key of the requested load, None for a full load
+        key: Metadata entry name, defaults to the filename of the URL
 
     Returns:
         True if file should be downloaded, False if unchanged
     """
-    filename = url.split("/")[-1]
+    filename = key or url.split("/")[-1]
 
     if filename not in stored_metadata:
         logging.info(f"No metadata found for {filename}, will download")
         return True
 
+    stored_sample = stored_metadata[filename].get("sample")
+
+    if stored_sample != sample:
+        logging.info(f"{filename} was loaded with sample '{stored_sample}', will download")
+        return True
+
     stored_etag = stored_metadata[filename].get("etag")
 
     if not stored_etag:
@@ -0,0 +1,79 @@
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import FrozenSet, Optional
+
+import pandas as pd
+
+from utils.constants import SAMPLE_BUCKETS
+from utils.id_index import IdBitmap, parse_ids
+
+
+@dataclass(frozen=True)
+class SampleConfig:
+    """Deterministic row sampling for fast development and test ingests"""
+
+    fraction: float = 1.0
+    ids: FrozenSet[str] = field(default_factory=frozenset)
+
+    @property
+    def enabled(self) -> bool:
+        return self.fraction < 1.0
+
+    @property
+    def key(self) -> Optional[str]:
+        """Identifier stored in the metadata so full and sampled loads never mix"""
+        if not self.enabled:
+            return None
+
+        key = f"fraction={self.fraction:g}"
+        if self.ids:
+            digest = hashlib.sha1("\n".join(sorted(self.ids)).encode()).hexdigest()
+            key += f";ids={digest[:12]}"
+        return key
+
+
+def load_sample_ids(path: str) -> FrozenSet[str]:
+    """Read an ID allowlist with one nconst/tconst per line"""
+    lines = Path(path).read_text().splitlines()
+    return frozenset(line.strip() for line in lines if line.strip())
+
+
+def sample_chunk(
+    chunk: pd.DataFrame,
+    id_column: str,
+    sample: SampleConfig,
+    linked_ids: Optional[IdBitmap] = None,
+) -> pd.DataFrame:
+    """
+    Keep the rows whose ID hashes into the sampled fraction or is allowlisted
+
+    The hash only depends on the ID value, so the same rows are selected on
+    every run and the selection does not depend on the chunk boundaries.
+
+    Args
+    ----------
+        chunk: Raw DataFrame chunk
+        id_column: Column holding the IMDb identifier (e.g. 'nconst')
+        sample: Sampling configuration
+        linked_ids: IDs kept as well, needed by a dataset sampled by another column
+
+    Returns
+    ----------
+        pd.DataFrame with only the sampled rows
+    """
+    if not sample.enabled or chunk.empty:
+        return chunk
+
+    ids = chunk[id_column]
+    hashes = pd.util.hash_pandas_object(ids, index=False).to_numpy()
+    keep = hashes % SAMPLE_BUCKETS < round(sample.fraction * SAMPLE_BUCKETS)
+
+    if sample.ids:
+        keep |= ids.isin(sample.ids).to_numpy()
+
+    if linked_ids is not None:
+        keep |= linked_ids.contains(parse_ids(ids))
+
+    return chunk[keep]
+
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import requests
+from sqlalchemy.engine import make_url
+
+from utils.constants import IMDB_URL, SNAPSHOT_COMPRESSION, SNAPSHOT_KEEP
+
+SNAPSHOT_DIR = Path(
+    os.getenv("SNAPSHOT_DIR", Path(__file__).resolve().parent.parent / "snapshots")
+)
+MANIFEST_FILE = "manifest.json"
+
+
+def snapshot_key(etags: dict[str, str], sample: Optional[str] = None) -> str:
+    """
+    Build the snapshot identifier from the dataset ETags
+
+    Args:
+        etags: Dict with filename as key and ETag as value
+        sample: Sampling key of the load, None for a full load
+
+    Returns:
+        Short hash that changes whenever any dataset or the sampling changes
+    """
+    payload = json.dumps({"etags": etags, "sample": sample}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def get_remote_etags(filenames: list[str]) -> Optional[dict[str, str]]:
+    """Get the current ETag of every file with HEAD requests, None if any is missing"""
+    etags = {}
+    for filename in filenames:
+        try:
+            response = requests.head(f"{IMDB_URL}{filename}", timeout=10)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logging.warning(f"ETag check failed for {filename}: {e}")
+            return None
+
+        etag = response.headers.get("ETag")
+        if not etag:
+            logging.warning(f"No ETag header from server for {filename}")
+            return None
+        etags[filename] = etag
+
+    return etags
+
+
+def find_snapshot(key: str) -> Optional[Path]:
+    """Return the snapshot directory for the key if a complete one exists"""
+    path = SNAPSHOT_DIR / key
+    if (path / MANIFEST_FILE).exists():
+        return path
+    return None
+
+
+def export_snapshot(
+    database_url: str,
+    tables: list[str],
+    etags: dict[str, str],
+    sample: Optional[str] = None,
+    jobs: Optional[int] = None,
+) -> Path:
+    """
+    Dump the finished tables and their indexes as a compressed snapshot
+
+    Uses the pg_dump directory format so the dump and the restore can run
+    with several parallel jobs. The snapshot is written to a temporary
+    directory and renamed once complete, so an interrupted export is never
+    picked up by a restore.
+
+    Args:
+        database_url: PostgreSQL connection URL
+        tables: Tables to include in the snapshot
+        etags: ETags of the datasets loaded in those tables
+        sample: Sampling key of the load, None for a full load
+        jobs: Number of parallel pg_dump jobs (defaults to the CPU count)
+
+    Returns:
+        Path of the snapshot directory
+    """
+    key = snapshot_key(etags, sample)
+    existing = find_snapshot(key)
+    if existing:
+        logging.info(f"Snapshot {key} already exists")
+        return existing
+
+    path = SNAPSHOT_DIR / key
+    tmp_path = SNAPSHOT_DIR / f".{key}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+
+    command = [
+        "pg_dump",
+        "--format=directory",
+        f"--jobs={jobs or os.cpu_count() or 1}",
+        f"--compress={SNAPSHOT_COMPRESSION}",
+        "--no-owner",
+        "--no-privileges",
+        f"--file={tmp_path}",
+        f"--dbname={_libpq_url(database_url)}",
+    ]
+    command += [f"--table={table}" for table in tables]
+
+    logging.info(f"Exporting snapshot {key} of {', '.join(tables)}")
+    try:
+        subprocess.run(command, check=True)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    manifest = {
+        "key": key,
+        "etags": etags,
+        "sample": sample,
+        "tables": tables,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    (tmp_path / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    tmp_path.rename(path)
+
+    _prune_snapshots()
+    logging.info(f"Snapshot saved to {path}")
+    return path
+
+
+def restore_snapshot(database_url: str, path: Path, jobs: Optional[int] = None) -> dict:
+    """
+    Restore a snapshot created by export_snapshot
+
+    Existing tables included in the snapshot are dropped and recreated with
+    their data and indexes.
+
+    Args:
+        database_url: PostgreSQL connection URL
+        path: Snapshot directory
+        jobs: Number of parallel pg_restore jobs (defaults to the CPU count)
+
+    Returns:
+        The snapshot manifest
+    """
+    manifest = json.loads((path / MANIFEST_FILE).read_text())
+
+    command = [
+        "pg_restore",
+        f"--jobs={jobs or os.cpu_count() or 1}",
+        "--clean",
+        "--if-exists",
+        "--no-owner",
+        "--no-privileges",
+        f"--dbname={_libpq_url(database_url)}",
+        str(path),
+    ]
+
+    logging.info(f"Restoring snapshot {manifest['key']}")
+    subprocess.run(command, check=True)
+    logging.info(f"Restored {', '.join(manifest['tables'])} from snapshot")
+
+    return manifest
+
+
+def _libpq_url(database_url: str) -> str:
+    """Drop the SQLAlchemy driver suffix (e.g. '+psycopg2') so libpq tools accept the URL"""
+    url = make_url(database_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+def _prune_snapshots():
+    """Keep only the most recent snapshots"""
+    snapshots = sorted(
+        (p for p in SNAPSHOT_DIR.iterdir() if (p / MANIFEST_FILE).exists()),
+        key=lambda p: (p / MANIFEST_FILE).stat().st_mtime,
+        reverse=True,
+    )
+    for old in snapshots[SNAPSHOT_KEEP:]:
+        logging.info(f"Removing old snapshot {old.name}")
+        shutil.rmtree(old, ignore_errors=True)
@@ -0,0 +1,316 @@
+"""
+Latency and throughput of the search endpoints under a fixed arrival rate
+
+    python -m benchmarks.load_test --rate 200 --duration 60 --output run.json
+    python -m benchmarks.load_test --rate 400 --baseline run.json
+
+Runs against a locally running API (--url) and the database of
+API_DATABASE_URL, loaded by the ingest. The query mix is drawn from the
+database before the run:
+
+- hits: titles of the most voted movies and names of the actors known for
+  them, with Zipfian popularity so a few terms get most of the traffic
+- broad: the most frequent words of those titles and names, which match a
+  large part of the index
+- misses: random words that match nothing and get a 404
+
+Requests are sent on a fixed schedule (open loop) whatever the latency of
+the previous ones, so a slow server does not slow the load down, and the
+latency is measured from the time the request was due. The report is written
+as JSON: throughput, p50/p95/p99 latency overall and by endpoint and kind,
+the server timings of the Server-Timing header, and the rates of errors (5xx
+and transport errors) and of requests shed with 503.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import string
+import time
+from collections import Counter, defaultdict
+from itertools import accumulate
+from pathlib import Path
+
+import httpx
+from sqlalchemy import func, select
+
+from core.database import async_session, engine
+from src.actors.models import Actor, ActorTitle
+from src.movies.models import Movie
+
+MIX = "hits=0.7,broad=0.2,misses=0.1"
+POOL_SIZE = 5000
+BROAD_TERMS = 50
+WORD = re.compile(r"[a-z]{3,}")
+SERVER_TIMING = re.compile(r"(\w+);dur=([\d.]+)")
+ENDPOINTS = {"actors": ("/actors/search", "name"), "movies": ("/movies/search", "title")}
+
+
+async def popular_terms(pool_size: int) -> dict[str, list[str]]:
+    """Most voted titles and actors known for the most voted titles, most popular first"""
+    async with async_session() as session:
+        titles = await session.scalars(
+            select(Movie.primary_title)
+            .where(Movie.num_votes.is_not(None))
+            .order_by(Movie.num_votes.desc())
+            .limit(pool_size)
+        )
+        names = await session.scalars(
+            select(Actor.primary_name)
+            .join(ActorTitle, ActorTitle.nconst == Actor.nconst)
+            .join(Movie, Movie.tconst == ActorTitle.tconst)
+            .group_by(Actor.nconst, Actor.primary_name)
+            .order_by(func.max(Movie.num_votes).desc().nulls_last())
+            .limit(pool_size)
+        )
+        terms = {"movies": list(titles), "actors": list(names)}
+    await engine.dispose()
+    return terms
+
+
+def broad_terms(terms: list[str], count: int) -> list[str]:
+    """Most frequent words of the terms, most frequent first"""
+    words = Counter(word for term in terms for word in set(WORD.findall(term.lower())))
+    return [word for word, _ in words.most_common(count)]
+
+
+def zipf_weights(count: int, exponent: float) -> list[float]:
+    """Cumulative weights of the ranks 1..count, rank k weighs 1 / k^exponent"""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class QueryMix:
+    """Draws the endpoint, kind and term of each request"""
+
+    def __init__(
+        self,
+        terms: dict[str, list[str]],
+        mix: dict[str, float],
+        movies_share: float,
+        exponent: float,
+        rng: random.Random,
+    ):
+        self.mix = mix
+        self.movies_share = movies_share
+        self.rng = rng
+        # (endpoint, kind) -> terms, most popular first, and their cumulative weights
+        self.pools = {}
+        for endpoint, values in terms.items():
+            for kind, pool in (("hits", values), ("broad", broad_terms(values, BROAD_TERMS))):
+                if pool:
+                    self.pools[endpoint, kind] = (pool, zipf_weights(len(pool), exponent))
+
+    def next(self) -> tuple[str, str, str, dict]:
+        """Endpoint, kind, path and query parameters of the next request"""
+        endpoint = "movies" if self.rng.random() < self.movies_share else "actors"
+        kind = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        if kind == "misses" or (endpoint, kind) not in self.pools:
+            kind = "misses"
+            term = "".join(self.rng.choices(string.ascii_lowercase, k=12))
+        else:
+            pool, weights = self.pools[endpoint, kind]
+            term = self.rng.choices(pool, cum_weights=weights)[0]
+
+        path, parameter = ENDPOINTS[endpoint]
+        return endpoint, kind, path, {parameter: term}
+
+
+class Results:
+    """Outcome of every request, by endpoint and kind"""
+
+    def __init__(self):
+        self.latencies: dict[tuple[str, str], list[float]] = defaultdict(list)
+        self.statuses: dict[tuple[str, str], Counter] = defaultdict(Counter)
+        self.server: dict[str, list[float]] = defaultdict(list)
+        self.skipped = 0
+
+    def record(self, endpoint: str, kind: str, status: str, seconds: float, timing: str):
+        self.latencies[endpoint, kind].append(seconds * 1000)
+        self.statuses[endpoint, kind][status] += 1
+        for phase, duration in SERVER_TIMING.findall(timing):
+            self.server[phase].append(float(duration))
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summary(latencies: list[float], statuses: Counter, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    requests = sum(statuses.values())
+    errors = sum(
+        count for status, count in statuses.items()
+        if status == "error" or (status.isdigit() and int(status) >= 500 and status != "503")
+    )
+    return {
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+        "statuses": dict(statuses),
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "shed_rate": round(statuses.get("503", 0) / requests, 4) if requests else 0.0,
+    }
+
+
+def report(results: Results, config: dict, elapsed: float) -> dict:
+    keys = list(results.latencies)
+    groups = {
+        "overall": keys,
+        **{endpoint: [key for key in keys if key[0] == endpoint] for endpoint in ENDPOINTS},
+        **{kind: [key for key in keys if key[1] == kind] for kind in config["mix"]},
+    }
+    by_group = {}
+    for name, keys in groups.items():
+        latencies = [value for key in keys for value in results.latencies[key]]
+        statuses = sum((results.statuses[key] for key in keys), Counter())
+        by_group[name] = summary(latencies, statuses, elapsed)
+
+    return {
+        "config": config,
+        "elapsed_seconds": round(elapsed, 2),
+        "skipped": results.skipped,
+        **by_group,
+        "server_timing_ms": {
+            phase: {
+                "p50": round(percentile(sorted(values), 50), 2),
+                "p99": round(percentile(sorted(values), 99), 2),
+            }
+            for phase, values in results.server.items()
+        },
+    }
+
+
+async def send(
+    client: httpx.AsyncClient,
+    results: Results,
+    mix: QueryMix,
+    due: float,
+    record: bool,
+):
+    endpoint, kind, path, params = mix.next()
+    timing = ""
+    try:
+        response = await client.get(path, params=params)
+        status = str(response.status_code)
+        timing = response.headers.get("Server-Timing", "")
+    except httpx.HTTPError:
+        status = "error"
+    if record:
+        results.record(endpoint, kind, status, time.perf_counter() - due, timing)
+
+
+async def run(args, mix: QueryMix) -> tuple[Results, float]:
+    """Send the requests on schedule, the warm up requests are not recorded"""
+    results = Results()
+    interval = 1 / args.rate
+    total = int((args.warmup + args.duration) * args.rate)
+    warmup = int(args.warmup * args.rate)
+    in_flight: set[asyncio.Task] = set()
+    limits = httpx.Limits(
+        max_connections=args.connections, max_keepalive_connections=args.connections
+    )
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        for i in range(total):
+            due = start + i * interval
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            if len(in_flight) >= args.max_in_flight:
+                # The client cannot keep the rate, the run would measure the client
+                results.skipped += 1
+                continue
+
+            task = asyncio.create_task(send(client, results, mix, due, i >= warmup))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        await asyncio.gather(*in_flight)
+        elapsed = time.perf_counter() - start - args.warmup
+
+    return results, elapsed
+
+
+def compare(current: dict, baseline: dict):
+    """Change of throughput, latency and error rate against a previous report"""
+    print(f"{'':<10}{'baseline':>12}{'current':>12}{'change':>10}")
+    rows = [("rps", "throughput_rps")] + [
+        (p, "latency_ms", p) for p in ("p50", "p95", "p99")
+    ] + [("errors", "error_rate"), ("shed", "shed_rate")]
+    for label, *path in rows:
+        before, after = baseline["overall"], current["overall"]
+        for key in path:
+            before, after = before[key], after[key]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "-"
+        print(f"{label:<10}{before:>12}{after:>12}{change:>10}")
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        kind, weight = part.split("=")
+        if kind not in ("hits", "broad", "misses"):
+            raise argparse.ArgumentTypeError(f"Unknown query kind '{kind}'")
+        mix[kind] = float(weight)
+    return mix
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL")
+    parser.add_argument("--rate", type=float, default=100, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds recorded")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds sent before recording")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=parse_mix(MIX), help=f"Query kinds, default {MIX}"
+    )
+    parser.add_argument("--movies-share", type=float, default=0.6, help="Share of movie searches")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Exponent of the term popularity")
+    parser.add_argument(
+        "--pool", type=int, default=POOL_SIZE, help="Popular titles and names drawn"
+    )
+    parser.add_argument("--connections", type=int, default=200, help="HTTP connections")
+    parser.add_argument("--max-in-flight", type=int, default=2000, help="Requests waiting at most")
+    parser.add_argument("--timeout", type=float, default=10, help="Request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the query mix")
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this file")
+    parser.add_argument("--baseline", type=Path, help="Report of a previous run to compare with")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    terms = await popular_terms(args.pool)
+    mix = QueryMix(terms, args.mix, args.movies_share, args.zipf, random.Random(args.seed))
+
+    results, elapsed = await run(args, mix)
+    config = {
+        key: str(value) if isinstance(value, Path) else value
+        for key, value in vars(args).items()
+        if key not in ("output", "baseline")
+    }
+    result = report(results, config, elapsed)
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        args.output.write_text(output)
+    print(output)
+    if args.baseline:
+        compare(result, json.loads(args.baseline.read_text()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
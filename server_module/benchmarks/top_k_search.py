@@ -0,0 +1,100 @@
+"""
+Database time of the first page of a movie search across term frequencies
+
+    python -m benchmarks.top_k_search [TERM ...]
+
+Runs against the database of API_DATABASE_URL, loaded and indexed by the
+ingest. The first page of each term is run with EXPLAIN ANALYZE twice: sorting
+every match as the searches did before the precomputed rank, and reading the
+top K rows by search_rank. The default terms go from a handful of matches to
+hundreds of thousands. Each term is run with the akas, as the API searches by
+default, and then without them.
+"""
+import asyncio
+import json
+import statistics
+import sys
+
+from sqlalchemy import Select, case, func, nulls_last, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import async_session, engine
+from core.normalization import normalize_text
+from core.pagination import DEFAULT_LIMIT, Explain, top_k_query
+from src.movies.models import Movie
+from src.movies.repository import MovieRepository
+
+TERMS = [
+    "zardoz",
+    "shawshank redemption",
+    "matrix",
+    "godfather",
+    "star wars",
+    "night",
+    "love",
+    "the",
+]
+REPEAT = 5
+
+
+def full_sort_query(query: Select, exact, limit: int) -> Select:
+    """First page ordered by exact match, votes and title length, sorting every match"""
+    return query.order_by(
+        case((exact, 0), else_=1),
+        nulls_last(Movie.num_votes.desc()),
+        func.length(Movie.primary_title),
+        Movie.tconst,
+    ).limit(limit)
+
+
+async def execution_ms(session: AsyncSession, statement: Select) -> float:
+    """Median execution time of REPEAT runs, as measured by Postgres"""
+    times = []
+    for _ in range(REPEAT):
+        result = await session.execute(Explain(statement, analyze=True))
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        times.append(plan[0]["Execution Time"])
+    return statistics.median(times)
+
+
+async def main(terms: list[str]):
+    print(f"First page of {DEFAULT_LIMIT} movies, median of {REPEAT} runs")
+    print(
+        f"{'term':<24}{'akas':>6}{'matches':>10}{'full sort ms':>14}{'top-K ms':>10}"
+        f"{'speedup':>9}"
+    )
+
+    async with async_session() as session:
+        repository = MovieRepository(session)
+        for term in terms:
+            for include_akas in (True, False):
+                query, exact = repository._search(term, include_akas)
+                top_k, _, conditions = repository._top_k_search(
+                    normalize_text(term), include_akas
+                )
+
+                matches = await session.scalar(
+                    select(func.count()).select_from(query.subquery())
+                )
+                before = await execution_ms(
+                    session, full_sort_query(query, exact, DEFAULT_LIMIT)
+                )
+                after = await execution_ms(
+                    session,
+                    top_k_query(
+                        top_k, exact, Movie.search_rank, DEFAULT_LIMIT, matches=conditions
+                    ),
+                )
+
+                print(
+                    f"{term:<24}{str(include_akas).lower():>6}{matches:>10,}{before:>14.2f}"
+                    f"{after:>10.2f}{before / after:>8.1f}x"
+                )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:] or TERMS))
@@ -0,0 +1,102 @@
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError
+
+from core.config import settings
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# SQLSTATE of a statement cancelled by statement_timeout (query_canceled)
+QUERY_CANCELED = "57014"
+
+
+class AdmissionController:
+    """
+    Caps the number of requests using the database at the same time
+
+    Requests over `max_concurrent` wait in a FIFO queue of at most `max_queue`
+    requests for up to `queue_timeout` seconds. When the queue is full or the
+    wait times out the request is rejected right away with 503 and a
+    Retry-After header, so a burst of slow searches cannot leave every other
+    request waiting for a connection until the client gives up.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.queue_timeouts = 0
+        self.statement_timeouts = 0
+
+    async def acquire(self):
+        """Wait for a slot, raising 503 if the queue is full or the wait times out"""
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise self.overloaded("Too many requests waiting for the database")
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except TimeoutError:
+                self.queue_timeouts += 1
+                raise self.overloaded("Timed out waiting for the database")
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.active += 1
+        self.admitted += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def overloaded(self, detail: str) -> HTTPException:
+        return HTTPException(
+            status_code=503, detail=detail, headers={"Retry-After": str(self.retry_after)}
+        )
+
+    def statement_timeout(self, error: DBAPIError) -> HTTPException | None:
+        """503 for a statement cancelled by statement_timeout, None for other errors"""
+        if getattr(error.orig, "sqlstate", None) != QUERY_CANCELED:
+            return None
+
+        self.statement_timeouts += 1
+        logger.warning(f"Statement timeout: {error.orig}")
+        return self.overloaded("The query took too long")
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "queue_timeouts": self.queue_timeouts,
+            "statement_timeouts": self.statement_timeouts,
+        }
+
+
+admission = AdmissionController(
+    settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+    settings.DB_ADMISSION_QUEUE_SIZE,
+    settings.DB_ADMISSION_TIMEOUT_SECONDS,
+    settings.DB_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,65 @@
+from typing import Callable, Optional
+
+from sqlalchemy import ColumnElement, Integer, Row, Select, Text, bindparam, func, select, true
+from sqlalchemy.dialects.postgresql import ARRAY
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.pagination import MAX_LIMIT, top_k_query
+
+# Queries of one batch request and results per query in a batch
+MAX_BATCH_QUERIES = 1000
+MAX_BATCH_LIMIT = 100
+
+
+def split_ids(ids: str) -> list[str]:
+    """Unique IDs of a comma separated list, in order, raising 400 over MAX_LIMIT"""
+    unique_ids = list(dict.fromkeys(ids.split(",")))
+    if len(unique_ids) > MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LIMIT} IDs per request")
+    return unique_ids
+
+
+async def search_batch(
+    session: AsyncSession,
+    search: Callable[
+        [ColumnElement], tuple[Select, ColumnElement, Optional[list[ColumnElement]]]
+    ],
+    rank: ColumnElement,
+    terms: list[str],
+    limits: list[int],
+) -> list[list[Row]]:
+    """
+    Top matches of every term, in one statement
+
+    The terms and limits are sent as two arrays and unnested with their
+    position. The search of each term runs as a LATERAL subquery in the top-K
+    form of the first pages, each branch read in rank order and limited to
+    the term's limit, so Postgres does the whole batch in one round trip
+    without sorting every match of a term. Returns the rows grouped in the
+    order of the terms.
+    """
+    queries = (
+        func.unnest(
+            bindparam("terms", terms, type_=ARRAY(Text)),
+            bindparam("limits", limits, type_=ARRAY(Integer)),
+        )
+        .table_valued("term", "row_limit", with_ordinality="position")
+        .render_derived()
+    )
+
+    query, exact, matches = search(queries.c.term)
+    top_k = top_k_query(query, exact, rank, queries.c.row_limit, matches=matches).lateral()
+
+    query = (
+        select(*top_k.c, queries.c.position)
+        .select_from(queries.join(top_k, true()))
+        .order_by(queries.c.position, top_k.c.exact_match, top_k.c[rank.key])
+    )
+
+    result = await session.execute(query)
+
+    groups: list[list[Row]] = [[] for _ in terms]
+    for row in result.all():
+        groups[row.position - 1].append(row)
+    return groups
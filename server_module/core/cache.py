@@ -0,0 +1,271 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Depends, Response
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import get_session
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Rough size of an entry besides its key and body (tuple, headers dict, OrderedDict node)
+ENTRY_OVERHEAD_BYTES = 256
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+    media_type: str = "application/json"
+    expires_at: float = 0.0
+
+    @property
+    def size(self) -> int:
+        headers = sum(len(name) + len(value) for name, value in self.headers.items())
+        return len(self.body) + headers + ENTRY_OVERHEAD_BYTES
+
+    def to_response(self) -> Response:
+        return Response(self.body, headers=self.headers, media_type=self.media_type)
+
+
+class ResultCache:
+    """
+    Serialized responses kept in memory, keyed by request
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted when the total size goes over `max_bytes`. The whole cache is
+    dropped when the dataset version changes.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.version: Optional[str] = None
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(*parts) -> str:
+        return "\x1f".join(str(part) for part in parts)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+
+        if entry is not None and entry.expires_at <= self.clock():
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(self, key: str, entry: CachedResponse) -> CachedResponse:
+        if key in self._entries:
+            self._remove(key)
+
+        if entry.size + len(key) > self.max_bytes:
+            return entry
+
+        entry.expires_at = self.clock() + self.ttl
+        self._entries[key] = entry
+        self._bytes += entry.size + len(key)
+
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+        return entry
+
+    def set_version(self, version: Optional[str]):
+        """Drop every entry if the dataset version changed"""
+        if version != self.version:
+            if self._entries:
+                logger.info(f"Dataset version changed to {version}, clearing {len(self)} cached results")
+            self.clear()
+            self.version = version
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "dataset_version": self.version,
+        }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size + len(key)
+
+
+class EntityCache:
+    """
+    Serialized entities kept in memory by ID, at most `max_entries` of them
+
+    The least recently used entities are evicted first. Entities only change
+    when the ingest loads a new dataset version, so there is no TTL and the
+    whole cache is dropped when the version changes.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.version: Optional[str] = None
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_many(
+        self,
+        ids: list[str],
+        load: Callable[[list[str]], Awaitable[dict[str, bytes]]],
+    ) -> dict[str, bytes]:
+        """Entities of the IDs, the missing ones loaded with a single call and stored"""
+        found = {}
+        missing = []
+        for entity_id in ids:
+            entity = self._entries.get(entity_id)
+            if entity is None:
+                missing.append(entity_id)
+            else:
+                self._entries.move_to_end(entity_id)
+                found[entity_id] = entity
+
+        self.hits += len(found)
+        self.misses += len(missing)
+
+        if missing:
+            loaded = await load(missing)
+            for entity_id, entity in loaded.items():
+                self._set(entity_id, entity)
+            found.update(loaded)
+
+        return found
+
+    def set_version(self, version: Optional[str]):
+        """Drop every entity if the dataset version changed"""
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "dataset_version": self.version,
+        }
+
+    def _set(self, entity_id: str, entity: bytes):
+        self._entries[entity_id] = entity
+        self._entries.move_to_end(entity_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class DatasetVersion:
+    """
+    Version of the loaded datasets, written by the ingest in the dataset_version table
+
+    The table is read at most once every `check_interval` seconds, so requests
+    answered from a cache do not query Postgres.
+    """
+
+    def __init__(self, check_interval: float, clock: Callable[[], float] = time.monotonic):
+        self.check_interval = check_interval
+        self.clock = clock
+        self.value: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, session: AsyncSession) -> Optional[str]:
+        if not self._is_stale():
+            return self.value
+
+        async with self._lock:
+            # Another request may have refreshed it while this one waited
+            if self._is_stale():
+                self.value = await self._read(session)
+                self._checked_at = self.clock()
+
+        return self.value
+
+    def _is_stale(self) -> bool:
+        return self._checked_at is None or self.clock() - self._checked_at >= self.check_interval
+
+    async def _read(self, session: AsyncSession) -> Optional[str]:
+        try:
+            result = await session.execute(text("SELECT version FROM dataset_version LIMIT 1"))
+            return result.scalar_one_or_none()
+        except DBAPIError as e:
+            logger.warning(f"Dataset version not available: {e}")
+            await session.rollback()
+            return None
+
+
+search_cache = ResultCache(settings.SEARCH_CACHE_MAX_BYTES, settings.SEARCH_CACHE_TTL_SECONDS)
+dataset_version = DatasetVersion(settings.DATASET_VERSION_CHECK_SECONDS)
+actor_cache = EntityCache(settings.ENTITY_CACHE_MAX_ENTRIES)
+movie_cache = EntityCache(settings.ENTITY_CACHE_MAX_ENTRIES)
+
+
+async def get_search_cache(session: AsyncSession = Depends(get_session)) -> ResultCache:
+    """Search cache, cleared first if the ingest loaded a new dataset version"""
+    search_cache.set_version(await dataset_version.get(session))
+    return search_cache
+
+
+async def get_actor_cache(session: AsyncSession = Depends(get_session)) -> EntityCache:
+    """Actor cache, cleared first if the ingest loaded a new dataset version"""
+    actor_cache.set_version(await dataset_version.get(session))
+    return actor_cache
+
+
+async def get_movie_cache(session: AsyncSession = Depends(get_session)) -> EntityCache:
+    """Movie cache, cleared first if the ingest loaded a new dataset version"""
+    movie_cache.set_version(await dataset_version.get(session))
+    return movie_cache
@@ -0,0 +1,47 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+from core.config import settings
+
+
+def entity_tag(version: Optional[str], key: str) -> Optional[str]:
+    """
+    ETag of a response, derived from the dataset version and the request
+
+    The data only changes when the ingest loads a new dataset version, so the
+    tag can be computed before running any query. None when the version is
+    unknown, in which case the response is not cacheable by clients.
+    """
+    if version is None:
+        return None
+    digest = hashlib.sha256(f"{version}\x1f{key}".encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def cache_headers(etag: Optional[str]) -> dict[str, str]:
+    """Validator and freshness headers for clients and proxies"""
+    if etag is None:
+        return {"Cache-Control": "no-cache"}
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}",
+        "Vary": "Accept",
+    }
+
+
+def not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """304 response if the If-None-Match header of the request matches the ETag"""
+    if etag is None:
+        return None
+
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+
+    # Weak comparison: the W/ prefix is ignored
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in tags or etag.removeprefix("W/") in tags:
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -8,6 +9,66 @@ class Settings(BaseSettings):
     API_CONTAINER_NAME: str
     API_DATABASE_URL: str
 
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
+    # 0 runs one worker per CPU
+    API_WORKERS: int = 0
+    API_BACKLOG: int = 2048
+    API_KEEP_ALIVE_SECONDS: int = 5
+    API_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    API_ACCESS_LOG: bool = False
+
+    # Connections to Postgres the API may open, all workers together
+    DB_MAX_CONNECTIONS: int = 80
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_POOL_WARMUP: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500
+
+    # Set on every connection, so the searches, the most frequent requests,
+    # run without a set_config statement per transaction
+    DB_STATEMENT_TIMEOUT_MS: int = 3000
+    DB_ROUTE_STATEMENT_TIMEOUTS_MS: dict[str, int] = {
+        "/actors/search:batch": 15000,
+        "/movies/search:batch": 15000,
+        "/actors/{nconst}": 1000,
+        "/movies/{tconst}": 1000,
+        "/actors": 5000,
+        "/actors/{nconst}/titles": 5000,
+        "/movies": 5000,
+        "/movies/top": 5000,
+        "/movies/{tconst}/episodes": 5000,
+    }
+    DB_ADMISSION_QUEUE_SIZE: int = 100
+    DB_ADMISSION_TIMEOUT_SECONDS: float = 2
+    DB_RETRY_AFTER_SECONDS: int = 1
+
+    SEARCH_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    SEARCH_CACHE_TTL_SECONDS: float = 300
+    DATASET_VERSION_CHECK_SECONDS: float = 30
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 60
+    ENTITY_CACHE_MAX_ENTRIES: int = 100_000
+    ID_BATCH_WINDOW_MS: float = 2
+    ID_BATCH_MAX_IDS: int = 1000
+
+    SLOW_QUERY_THRESHOLD_MS: float = 500
+    SLOW_QUERY_EXPLAIN_RATIO: float = 0.1
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 300
+    SLOW_QUERY_LOG_FILE: str = "slow_queries.jsonl"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+
+    TRACE_EXPORTER: Literal["none", "file", "otlp"] = "none"
+    TRACE_SAMPLE_RATIO: float = 0.01
+    TRACE_FILE: str = "traces.jsonl"
+    TRACE_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACE_BATCH_SIZE: int = 512
+    TRACE_MAX_QUEUE: int = 10_000
+    TRACE_EXPORT_INTERVAL_SECONDS: float = 5
+
     model_config = SettingsConfigDict(
         env_file=str(Path(__file__).resolve().parent.parent.parent / ".env"),
         env_file_encoding="utf-8",
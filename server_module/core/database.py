@@ -1,18 +1,248 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from fastapi import Request
+from sqlalchemy import Connection, event, exc, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.orm import Session, SessionTransaction, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import await_only
 
+from core.admission import admission
 from core.config import settings
+from core.logger import get_logger
+from core.metrics import record_checkout, record_statement
+from core.slow_queries import slow_queries
+from core.tracing import statement_span, tracer
+
+logger = get_logger(__name__)
+
+
+class PoolStats:
+    """How long requests waited to check out a connection from the pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, seconds: float):
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool recording the checkout wait time, including opening new connections
+
+    Every checkout is admitted first, so the requests over the pool capacity
+    wait in the bounded queue of the admission controller or get a 503.
+    """
+
+    def connect(self):
+        with tracer.span("db.pool.checkout"):
+            return self._admitted_connect()
+
+    def _admitted_connect(self):
+        admission_start = time.perf_counter()
+        await_only(admission.acquire())
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_stats.timeouts += 1
+            admission.release()
+            raise
+        except BaseException:
+            admission.release()
+            raise
+        finally:
+            end = time.perf_counter()
+            pool_stats.record(end - start)
+            record_checkout(end - admission_start)
+
+
+engine = create_async_engine(
+    settings.API_DATABASE_URL,
+    echo=False,
+    future=True,
+    poolclass=TimedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={
+        # Statements prepared by asyncpg on each connection, keyed by their SQL
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        # Default of the routes without their own timeout, costs no statement per request
+        "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)},
+    },
+)
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _release_admission(dbapi_connection, connection_record):
+    admission.release()
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_start", []).append(time.perf_counter())
+    conn.info.setdefault("statement_span", []).append(
+        statement_span(statement, parameters, executemany)
+    )
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    """Execution time and rows of the statement, rows are -1 for server side cursors"""
+    seconds = time.perf_counter() - conn.info["statement_start"].pop()
+    record_statement(seconds, cursor.rowcount)
+    slow_queries.observe(statement, parameters, seconds, cursor.rowcount)
+
+    span = conn.info["statement_span"].pop()
+    if span is not None:
+        span.set("db.rows", cursor.rowcount)
+        tracer.end_span(span)
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _record_statement_error(exception_context):
+    conn = exception_context.connection
+    if conn is None or not conn.info.get("statement_start"):
+        return
+
+    conn.info["statement_start"].pop()
+    span = conn.info["statement_span"].pop()
+    if span is not None:
+        span.record_error(exception_context.original_exception)
+        tracer.end_span(span)
 
-engine = create_async_engine(settings.API_DATABASE_URL, echo=False, future=True)
 
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
 
-async def get_session() -> AsyncSession:
+# Session.info key of the statement timeout of the request, in milliseconds
+STATEMENT_TIMEOUT_MS = "statement_timeout_ms"
+
+
+def statement_timeout_ms(request: Request) -> int:
+    """Statement timeout of the route of the request"""
+    route = request.scope.get("route")
+    path = getattr(route, "path", None)
+    return settings.DB_ROUTE_STATEMENT_TIMEOUTS_MS.get(path, settings.DB_STATEMENT_TIMEOUT_MS)
+
+
+@event.listens_for(Session, "after_begin")
+def _set_statement_timeout(
+    session: Session, transaction: SessionTransaction, connection: Connection
+):
+    """Apply the timeout of the route to the transaction, when it is not the default"""
+    timeout = session.info.get(STATEMENT_TIMEOUT_MS, settings.DB_STATEMENT_TIMEOUT_MS)
+    if timeout != settings.DB_STATEMENT_TIMEOUT_MS:
+        connection.execute(
+            text("SELECT set_config('statement_timeout', :timeout, true)"),
+            {"timeout": str(timeout)},
+        )
+
+
+async def get_session(request: Request) -> AsyncSession:
+    """
+    Session of the request, with the statement timeout of its route
+
+    A statement cancelled by the timeout is answered with 503 and Retry-After
+    like a request rejected by the admission controller.
+    """
     async with async_session() as session:
+        session.info[STATEMENT_TIMEOUT_MS] = statement_timeout_ms(request)
         try:
             yield session
+        except exc.DBAPIError as e:
+            overloaded = admission.statement_timeout(e)
+            if overloaded is not None:
+                raise overloaded from e
+            raise
         finally:
             await session.close()
+
+
+def max_workers(max_connections: int, reserved: int = 0) -> int:
+    """Most workers that get at least one pooled connection each within `max_connections`"""
+    return max_connections // (1 + reserved)
+
+
+def worker_pool_size(
+    workers: int, max_connections: int, pool_size: int, max_overflow: int, reserved: int = 0
+) -> tuple[int, int]:
+    """
+    Pool size and overflow of each worker, so that the pools of all the
+    workers never open more than `max_connections` together
+
+    `reserved` connections per worker are left out for the connections opened
+    outside the pool. The configured sizes are kept when they fit, otherwise
+    the overflow is cut first and then the pool.
+    """
+    per_worker = max_connections // workers - reserved
+    if per_worker < 1:
+        raise ValueError(
+            f"{max_connections} connections are not enough for {workers} workers "
+            f"with {reserved} reserved connections each"
+        )
+    size = min(pool_size, per_worker)
+    return size, min(max_overflow, per_worker - size)
+
+
+def pool_status() -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        **pool_stats.as_dict(),
+    }
+
+
+async def warm_up_pool(
+    connections: int, warm_up: Callable[[AsyncSession], Awaitable[None]]
+):
+    """
+    Open the pool connections and run the warm up statements on each of them
+
+    Every connection is checked out at the same time, so each one prepares
+    the statements instead of the first connection being reused. Errors are
+    logged, the API still starts when the database is not ready yet.
+    """
+    sessions = [async_session() for _ in range(connections)]
+    start = time.perf_counter()
+    try:
+        for session in sessions:
+            await session.connection()
+        await asyncio.gather(*(warm_up(session) for session in sessions))
+        logger.info(
+            f"Warmed up {connections} connections in {time.perf_counter() - start:.2f}s"
+        )
+    except Exception as e:
+        logger.warning(f"Connection pool warm up failed: {e}")
+    finally:
+        for session in sessions:
+            await session.close()
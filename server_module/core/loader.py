@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+from core.config import settings
+
+
+class _Batch:
+
+    def __init__(self, ids: list[str]):
+        self.ids = dict.fromkeys(ids)
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class BatchLoader:
+    """
+    Lookups by ID of concurrent requests gathered into one query
+
+    The first lookup opens a batch and waits `window` seconds, the lookups
+    arriving meanwhile add their IDs to it, up to `max_ids`. The batch is then
+    loaded with a single call of the function of the first lookup, on its
+    session, and every lookup gets the entities of its own IDs. IDs without
+    an entity are left out.
+    """
+
+    def __init__(self, window: float, max_ids: int):
+        self.window = window
+        self.max_ids = max_ids
+        self._batch: Optional[_Batch] = None
+        self.lookups = 0
+        self.batches = 0
+        self.ids = 0
+
+    async def load_many(
+        self,
+        ids: list[str],
+        load: Callable[[list[str]], Awaitable[dict[str, Any]]],
+    ) -> dict[str, Any]:
+        self.lookups += 1
+
+        batch = self._batch
+        if batch is not None and len(batch.ids.keys() | ids) <= self.max_ids:
+            batch.ids.update(dict.fromkeys(ids))
+            try:
+                # Shielded, a lookup going away does not cancel the whole batch
+                loaded = await asyncio.shield(batch.future)
+            except asyncio.CancelledError:
+                if not batch.future.cancelled():
+                    raise
+                # The lookup loading the batch went away, load these IDs instead
+                return await self.load_many(ids, load)
+            return {id_: loaded[id_] for id_ in ids if id_ in loaded}
+
+        batch = self._batch = _Batch(ids)
+        try:
+            try:
+                await asyncio.sleep(self.window)
+            finally:
+                # Closed to new lookups before the query runs
+                if self._batch is batch:
+                    self._batch = None
+
+            self.batches += 1
+            self.ids += len(batch.ids)
+            loaded = await load(list(batch.ids))
+        except asyncio.CancelledError:
+            batch.future.cancel()
+            raise
+        except BaseException as e:
+            batch.future.set_exception(e)
+            # Marks the exception as retrieved when no other lookup was waiting
+            batch.future.exception()
+            raise
+        else:
+            batch.future.set_result(loaded)
+
+        return {id_: loaded[id_] for id_ in ids if id_ in loaded}
+
+    def stats(self) -> dict:
+        return {
+            "window_seconds": self.window,
+            "max_ids": self.max_ids,
+            "lookups": self.lookups,
+            "batches": self.batches,
+            "lookups_per_batch": self.lookups / self.batches if self.batches else 0.0,
+            "ids_per_batch": self.ids / self.batches if self.batches else 0.0,
+        }
+
+
+actor_loader = BatchLoader(settings.ID_BATCH_WINDOW_MS / 1000, settings.ID_BATCH_MAX_IDS)
+movie_loader = BatchLoader(settings.ID_BATCH_WINDOW_MS / 1000, settings.ID_BATCH_MAX_IDS)
+titles_loader = BatchLoader(settings.ID_BATCH_WINDOW_MS / 1000, settings.ID_BATCH_MAX_IDS)
@@ -0,0 +1,254 @@
+import math
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10000)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Prometheus histogram, one series per combination of label values"""
+
+    type = "histogram"
+
+    def __init__(
+        self, name: str, help: str, buckets: tuple, labelnames: tuple[str, ...] = ()
+    ):
+        self.name = name
+        self.help = help
+        self.buckets = (*buckets, math.inf)
+        self.labelnames = labelnames
+        # Label values -> [bucket counts..., sum, count]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{label_text} {series[-1]}")
+        return lines
+
+
+class CallbackMetric:
+    """
+    Gauge or counter read from the stats of another component when scraped
+
+    `values` returns the value of each combination of label values.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        labelnames: tuple[str, ...],
+        values: Callable[[], dict[tuple, float]],
+    ):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.labelnames = labelnames
+        self.values = values
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self.values().items()
+        ]
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.register(Histogram(
+    "imdb_http_request_duration_seconds",
+    "Time to answer a request, until its response starts",
+    LATENCY_BUCKETS,
+    ("method", "route", "status"),
+))
+RESPONSE_BYTES = registry.register(Histogram(
+    "imdb_http_response_size_bytes", "Size of the response bodies", BYTES_BUCKETS, ("route",)
+))
+DB_SECONDS = registry.register(Histogram(
+    "imdb_db_statement_duration_seconds", "Execution time of each SQL statement", LATENCY_BUCKETS
+))
+DB_ROWS = registry.register(Histogram(
+    "imdb_db_statement_rows", "Rows returned by each SQL statement", ROWS_BUCKETS
+))
+POOL_WAIT_SECONDS = registry.register(Histogram(
+    "imdb_db_pool_checkout_wait_seconds",
+    "Time to check out a pooled connection, including admission",
+    LATENCY_BUCKETS,
+))
+PHASE_SECONDS = registry.register(Histogram(
+    "imdb_app_phase_duration_seconds",
+    "Time building response objects from rows (hydrate) and encoding them (serialize)",
+    LATENCY_BUCKETS,
+    ("phase",),
+))
+
+
+class RequestTiming:
+    """Time spent by one request in each phase, summed over its statements"""
+
+    PHASES = ("pool", "db", "hydrate", "serialize")
+
+    def __init__(self, scope: Optional[Scope] = None):
+        self.scope = scope
+        self.start = time.perf_counter()
+        self.seconds = dict.fromkeys(self.PHASES, 0.0)
+        self.statements = 0
+        self.rows = 0
+
+    @property
+    def route(self) -> Optional[str]:
+        """Route template of the request, once it is routed"""
+        return getattr((self.scope or {}).get("route"), "path", None)
+
+    def add(self, phase: str, seconds: float):
+        self.seconds[phase] += seconds
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        entries = []
+        for phase in self.PHASES:
+            entry = f"{phase};dur={self.seconds[phase] * 1000:.2f}"
+            if phase == "db":
+                entry += f';desc="{self.statements} statements, {self.rows} rows"'
+            entries.append(entry)
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("current_timing", default=None)
+
+
+def record(phase: str, seconds: float):
+    """Time spent hydrating or serializing, added to the current request if any"""
+    PHASE_SECONDS.observe(seconds, phase)
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add(phase, seconds)
+
+
+def record_checkout(seconds: float):
+    POOL_WAIT_SECONDS.observe(seconds)
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add("pool", seconds)
+
+
+def record_statement(seconds: float, rows: int):
+    DB_SECONDS.observe(seconds)
+    if rows >= 0:
+        DB_ROWS.observe(rows)
+
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add("db", seconds)
+        timing.statements += 1
+        timing.rows += max(rows, 0)
+
+
+class MetricsMiddleware:
+    """
+    Records the latency and response size of every request by route and adds
+    the Server-Timing header with the time of each phase
+
+    Written as a plain ASGI middleware so streamed responses are passed
+    through chunk by chunk. The header of a streamed response only covers the
+    work done before its first chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(scope)
+        token = current_timing.set(timing)
+        status = 500
+        size = 0
+        elapsed = None
+
+        async def send_with_timing(message: Message):
+            nonlocal status, size, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - timing.start
+                MutableHeaders(scope=message).append("Server-Timing", timing.server_timing())
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timing.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            if elapsed is None:
+                elapsed = time.perf_counter() - timing.start
+            REQUEST_SECONDS.observe(elapsed, scope["method"], route, status)
+            RESPONSE_BYTES.observe(size, route)
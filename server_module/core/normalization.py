@@ -0,0 +1,10 @@
+import re
+import unicodedata
+
+# Must match the normalization applied by the ingest module to the *_normalized columns
+COMBINING_MARKS = re.compile(r"[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]")
+
+
+def normalize_text(value: str) -> str:
+    """Fold accents and case, e.g. "Penélope Cruz" -> "penelope cruz"."""
+    return COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", value)).casefold()
@@ -0,0 +1,206 @@
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, Optional, Sequence, TypeVar
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    case,
+    literal_column,
+    nulls_last,
+    select,
+    true,
+    union,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+
+T = TypeVar("T")
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 1000
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+ESTIMATED_TOTAL_HEADER = "X-Estimated-Total"
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """One column of a keyset ordering and how to read its value from a result"""
+
+    expression: ColumnElement
+    value: Callable[[Any], Any]
+    value_type: type = int
+    descending: bool = False
+    nulls_last: bool = False
+
+    def order_by(self) -> ColumnElement:
+        ordering = self.expression.desc() if self.descending else self.expression.asc()
+        return nulls_last(ordering) if self.nulls_last else ordering
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
+    estimated_total: Optional[int] = None
+
+
+def page_headers(page: Page) -> dict[str, str]:
+    """Headers exposing the cursor of the next page and the estimated total"""
+    headers = {}
+    if page.next_cursor:
+        headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.estimated_total is not None:
+        headers[ESTIMATED_TOTAL_HEADER] = str(page.estimated_total)
+    return headers
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, keys: list[SortKey]) -> list:
+    """Decode a cursor built by encode_cursor, raising 400 if it does not fit the keys"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        values = None
+
+    if (
+        not isinstance(values, list)
+        or len(values) != len(keys)
+        or not all(
+            isinstance(value, key.value_type) or (value is None and key.nulls_last)
+            for key, value in zip(keys, values)
+        )
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return values
+
+
+def ranked(
+    query: Select, exact: ColumnElement, rank: ColumnElement
+) -> tuple[Select, list[SortKey]]:
+    """
+    The query with an exact_match column and the keys sorting exact matches
+    first and then by rank
+
+    The rank is a unique integer precomputed by the ingest, so the rows of
+    each group come in the order of its index.
+    """
+    exact_match = case((exact, 0), else_=1)
+    keys = [
+        SortKey(exact_match, lambda row: row.exact_match),
+        SortKey(rank, lambda row: getattr(row, rank.key)),
+    ]
+    return query.add_columns(exact_match.label("exact_match")), keys
+
+
+def top_k_query(
+    query: Select,
+    exact: ColumnElement,
+    rank: ColumnElement,
+    limit: int | ColumnElement,
+    after: tuple[int, Optional[int]] = (0, None),
+    matches: Optional[Sequence[ColumnElement]] = None,
+) -> Optional[Select]:
+    """
+    First `limit` rows of the query ordered as by ranked, after the
+    (exact_match, rank) position, or None if no row can come after it
+
+    The exact matches and the other rows are read by two branches of a
+    UNION ALL, each ordered by the rank alone and limited, so Postgres can
+    walk the rank index and stop after the first rows that match. For rare
+    terms the planner reads the few matches from the search index and sorts
+    them instead, whichever is cheaper.
+
+    When the rows are the ones matching any of `matches`, the query is left
+    unfiltered and each branch is split by condition, so that every condition
+    can be read in rank order on its own. The UNION then drops the rows
+    matching several conditions.
+    """
+    after_exact_match, after_rank = after
+
+    branches = []
+    for exact_match, condition in ((0, exact), (1, exact.is_not(true()))):
+        if exact_match < after_exact_match:
+            continue
+
+        branch = query.add_columns(literal_column(str(exact_match)).label("exact_match"))
+        branch = branch.where(condition)
+        if exact_match == after_exact_match and after_rank is not None:
+            branch = branch.where(rank > after_rank)
+        for match in matches or [None]:
+            filtered = branch if match is None else branch.where(match)
+            # Inside a LATERAL subquery the branches read the terms of the outer query
+            filtered = filtered.correlate_except(rank.table)
+            branches.append(filtered.order_by(rank).limit(limit))
+
+    if not branches:
+        return None
+
+    combine = union if matches and len(matches) > 1 else union_all
+    rows = combine(*branches).subquery("matches")
+    return select(rows).order_by(rows.c.exact_match, rows.c[rank.key]).limit(limit)
+
+
+async def paginate_ranked(
+    session: AsyncSession,
+    query: Select,
+    exact: ColumnElement,
+    rank: ColumnElement,
+    limit: int,
+    cursor: Optional[str] = None,
+    matches: Optional[Sequence[ColumnElement]] = None,
+) -> Page:
+    """Fetch one page of the query ordered as by ranked, without sorting every row"""
+    _, keys = ranked(query, exact, rank)
+    after = tuple(decode_cursor(cursor, keys)) if cursor else (0, None)
+
+    page_query = top_k_query(query, exact, rank, limit + 1, after, matches)
+    if page_query is None:
+        return Page([])
+
+    result = await session.execute(page_query)
+    items = list(result.all())
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([key.value(items[-1]) for key in keys])
+
+    return Page(items, next_cursor)
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, keeping its bind parameters"""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select, analyze: bool = False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    options = "ANALYZE, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return f"EXPLAIN ({options}) {compiler.process(element.statement, **kw)}"
+
+
+async def estimate_count(session: AsyncSession, query: Select) -> int:
+    """Number of rows of the query estimated by the planner, without running it"""
+    result = await session.execute(Explain(query))
+
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,37 @@
+import time
+from typing import Any, Iterable, Sequence
+
+import orjson
+
+from core.metrics import record
+
+
+def row_dicts(rows: Iterable[Sequence], fields: Sequence[str]) -> list[dict[str, Any]]:
+    """
+    Response objects built from result rows whose leading columns are the fields
+
+    Columns after the fields, such as sort keys, are left out.
+    """
+    start = time.perf_counter()
+    items = [dict(zip(fields, row)) for row in rows]
+    record("hydrate", time.perf_counter() - start)
+    return items
+
+
+def dump_json(items: Any) -> bytes:
+    start = time.perf_counter()
+    body = orjson.dumps(items)
+    record("serialize", time.perf_counter() - start)
+    return body
+
+
+def join_json_array(items: Iterable[bytes]) -> bytes:
+    """JSON array of items that are already serialized"""
+    return b"[" + b",".join(items) + b"]"
+
+
+def dump_json_lines(items: Iterable[Any]) -> bytes:
+    start = time.perf_counter()
+    body = b"".join(orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE) for item in items)
+    record("serialize", time.perf_counter() - start)
+    return body
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import logging
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Any, Awaitable, Callable, Optional
+
+import orjson
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import settings
+from core.logger import get_logger
+from core.metrics import current_timing
+from core.tracing import current_span
+
+logger = get_logger(__name__)
+
+WHITESPACE = re.compile(r"\s+")
+
+Explain = Callable[[str, Any], Awaitable[list]]
+
+
+def normalize_query(statement: str) -> str:
+    """Statement on one line, its values are already bound parameters"""
+    return WHITESPACE.sub(" ", statement).strip()
+
+
+def fingerprint(query: str) -> str:
+    return hashlib.sha1(query.encode()).hexdigest()[:12]
+
+
+def plan_summary(plan: list) -> dict:
+    """Timings and buffers of the top node of an EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)"""
+    root = plan[0]
+    node = root["Plan"]
+    return {
+        "planning_ms": root.get("Planning Time"),
+        "execution_ms": root.get("Execution Time"),
+        "shared_hit_blocks": node.get("Shared Hit Blocks"),
+        "shared_read_blocks": node.get("Shared Read Blocks"),
+    }
+
+
+class SlowQueryLog:
+    """
+    Statements slower than `threshold_ms`, with the plan of a sampled subset
+
+    Every statement of the API is timed by the engine hooks. The slow ones are
+    kept in memory for the admin endpoint and, with probability
+    `explain_ratio` and at most once per `explain_interval` seconds for the
+    same query, queued for an `EXPLAIN (ANALYZE, BUFFERS)`. A background task
+    runs the plans one at a time, on its own connection and outside the pool
+    of the requests, then writes each entry to the rotating log.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        explain_ratio: float,
+        explain_interval: float,
+        explain: Explain,
+        file_logger: logging.Logger,
+        max_recent: int = 100,
+        max_queue: int = 100,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_ratio = explain_ratio
+        self.explain_interval = explain_interval
+        self.explain = explain
+        self.file_logger = file_logger
+        self.recent: deque[dict] = deque(maxlen=max_recent)
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self._explained_at: dict[str, float] = {}
+        self._queries: dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.slow = 0
+        self.explained = 0
+        self.dropped = 0
+
+    def observe(self, statement: str, parameters: Any, seconds: float, rows: int):
+        """Called by the engine hook after every statement"""
+        duration_ms = seconds * 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        self.slow += 1
+        query = normalize_query(statement)
+        key = fingerprint(query)
+        timing = current_timing.get()
+        span = current_span.get()
+        entry = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "fingerprint": key,
+            "query": query,
+            "parameters": parameters,
+            "duration_ms": round(duration_ms, 2),
+            "rows": rows,
+            "route": timing.route if timing is not None else None,
+            "trace_id": span.trace_id if span is not None and span.sampled else None,
+            "plan": None,
+        }
+        self.recent.append(entry)
+        self._summarize(key, query, duration_ms)
+
+        try:
+            self._queue.put_nowait((entry, self._should_explain(key)))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def _should_explain(self, key: str) -> bool:
+        if random.random() >= self.explain_ratio:
+            return False
+        now = time.monotonic()
+        if now - self._explained_at.get(key, -self.explain_interval) < self.explain_interval:
+            return False
+        self._explained_at[key] = now
+        return True
+
+    def _summarize(self, key: str, query: str, duration_ms: float):
+        summary = self._queries.get(key)
+        if summary is None:
+            summary = self._queries[key] = {
+                "fingerprint": key, "query": query, "count": 0, "total_ms": 0.0, "max_ms": 0.0
+            }
+        summary["count"] += 1
+        summary["total_ms"] += duration_ms
+        summary["max_ms"] = max(summary["max_ms"], duration_ms)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            entry, explain = await self._queue.get()
+            await self.process(entry, explain)
+
+    async def process(self, entry: dict, explain: bool):
+        """Capture the plan of the entry when sampled, then log it"""
+        if explain:
+            try:
+                plan = await self.explain(entry["query"], entry["parameters"])
+                entry["plan"] = plan
+                entry.update(plan_summary(plan))
+                self.explained += 1
+            except Exception as e:
+                entry["explain_error"] = str(e)
+                logger.warning(f"EXPLAIN of slow query {entry['fingerprint']} failed: {e}")
+
+        line = orjson.dumps(entry, default=str).decode()
+        await asyncio.to_thread(self.file_logger.info, line)
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold_ms,
+            "explain_ratio": self.explain_ratio,
+            "slow": self.slow,
+            "explained": self.explained,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "queries": sorted(
+                self._queries.values(), key=lambda query: query["total_ms"], reverse=True
+            ),
+            "recent": list(reversed(self.recent)),
+        }
+
+
+# Connections of their own, read only and under the default statement timeout,
+# so the plans never take a connection of the requests
+explain_engine = create_async_engine(
+    settings.API_DATABASE_URL,
+    poolclass=NullPool,
+    connect_args={"server_settings": {
+        "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS),
+        "default_transaction_read_only": "on",
+    }},
+)
+
+
+async def explain_analyze(query: str, parameters: Any) -> list:
+    """Run the statement again under EXPLAIN (ANALYZE, BUFFERS)"""
+    async with explain_engine.connect() as connection:
+        raw = await connection.get_raw_connection()
+        plan = await raw.driver_connection.fetchval(
+            f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", *(parameters or ())
+        )
+        return orjson.loads(plan) if isinstance(plan, str) else plan
+
+
+def rotating_logger(path: str, max_bytes: int, backups: int) -> logging.Logger:
+    """JSON lines of the slow queries, kept out of the application log"""
+    file_logger = logging.getLogger("slow_queries")
+    file_logger.propagate = False
+    file_logger.setLevel(logging.INFO)
+    if not file_logger.handlers:
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        file_logger.addHandler(handler)
+    return file_logger
+
+
+slow_queries = SlowQueryLog(
+    settings.SLOW_QUERY_THRESHOLD_MS,
+    settings.SLOW_QUERY_EXPLAIN_RATIO,
+    settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+    explain_analyze,
+    rotating_logger(
+        settings.SLOW_QUERY_LOG_FILE,
+        settings.SLOW_QUERY_LOG_MAX_BYTES,
+        settings.SLOW_QUERY_LOG_BACKUPS,
+    ),
+)
@@ -0,0 +1,57 @@
+from typing import AsyncIterator, Optional, Sequence
+
+from fastapi import Request
+
+from core.serialization import dump_json, dump_json_lines
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Rows fetched from the server-side cursor and flushed to the client at once
+STREAM_BATCH_SIZE = 1000
+
+
+def accepts_ndjson(request: Request) -> bool:
+    """Whether the client asked for newline delimited JSON in the Accept header"""
+    accept = request.headers.get("accept", "")
+    return any(
+        media_type.split(";")[0].strip() == NDJSON_MEDIA_TYPE
+        for media_type in accept.split(",")
+    )
+
+
+async def prefetch(
+    batches: AsyncIterator[Sequence[dict]],
+) -> AsyncIterator[Sequence[dict]]:
+    """Fetch the first batch now, so errors such as a 404 are raised before the response starts."""
+    first: Optional[Sequence[dict]] = await anext(batches, None)
+
+    async def chained() -> AsyncIterator[Sequence[dict]]:
+        if first is not None:
+            yield first
+        async for batch in batches:
+            yield batch
+
+    return chained()
+
+
+async def stream_json_array(
+    batches: AsyncIterator[Sequence[dict]],
+) -> AsyncIterator[bytes]:
+    """Serialize the batches as one JSON array, flushing a chunk per batch."""
+    yield b"["
+    separator = b""
+    async for batch in batches:
+        if not batch:
+            continue
+        yield separator + dump_json(batch)[1:-1]
+        separator = b","
+    yield b"]"
+
+
+async def stream_ndjson(
+    batches: AsyncIterator[Sequence[dict]],
+) -> AsyncIterator[bytes]:
+    """Serialize the batches as newline delimited JSON, flushing a chunk per batch."""
+    async for batch in batches:
+        if batch:
+            yield dump_json_lines(batch)
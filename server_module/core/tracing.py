@@ -0,0 +1,447 @@
+import functools
+import inspect
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+import httpx
+import orjson
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# OTLP span kinds
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+MAX_STATEMENT_LENGTH = 2000
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# Bit of the traceparent flags telling the caller sampled the trace
+SAMPLED_FLAG = 0x01
+
+
+class Span:
+    """
+    One timed operation of a trace, with the OTLP fields
+
+    Spans of traces left out by sampling are created with `sampled` unset,
+    so their children know not to record anything either.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        kind: int = INTERNAL,
+        attributes: Optional[dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.status = STATUS_OK
+        self.message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def set(self, key: str, value: Any):
+        if self.sampled:
+            self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.message = f"{type(error).__name__}: {error}"
+
+    def traceparent(self) -> str:
+        """W3C trace context of the span, to pass it on or find its trace"""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()
+            ],
+            "status": {"code": self.status, "message": self.message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def export_request(spans: list[dict]) -> dict:
+    """OTLP/JSON ExportTraceServiceRequest with the spans of this service"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": settings.API_CONTAINER_NAME}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+            ]},
+            "scopeSpans": [{"scope": {"name": "imdb-api"}, "spans": spans}],
+        }]
+    }
+
+
+class FileSpanExporter:
+    """Appends each batch as one line of OTLP/JSON, the format of the collector file exporter"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: list[dict]):
+        with open(self.path, "ab") as file:
+            file.write(orjson.dumps(export_request(spans), option=orjson.OPT_APPEND_NEWLINE))
+
+
+class OTLPSpanExporter:
+    """Posts each batch to an OTLP/HTTP collector in the JSON encoding"""
+
+    def __init__(self, endpoint: str, timeout: float = 5):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: list[dict]):
+        response = httpx.post(
+            self.endpoint,
+            content=orjson.dumps(export_request(spans)),
+            headers={"Content-Type": "application/json"},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+
+class BatchSpanProcessor:
+    """
+    Exports the finished spans in batches from a background thread
+
+    Requests only put their spans in a bounded queue, so a slow or missing
+    collector never adds latency. Spans are dropped when the queue is full.
+    """
+
+    def __init__(self, exporter, max_queue: int, batch_size: int, interval: float):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def on_end(self, span: Span):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(span.to_otlp())
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-export", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                timeout = None if not batch else max(deadline - time.monotonic(), 0)
+                try:
+                    span = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                batch.append(span)
+            if batch:
+                self._export(batch)
+
+    def _export(self, batch: list[dict]):
+        try:
+            self.exporter.export(batch)
+            self.exported += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.warning(f"Exporting {len(batch)} spans failed: {e}")
+
+    def shutdown(self, timeout: float = 5):
+        """Export the spans still queued and stop the thread"""
+        if self._thread is None:
+            return
+        # Spans go before the marker, so they are all exported before the thread stops
+        self._queue.put(None, timeout=timeout)
+        self._thread.join(timeout)
+
+
+class Tracer:
+    """
+    Creates the spans of the API and sends the sampled ones to the processor
+
+    The sampling decision is taken once per trace, at its root span, with
+    probability `sample_ratio`. A request with a valid `traceparent` header
+    follows the decision of the caller instead: it is always traced when
+    sampled, so one slow request can be traced on demand, and never when not.
+    """
+
+    def __init__(self, processor: Optional[BatchSpanProcessor], sample_ratio: float):
+        self.processor = processor
+        self.sample_ratio = sample_ratio
+
+    @property
+    def enabled(self) -> bool:
+        return self.processor is not None
+
+    def start_span(
+        self,
+        name: str,
+        kind: int = INTERNAL,
+        attributes: Optional[dict[str, Any]] = None,
+        traceparent: Optional[str] = None,
+    ) -> Span:
+        parent = current_span.get()
+        if parent is not None:
+            return Span(
+                name, parent.trace_id, parent.span_id, parent.sampled, kind,
+                attributes if parent.sampled else None,
+            )
+
+        match = TRACEPARENT.match(traceparent or "")
+        if match:
+            # The caller decided for the whole trace, sample_ratio only applies to new ones
+            trace_id, parent_id, flags = match.groups()
+            sampled = bool(int(flags, 16) & SAMPLED_FLAG)
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+            sampled = random.random() < self.sample_ratio
+        return Span(name, trace_id, parent_id, sampled, kind, attributes if sampled else None)
+
+    def end_span(self, span: Span):
+        span.end_ns = time.time_ns()
+        if span.sampled and self.processor is not None:
+            self.processor.on_end(span)
+
+    @contextmanager
+    def span(self, name: str, kind: int = INTERNAL, **attributes) -> Iterator[Optional[Span]]:
+        """Span around the block, the current span inside it. None when tracing is off"""
+        if not self.enabled:
+            yield None
+            return
+
+        span = self.start_span(name, kind, attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            current_span.reset(token)
+            self.end_span(span)
+
+    def stats(self) -> dict:
+        processor = self.processor
+        return {
+            "enabled": self.enabled,
+            "sample_ratio": self.sample_ratio,
+            "queued": processor._queue.qsize() if processor else 0,
+            "exported": processor.exported if processor else 0,
+            "dropped": processor.dropped if processor else 0,
+            "failed": processor.failed if processor else 0,
+        }
+
+
+def traced(func):
+    """
+    Span around each call of an async method, named by its qualified name
+
+    For async generators the span lasts until the iteration ends, and is only
+    the current span while the generator runs, not while the caller does.
+    """
+    name = func.__qualname__
+
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def trace_generator(*args, **kwargs):
+            if not tracer.enabled:
+                async for item in func(*args, **kwargs):
+                    yield item
+                return
+
+            span = tracer.start_span(name)
+            iterator = func(*args, **kwargs)
+            try:
+                while True:
+                    token = current_span.set(span)
+                    try:
+                        item = await anext(iterator)
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        current_span.reset(token)
+                    yield item
+            except GeneratorExit:
+                # Closed by the consumer, not a failure
+                raise
+            except BaseException as e:
+                span.record_error(e)
+                raise
+            finally:
+                await iterator.aclose()
+                tracer.end_span(span)
+
+        return trace_generator
+
+    @functools.wraps(func)
+    async def trace_call(*args, **kwargs):
+        with tracer.span(name):
+            return await func(*args, **kwargs)
+
+    return trace_call
+
+
+def parameter_shape(parameters: Any) -> str:
+    """Types of the bound parameters, with the length of arrays, never their values"""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(
+            f"{key}: {_value_shape(value)}" for key, value in parameters.items()
+        ) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(_value_shape(value) for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _value_shape(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def statement_span(statement: str, parameters: Any, executemany: bool) -> Optional[Span]:
+    """Span of a SQL statement, started as a child of the current span"""
+    if not tracer.enabled:
+        return None
+
+    span = tracer.start_span("db.statement", CLIENT)
+    if span.sampled:
+        span.attributes.update({
+            "db.system": "postgresql",
+            "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            "db.parameters.shape": (
+                f"{len(parameters)} x {parameter_shape(parameters[0])}"
+                if executemany and parameters else parameter_shape(parameters)
+            ),
+        })
+    return span
+
+
+class TracingMiddleware:
+    """
+    Root span of each request, named by its route template
+
+    The response carries the `traceparent` of the span, to find the trace of
+    a slow request in the exported spans.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        span = tracer.start_span(
+            f"{scope['method']} {scope['path']}",
+            SERVER,
+            {"http.method": scope["method"], "http.target": scope["path"]},
+            headers.get(b"traceparent", b"").decode("latin-1"),
+        )
+        token = current_span.set(span)
+
+        async def send_with_traceparent(message: Message):
+            if message["type"] == "http.response.start":
+                span.set("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.status = STATUS_ERROR
+                if span.sampled:
+                    MutableHeaders(scope=message).append("traceparent", span.traceparent())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_traceparent)
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            current_span.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route is not None:
+                span.name = f"{scope['method']} {route}"
+                span.set("http.route", route)
+            tracer.end_span(span)
+
+
+def create_tracer() -> Tracer:
+    """Tracer of the settings, recording nothing when TRACE_EXPORTER is 'none'"""
+    if settings.TRACE_EXPORTER == "file":
+        exporter = FileSpanExporter(settings.TRACE_FILE)
+    elif settings.TRACE_EXPORTER == "otlp":
+        exporter = OTLPSpanExporter(settings.TRACE_OTLP_ENDPOINT)
+    else:
+        return Tracer(None, settings.TRACE_SAMPLE_RATIO)
+
+    processor = BatchSpanProcessor(
+        exporter,
+        settings.TRACE_MAX_QUEUE,
+        settings.TRACE_BATCH_SIZE,
+        settings.TRACE_EXPORT_INTERVAL_SECONDS,
+    )
+    return Tracer(processor, settings.TRACE_SAMPLE_RATIO)
+
+
+tracer = create_tracer()
@@ -1,16 +1,94 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.actors.repository import ActorRepository
 from src.actors.routes import router as actors_router
+from src.admin.routes import router as admin_router
+from src.movies.repository import MovieRepository
 from src.movies.routes import router as movies_router
+from core.admission import admission
+from core.cache import actor_cache, movie_cache, search_cache
 from core.config import settings
+from core.database import engine, pool_status, warm_up_pool
+from core.loader import actor_loader, movie_loader, titles_loader
 from core.logger import setup_logging, get_logger
+from core.metrics import METRICS_MEDIA_TYPE, CallbackMetric, MetricsMiddleware, registry
+from core.singleflight import search_flights
+from core.slow_queries import slow_queries
+from core.tracing import TracingMiddleware, tracer
 
 setup_logging()
 
-app = FastAPI(title=settings.API_CONTAINER_NAME)
+
+async def warm_up_searches(session: AsyncSession):
+    await MovieRepository(session).warm_up()
+    await ActorRepository(session).warm_up()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_POOL_WARMUP:
+        await warm_up_pool(settings.DB_POOL_SIZE, warm_up_searches)
+    slow_queries.start()
+    yield
+    await slow_queries.stop()
+    await engine.dispose()
+    if tracer.processor is not None:
+        tracer.processor.shutdown()
+
+
+app = FastAPI(title=settings.API_CONTAINER_NAME, lifespan=lifespan)
+
+app.add_middleware(MetricsMiddleware)
+# Added last so it runs first and the metrics middleware is inside the request span
+app.add_middleware(TracingMiddleware)
 
 app.include_router(actors_router)
 app.include_router(movies_router)
+app.include_router(admin_router)
+
+
+CACHES = {"search": search_cache, "actors": actor_cache, "movies": movie_cache}
+LOADERS = {"actors": actor_loader, "movies": movie_loader, "titles": titles_loader}
+
+registry.register(CallbackMetric(
+    "imdb_db_pool_connections", "Connections of the pool by state", "gauge", ("state",),
+    lambda: {(state,): pool_status()[state] for state in ("checked_in", "checked_out")},
+))
+registry.register(CallbackMetric(
+    "imdb_admission_requests", "Requests using the database and waiting in the queue",
+    "gauge", ("state",),
+    lambda: {("active",): admission.active, ("queued",): admission.waiting},
+))
+registry.register(CallbackMetric(
+    "imdb_admission_rejections_total", "Requests answered with 503 by the admission controller",
+    "counter", ("reason",),
+    lambda: {
+        ("queue_full",): admission.rejected,
+        ("queue_timeout",): admission.queue_timeouts,
+        ("statement_timeout",): admission.statement_timeouts,
+    },
+))
+registry.register(CallbackMetric(
+    "imdb_cache_lookups_total", "Cache lookups by cache and result", "counter",
+    ("cache", "result"),
+    lambda: {
+        (name, result): getattr(cache, result)
+        for name, cache in CACHES.items()
+        for result in ("hits", "misses")
+    },
+))
+registry.register(CallbackMetric(
+    "imdb_search_executions_total", "Searches run and searches sharing a running one",
+    "counter", ("result",),
+    lambda: {("executed",): search_flights.executions, ("shared",): search_flights.shared},
+))
+registry.register(CallbackMetric(
+    "imdb_loader_batches_total", "Queries run by the loaders of the lookups by ID", "counter",
+    ("loader",), lambda: {(name,): loader.batches for name, loader in LOADERS.items()},
+))
 
 
 @app.get("/")
@@ -21,3 +99,9 @@ def read_root():
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Latency, database and cache metrics in the Prometheus text format"""
+    return Response(registry.render(), media_type=METRICS_MEDIA_TYPE)
@@ -0,0 +1,80 @@
+"""
+Production server: API_WORKERS uvicorn workers sharing one socket
+
+    python serve.py
+
+Each worker is a process with its own event loop (uvloop), HTTP parser
+(httptools), caches and connection pool, so the searches use every core.
+The pool of each worker is sized so that all the workers together stay
+within DB_MAX_CONNECTIONS, and the sizes are passed to the workers through
+their environment. The admission controller of each worker follows the
+size of its pool. Without API_WORKERS, the workers are capped at the most
+the budget can give a connection each.
+
+Signals to the main process:
+
+- SIGHUP restarts the workers one at a time, each one finishing its
+  requests first, to reload the code or the configuration without downtime
+- SIGTTOU removes a worker. SIGTTIN adds one, but with the pool size
+  worked out for the workers at startup, so the budget is exceeded until
+  the next restart
+- SIGINT / SIGTERM stop the workers gracefully, waiting up to
+  API_GRACEFUL_SHUTDOWN_SECONDS for the requests in progress
+"""
+import os
+
+import uvicorn
+
+from core.config import settings
+from core.database import max_workers, worker_pool_size
+from core.logger import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+
+def main():
+    setup_logging()
+    # The slow query log explains plans on a connection outside the pool
+    reserved = 1 if settings.SLOW_QUERY_EXPLAIN_RATIO > 0 else 0
+    workers = settings.API_WORKERS
+    if not workers:
+        # One per CPU, but no more than the connection budget can serve. A
+        # count set explicitly is kept and refused below when it does not fit
+        cpus = os.cpu_count() or 1
+        workers = max(min(cpus, max_workers(settings.DB_MAX_CONNECTIONS, reserved)), 1)
+        if workers < cpus:
+            logger.info(
+                f"Capping the workers at {workers} of {cpus} CPUs, the most that "
+                f"{settings.DB_MAX_CONNECTIONS} connections can serve"
+            )
+    pool_size, max_overflow = worker_pool_size(
+        workers,
+        settings.DB_MAX_CONNECTIONS,
+        settings.DB_POOL_SIZE,
+        settings.DB_MAX_OVERFLOW,
+        reserved,
+    )
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    connections = workers * (pool_size + max_overflow + reserved)
+    logger.info(
+        f"Starting {workers} workers with {pool_size} + {max_overflow} connections each, "
+        f"{connections} of {settings.DB_MAX_CONNECTIONS} at most"
+    )
+
+    uvicorn.run(
+        "main:app",
+        host=settings.API_HOST,
+        port=settings.API_PORT,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.API_BACKLOG,
+        timeout_keep_alive=settings.API_KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.API_GRACEFUL_SHUTDOWN_SECONDS,
+        access_log=settings.API_ACCESS_LOG,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,9 +10,22 @@ class Actor(Base):
 
     nconst = Column(String(10), primary_key=True, index=True)
     primary_name = Column("primary_name", String(255), nullable=False, index=True)
+    primary_name_normalized = Column(
+        "primary_name_normalized", String(255), nullable=True, index=True
+    )
     birth_year = Column("birth_year", Integer, nullable=True)
     primary_profession = Column("primary_profession", String(255), nullable=True)
     is_dead = Column("is_dead", Boolean, nullable=True)
+    # Position in the search order besides exact matches, computed by the ingest
+    search_rank = Column("search_rank", Integer, nullable=True, index=True)
     search_vector = Column(
-        TSVECTOR, Computed("to_tsvector('english', coalesce(primary_name, ''))")
+        TSVECTOR, Computed("to_tsvector('english', coalesce(primary_name_normalized, ''))")
     )
+
+
+class ActorTitle(Base):
+
+    __tablename__ = "actor_titles"
+
+    nconst = Column("nconst", String(10), primary_key=True, index=True)
+    tconst = Column("tconst", String(10), primary_key=True)
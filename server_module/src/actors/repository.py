@@ -1,8 +1,29 @@
-from sqlalchemy import nulls_last, select, func, case, and_, or_
-from sqlalchemy.dialects.postgresql import TSVECTOR
+from typing import AsyncIterator, Optional, Sequence
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    String,
+    any_,
+    bindparam,
+    func,
+    nulls_last,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
-from src.actors.models import Actor
+from src.actors.models import Actor, ActorTitle
+from src.actors.schemas import ACTOR_FIELDS
+from src.movies.models import Movie
+from src.movies.repository import MOVIE_COLUMNS, WARM_UP_TERM
+from core.batch import search_batch
+from core.normalization import normalize_text
+from core.pagination import DEFAULT_LIMIT, Page, estimate_count, paginate_ranked, ranked
+from core.streaming import STREAM_BATCH_SIZE
+from core.tracing import traced
+
+ACTOR_COLUMNS = tuple(getattr(Actor, field) for field in ACTOR_FIELDS)
 
 
 class ActorRepository:
@@ -10,26 +31,102 @@ class ActorRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_by_name(self, name: str) -> list[Actor]:
-        ts_query = func.websearch_to_tsquery("english", name)
+    @traced
+    async def get_by_name(
+        self, name: str, limit: int = DEFAULT_LIMIT, cursor: Optional[str] = None
+    ) -> Page[Row]:
+        query, exact = self._search(name)
+        page = await paginate_ranked(
+            self.session, query, exact, Actor.search_rank, limit, cursor
+        )
+
+        # An empty page after a cursor is the end of the results, not a miss
+        if not page.items and not cursor:
+            raise HTTPException(status_code=404, detail=f"Actor '{name}' not found")
+
+        return page
 
-        exact_match = case(
-            (func.lower(Actor.primary_name) == func.lower(name), 0), else_=1
+    @traced
+    async def stream_by_name(self, name: str) -> AsyncIterator[Sequence[Row]]:
+        """Every match in search order, read from a server-side cursor in batches"""
+        query, keys = ranked(*self._search(name), Actor.search_rank)
+        query = query.order_by(*(key.order_by() for key in keys)).execution_options(
+            yield_per=STREAM_BATCH_SIZE
         )
 
+        result = await self.session.stream(query)
+        found = False
+        async for rows in result.partitions():
+            found = True
+            yield rows
+
+        if not found:
+            raise HTTPException(status_code=404, detail=f"Actor '{name}' not found")
+
+    @traced
+    async def warm_up(self):
+        """Prepare the first page and estimate statements of the search on the connection"""
+        query, exact = self._search(WARM_UP_TERM)
+        await paginate_ranked(self.session, query, exact, Actor.search_rank, DEFAULT_LIMIT)
+        await estimate_count(self.session, query)
+
+    @traced
+    async def estimate_by_name(self, name: str) -> int:
+        query, _ = self._search(name)
+        return await estimate_count(self.session, query)
+
+    @traced
+    async def search_batch(self, names: list[str], limits: list[int]) -> list[list[Row]]:
+        """Top matches of every name, in the order of the names"""
+        return await search_batch(
+            self.session,
+            lambda term: (*self._search_term(term), None),
+            Actor.search_rank,
+            [normalize_text(name) for name in names],
+            limits,
+        )
+
+    def _search(self, name: str) -> tuple[Select, ColumnElement]:
+        return self._search_term(normalize_text(name))
+
+    def _search_term(self, normalized_name: str | ColumnElement) -> tuple[Select, ColumnElement]:
+        """
+        Matches of a normalized name, either a value or a column of a batch of
+        names, and the condition of the exact matches
+        """
+        ts_query = func.websearch_to_tsquery("english", normalized_name)
+
+        # The rank orders the other matches by name length
+        query = select(*ACTOR_COLUMNS, Actor.search_rank).where(
+            Actor.search_vector.op("@@")(ts_query)
+        )
+        return query, Actor.primary_name_normalized == normalized_name
+
+    @traced
+    async def get_by_ids(self, nconsts: list[str]) -> Sequence[Row]:
+        """Actors of the IDs that exist, with one primary key probe per ID"""
+        # = ANY of an array keeps a single prepared statement whatever the number of IDs
+        query = select(*ACTOR_COLUMNS).where(
+            Actor.nconst == any_(bindparam("nconsts", nconsts, type_=ARRAY(String)))
+        )
+
+        result = await self.session.execute(query)
+        return result.all()
+
+    @traced
+    async def get_known_for(self, nconsts: list[str]) -> dict[str, list[Sequence]]:
+        """Known for titles of all the actors, fetched in a single query"""
         query = (
-            select(Actor)
-            .where(Actor.search_vector.op("@@")(ts_query))
-            .order_by(
-                exact_match.asc(),
-                func.length(Actor.primary_name).asc()
-            )
+            select(ActorTitle.nconst, *MOVIE_COLUMNS)
+            .join(Movie, Movie.tconst == ActorTitle.tconst)
+            .where(ActorTitle.nconst.in_(nconsts))
+            .order_by(ActorTitle.nconst, nulls_last(Movie.num_votes.desc()))
         )
 
         result = await self.session.execute(query)
-        actor = result.scalars().all()
 
-        if not actor:
-            raise HTTPException(status_code=404, detail=f"Actor '{name}' not found")
+        titles = {nconst: [] for nconst in nconsts}
+        for nconst, *movie in result.all():
+            titles[nconst].append(movie)
 
-        return actor
+        return titles
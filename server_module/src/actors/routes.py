@@ -1,11 +1,25 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
+from typing import Annotated, Optional
 
 from src.actors.service import ActorService
 from src.actors.repository import ActorRepository
-from src.actors.schemas import ActorBase
+from src.actors.schemas import ActorBase, ActorBatchResult, ActorBatchSearch
+from src.movies.schemas import MovieBase
 from core.database import get_session
+from core.batch import split_ids
+from core.cache import (
+    EntityCache,
+    ResultCache,
+    get_actor_cache,
+    get_search_cache,
+)
+from core.conditional import cache_headers, entity_tag, not_modified
+from core.normalization import normalize_text
+from core.pagination import DEFAULT_LIMIT, MAX_LIMIT
+from core.serialization import dump_json, join_json_array
+from core.streaming import NDJSON_MEDIA_TYPE, accepts_ndjson, prefetch, stream_ndjson
 from core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -23,12 +37,104 @@ async def search_actors(
     name: Annotated[
         str, Query(min_length=1, description="Name of the actor to search")
     ],
+    request: Request,
+    titles: Annotated[
+        bool, Query(description="Include the titles each actor is known for")
+    ] = False,
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_LIMIT, description="Number of actors to return")
+    ] = DEFAULT_LIMIT,
+    cursor: Annotated[
+        Optional[str], Query(description="X-Next-Cursor header of the previous page")
+    ] = None,
     service: ActorService = Depends(get_actor_service),
+    cache: ResultCache = Depends(get_search_cache),
 ) -> list[ActorBase]:
     """Search Actor by name"""
     try:
-        actors = await service.get_actor_by_name(name)
-        return actors
+        if accepts_ndjson(request):
+            batches = await prefetch(service.stream_actors_by_name(name, titles))
+            return StreamingResponse(stream_ndjson(batches), media_type=NDJSON_MEDIA_TYPE)
+
+        key = cache.key("actors", normalize_text(name), titles, limit, cursor)
+        etag = entity_tag(cache.version, key)
+        if (response := not_modified(request, etag)) is not None:
+            return response
+
+        cached = cache.get(key)
+        if cached is None:
+            cached = cache.set(key, await service.search_actors(name, titles, limit, cursor))
+        response = cached.to_response()
+        response.headers.update(cache_headers(etag))
+        return response
     except Exception as e:
         logger.error(f"Error searching actor by name '{name}': {e}")
         raise
+
+
+@router.post("/search:batch")
+async def search_actors_batch(
+    batch: ActorBatchSearch,
+    service: ActorService = Depends(get_actor_service),
+) -> list[ActorBatchResult]:
+    """Search many names in one request, the results grouped by name"""
+    try:
+        results = await service.search_actors_batch(batch.queries)
+        return Response(dump_json(results), media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error searching a batch of {len(batch.queries)} names: {e}")
+        raise
+
+
+@router.get("/{nconst}/titles")
+async def actor_titles(
+    nconst: Annotated[
+        str, Path(pattern=r"^nm\d+$", description="IMDb ID of the actor")
+    ],
+    service: ActorService = Depends(get_actor_service),
+) -> list[MovieBase]:
+    """Titles an actor is known for"""
+    try:
+        movies = await service.get_actor_titles(nconst)
+        return Response(dump_json(movies), media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error getting titles of actor '{nconst}': {e}")
+        raise
+
+
+@router.get("")
+async def get_actors(
+    ids: Annotated[
+        str,
+        Query(
+            pattern=r"^nm\d+(,nm\d+)*$",
+            description="Comma separated IMDb IDs of the actors",
+        ),
+    ],
+    service: ActorService = Depends(get_actor_service),
+    cache: EntityCache = Depends(get_actor_cache),
+) -> list[ActorBase]:
+    """Actors by IMDb ID, in the order of the IDs, leaving out the ones that do not exist"""
+    try:
+        actors = await service.get_actors(split_ids(ids), cache)
+        return Response(join_json_array(actors), media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error getting actors '{ids}': {e}")
+        raise
+
+
+@router.get("/{nconst}")
+async def get_actor(
+    nconst: Annotated[
+        str, Path(pattern=r"^nm\d+$", description="IMDb ID of the actor")
+    ],
+    service: ActorService = Depends(get_actor_service),
+    cache: EntityCache = Depends(get_actor_cache),
+) -> ActorBase:
+    """Actor by IMDb ID"""
+    try:
+        actor = await service.get_actor(nconst, cache)
+        return Response(actor, media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error getting actor '{nconst}': {e}")
+        raise
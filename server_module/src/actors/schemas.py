@@ -1,5 +1,8 @@
 from typing import Optional
 from pydantic import BaseModel, ConfigDict, Field
+from core.batch import MAX_BATCH_LIMIT, MAX_BATCH_QUERIES
+from core.pagination import DEFAULT_LIMIT
+from src.movies.schemas import MovieBase
 
 
 class ActorBase(BaseModel):
@@ -10,3 +13,22 @@ class ActorBase(BaseModel):
     birth_year: Optional[int] = Field(None)
     primary_profession: Optional[str] = Field(None)
     is_dead: Optional[bool] = Field(None)
+    known_for: Optional[list[MovieBase]] = Field(None)
+
+
+class ActorQuery(BaseModel):
+    name: str = Field(..., min_length=1)
+    limit: int = Field(DEFAULT_LIMIT, ge=1, le=MAX_BATCH_LIMIT)
+
+
+class ActorBatchSearch(BaseModel):
+    queries: list[ActorQuery] = Field(..., min_length=1, max_length=MAX_BATCH_QUERIES)
+
+
+class ActorBatchResult(BaseModel):
+    name: str
+    results: list[ActorBase]
+
+
+# Columns selected for the responses, in the order of the schema
+ACTOR_FIELDS = tuple(field for field in ActorBase.model_fields if field != "known_for")
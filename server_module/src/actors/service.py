@@ -1,5 +1,15 @@
+from typing import AsyncIterator, Optional, Sequence
+from fastapi import HTTPException
+from core.cache import CachedResponse, EntityCache, ResultCache
+from core.loader import actor_loader, titles_loader
+from core.normalization import normalize_text
+from core.pagination import DEFAULT_LIMIT, Page, page_headers
+from core.serialization import dump_json, row_dicts
+from core.singleflight import search_flights
+from core.tracing import traced
 from src.actors.repository import ActorRepository
-from src.actors.schemas import ActorBase
+from src.actors.schemas import ACTOR_FIELDS, ActorQuery
+from src.movies.schemas import MOVIE_FIELDS
 
 
 class ActorService:
@@ -7,6 +17,106 @@ class ActorService:
     def __init__(self, repository: ActorRepository):
         self.repository = repository
 
-    async def get_actor_by_name(self, actor_name: str) -> list[ActorBase]:
-        actors = await self.repository.get_by_name(actor_name)
-        return [ActorBase.model_validate(actor) for actor in actors]
+    @traced
+    async def search_actors(
+        self,
+        actor_name: str,
+        include_titles: bool = False,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+    ) -> CachedResponse:
+        """Serialized page of a search, run once for the identical concurrent searches"""
+        key = ResultCache.key("actors", normalize_text(actor_name), include_titles, limit, cursor)
+
+        async def search() -> CachedResponse:
+            page = await self.get_actor_by_name(actor_name, include_titles, limit, cursor)
+            return CachedResponse(dump_json(page.items), page_headers(page))
+
+        return await search_flights.do(key, search)
+
+    @traced
+    async def get_actor_by_name(
+        self,
+        actor_name: str,
+        include_titles: bool = False,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+    ) -> Page[dict]:
+        page = await self.repository.get_by_name(actor_name, limit, cursor)
+        results = await self._to_dicts(page.items, include_titles)
+
+        # The planner estimate is only needed when the first page is not everything
+        estimated_total = None
+        if cursor is None:
+            estimated_total = len(results)
+            if page.next_cursor:
+                estimated_total = await self.repository.estimate_by_name(actor_name)
+
+        return Page(results, page.next_cursor, estimated_total)
+
+    @traced
+    async def stream_actors_by_name(
+        self, actor_name: str, include_titles: bool = False
+    ) -> AsyncIterator[list[dict]]:
+        async for rows in self.repository.stream_by_name(actor_name):
+            yield await self._to_dicts(rows, include_titles)
+
+    @traced
+    async def search_actors_batch(self, queries: list[ActorQuery]) -> list[dict]:
+        groups = await self.repository.search_batch(
+            [query.name for query in queries], [query.limit for query in queries]
+        )
+        return [
+            {"name": query.name, "results": await self._to_dicts(rows, False)}
+            for query, rows in zip(queries, groups)
+        ]
+
+    @traced
+    async def get_actor_titles(self, nconst: str) -> list[dict]:
+        titles = await titles_loader.load_many([nconst], self.repository.get_known_for)
+        if not titles.get(nconst):
+            raise HTTPException(
+                status_code=404, detail=f"Titles of actor '{nconst}' not found"
+            )
+        return row_dicts(titles[nconst], MOVIE_FIELDS)
+
+    @traced
+    async def _to_dicts(self, rows: Sequence, include_titles: bool) -> list[dict]:
+        """Response objects of the actors, with the titles of all of them fetched in one query"""
+        results = row_dicts(rows, ACTOR_FIELDS)
+
+        titles = {}
+        if include_titles and results:
+            titles = await self.repository.get_known_for(
+                [actor["nconst"] for actor in results]
+            )
+
+        for actor in results:
+            actor["known_for"] = (
+                row_dicts(titles[actor["nconst"]], MOVIE_FIELDS) if include_titles else None
+            )
+
+        return results
+
+    @traced
+    async def get_actor(self, nconst: str, cache: EntityCache) -> bytes:
+        actors = await self.get_actors([nconst], cache)
+        if not actors:
+            raise HTTPException(status_code=404, detail=f"Actor '{nconst}' not found")
+        return actors[0]
+
+    @traced
+    async def get_actors(self, nconsts: list[str], cache: EntityCache) -> list[bytes]:
+        """Serialized actors in the order of the IDs, the ones that do not exist left out"""
+        actors = await cache.get_many(
+            nconsts, lambda missing: actor_loader.load_many(missing, self._load_actors)
+        )
+        return [actors[nconst] for nconst in nconsts if nconst in actors]
+
+    @traced
+    async def _load_actors(self, nconsts: list[str]) -> dict[str, bytes]:
+        rows = await self.repository.get_by_ids(nconsts)
+        return {
+            actor["nconst"]: dump_json(actor)
+            for actor in await self._to_dicts(rows, False)
+        }
@@ -0,0 +1,63 @@
+from fastapi import APIRouter
+
+from core.admission import admission
+from core.cache import actor_cache, movie_cache, search_cache
+from core.database import pool_status
+from core.loader import actor_loader, movie_loader, titles_loader
+from core.singleflight import search_flights
+from core.slow_queries import slow_queries
+from core.tracing import tracer
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/cache")
+async def cache_stats() -> dict:
+    """Hit ratio and memory use of the search cache"""
+    return search_cache.stats()
+
+
+@router.get("/cache/entities")
+async def entity_cache_stats() -> dict:
+    """Hit ratio and size of the actor and movie caches of the lookups by ID"""
+    return {"actors": actor_cache.stats(), "movies": movie_cache.stats()}
+
+
+@router.get("/loaders")
+async def loader_stats() -> dict:
+    """How many concurrent lookups by ID were gathered into each query"""
+    return {
+        "actors": actor_loader.stats(),
+        "movies": movie_loader.stats(),
+        "titles": titles_loader.stats(),
+    }
+
+
+@router.get("/flights")
+async def flight_stats() -> dict:
+    """Searches running now and how many identical searches shared their execution"""
+    return search_flights.stats()
+
+
+@router.get("/pool")
+async def pool_stats() -> dict:
+    """Connections in use and checkout wait time of the database pool"""
+    return pool_status()
+
+
+@router.get("/admission")
+async def admission_stats() -> dict:
+    """Concurrent requests, queue depth, rejections and timeouts of the admission controller"""
+    return admission.stats()
+
+
+@router.get("/slow-queries")
+async def slow_query_stats() -> dict:
+    """Statements over the slow query threshold, by query and most recent first, with their plans"""
+    return slow_queries.stats()
+
+
+@router.get("/tracing")
+async def tracing_stats() -> dict:
+    """Sampling ratio and spans exported, dropped or failed of the tracer"""
+    return tracer.stats()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Computed, String, Text
+from sqlalchemy import Column, Computed, Float, Integer, SmallInteger, String, Text
 from sqlalchemy.dialects.postgresql import TSVECTOR
 
 from core.database import Base
@@ -10,8 +10,39 @@ class Movie(Base):
 
     tconst = Column(String(10), primary_key=True, index=True)
     primary_title = Column("primary_title", String(255), nullable=False, index=True)
+    primary_title_normalized = Column(
+        "primary_title_normalized", String(255), nullable=True, index=True
+    )
     original_title = Column("original_title", String(255), nullable=True)
     genres = Column("genres", String(255), nullable=True)
+    average_rating = Column("average_rating", Float, nullable=True)
+    num_votes = Column("num_votes", Integer, nullable=True)
+    # Position in the search order besides exact matches, computed by the ingest
+    search_rank = Column("search_rank", Integer, nullable=True, index=True)
+    search_vector = Column(
+        TSVECTOR, Computed("to_tsvector('english', coalesce(primary_title_normalized, ''))")
+    )
+
+
+class MovieAka(Base):
+
+    __tablename__ = "movie_akas"
+
+    tconst = Column(String(10), primary_key=True, index=True)
+    title = Column("title", Text, nullable=False)
+    title_normalized = Column("title_normalized", Text, primary_key=True)
+    region = Column("region", String(10), nullable=True)
+    language = Column("language", String(10), nullable=True)
     search_vector = Column(
-        TSVECTOR, Computed("to_tsvector('english', coalesce(primary_name, ''))")
+        TSVECTOR, Computed("to_tsvector('simple', coalesce(title_normalized, ''))")
     )
+
+
+class Episode(Base):
+
+    __tablename__ = "episodes"
+
+    episode_id = Column("episode_id", Integer, primary_key=True)
+    parent_id = Column("parent_id", Integer, nullable=False, index=True)
+    season_number = Column("season_number", SmallInteger, nullable=True)
+    episode_number = Column("episode_number", Integer, nullable=True)
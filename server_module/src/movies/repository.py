@@ -1,7 +1,47 @@
-from sqlalchemy import select, func, case, or_
+from typing import AsyncIterator, Optional, Sequence
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    String,
+    Text,
+    any_,
+    bindparam,
+    cast,
+    func,
+    literal_column,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
-from src.movies.models import Movie
+from src.movies.models import Episode, Movie, MovieAka
+from src.movies.schemas import MOVIE_FIELDS
+from core.batch import search_batch
+from core.normalization import normalize_text
+from core.pagination import DEFAULT_LIMIT, Page, estimate_count, paginate_ranked, ranked
+from core.streaming import STREAM_BATCH_SIZE
+from core.tracing import traced
+
+# Must match the predicate of the idx_movies_top_rated partial index
+TOP_RATED_MIN_VOTES = 25000
+
+EPISODES_BATCH_SIZE = 500
+
+# Largest parent_id of the int4 episodes column, longer IDs cannot have episodes
+MAX_PARENT_ID = 2**31 - 1
+
+# Any term prepares the search statements, only their SQL matters
+WARM_UP_TERM = "warm up"
+
+# Only the response columns are selected, the rows are serialized without ORM instances
+MOVIE_COLUMNS = tuple(getattr(Movie, field) for field in MOVIE_FIELDS)
+
+
+def tconst_from_id(column):
+    """Rebuild the tconst of an integer ID: 'tt' and at least 7 zero padded digits"""
+    digits = cast(column, Text)
+    return func.concat("tt", func.lpad(digits, func.greatest(7, func.length(digits)), "0"))
 
 
 class MovieRepository:
@@ -9,27 +49,192 @@ class MovieRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def get_by_title(self, title: str) -> list[Movie]:
-        ts_query = func.websearch_to_tsquery("english", title)
+    @traced
+    async def get_by_title(
+        self,
+        title: str,
+        include_akas: bool = True,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+    ) -> Page[Row]:
+        query, exact, matches = self._top_k_search(normalize_text(title), include_akas)
+        page = await paginate_ranked(
+            self.session, query, exact, Movie.search_rank, limit, cursor, matches
+        )
+
+        # An empty page after a cursor is the end of the results, not a miss
+        if not page.items and not cursor:
+            raise HTTPException(status_code=404, detail=f"Movie '{title}' not found")
+
+        return page
 
-        exact_match = case(
-            (func.lower(Movie.primary_title) == func.lower(title), 0),
-            else_=1,
+    @traced
+    async def stream_by_title(
+        self, title: str, include_akas: bool = True
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Every match in search order, read from a server-side cursor in batches"""
+        query, keys = ranked(*self._search(title, include_akas), Movie.search_rank)
+        query = query.order_by(*(key.order_by() for key in keys)).execution_options(
+            yield_per=STREAM_BATCH_SIZE
         )
 
-        query = (
-            select(Movie)
-            .where(Movie.search_vector.op("@@")(ts_query))
-            .order_by(
-                exact_match.asc(),
-                func.length(Movie.primary_title).asc(),
+        result = await self.session.stream(query)
+        found = False
+        async for rows in result.partitions():
+            found = True
+            yield rows
+
+        if not found:
+            raise HTTPException(status_code=404, detail=f"Movie '{title}' not found")
+
+    @traced
+    async def warm_up(self):
+        """Prepare the first page and estimate statements of the searches on the connection"""
+        for include_akas in (True, False):
+            query, exact, matches = self._top_k_search(WARM_UP_TERM, include_akas)
+            await paginate_ranked(
+                self.session, query, exact, Movie.search_rank, DEFAULT_LIMIT, matches=matches
+            )
+            query, _ = self._search(WARM_UP_TERM, include_akas)
+            await estimate_count(self.session, query)
+
+    @traced
+    async def estimate_by_title(self, title: str, include_akas: bool = True) -> int:
+        query, _ = self._search(title, include_akas)
+        return await estimate_count(self.session, query)
+
+    @traced
+    async def search_batch(
+        self, titles: list[str], limits: list[int], include_akas: bool = True
+    ) -> list[list[Row]]:
+        """Top matches of every title, in the order of the titles"""
+        return await search_batch(
+            self.session,
+            lambda term: self._top_k_search(term, include_akas),
+            Movie.search_rank,
+            [normalize_text(title) for title in titles],
+            limits,
+        )
+
+    def _search(self, title: str, include_akas: bool) -> tuple[Select, ColumnElement]:
+        return self._search_term(normalize_text(title), include_akas)
+
+    def _search_term(
+        self, normalized_title: str | ColumnElement, include_akas: bool
+    ) -> tuple[Select, ColumnElement]:
+        """
+        Matches of a normalized title, either a value or a column of a batch of
+        titles, and the condition of the exact matches
+        """
+        search_filter = self._title_match(normalized_title)
+        if include_akas:
+            # Each branch uses its own GIN index and UNION keeps one row per title
+            matches = (
+                select(Movie.tconst)
+                .where(search_filter)
+                .correlate_except(Movie)
+                .union(
+                    select(MovieAka.tconst)
+                    .where(self._aka_match(normalized_title))
+                    .correlate_except(MovieAka)
+                )
             )
+            search_filter = Movie.tconst.in_(matches)
+
+        # The rank orders the other matches by votes and then title length
+        query = select(*MOVIE_COLUMNS, Movie.search_rank).where(search_filter)
+        return query, Movie.primary_title_normalized == normalized_title
+
+    def _top_k_search(
+        self, normalized_title: str | ColumnElement, include_akas: bool
+    ) -> tuple[Select, ColumnElement, list[ColumnElement]]:
+        """
+        The search as read by the first pages: the unfiltered query, the
+        condition of the exact matches and the conditions of the matches
+
+        The matching set of _search_term is built from both GIN indexes
+        whatever the page size, so the top K reads each condition in rank
+        order instead. The akas are probed for each movie read, through the
+        primary key of movie_akas.
+        """
+        matches = [self._title_match(normalized_title)]
+        if include_akas:
+            matches.append(
+                select(MovieAka.tconst)
+                .where(MovieAka.tconst == Movie.tconst, self._aka_match(normalized_title))
+                .correlate_except(MovieAka)
+                .exists()
+            )
+
+        query = select(*MOVIE_COLUMNS, Movie.search_rank)
+        return query, Movie.primary_title_normalized == normalized_title, matches
+
+    @staticmethod
+    def _title_match(normalized_title: str | ColumnElement) -> ColumnElement:
+        ts_query = func.websearch_to_tsquery("english", normalized_title)
+        return Movie.search_vector.op("@@")(ts_query)
+
+    @staticmethod
+    def _aka_match(normalized_title: str | ColumnElement) -> ColumnElement:
+        # The localized titles are in many languages, so they are not stemmed
+        ts_query = func.websearch_to_tsquery("simple", normalized_title)
+        return MovieAka.search_vector.op("@@")(ts_query)
+
+    @traced
+    async def get_by_ids(self, tconsts: list[str]) -> Sequence[Row]:
+        """Movies of the IDs that exist, with one primary key probe per ID"""
+        # = ANY of an array keeps a single prepared statement whatever the number of IDs
+        query = select(*MOVIE_COLUMNS).where(
+            Movie.tconst == any_(bindparam("tconsts", tconsts, type_=ARRAY(String)))
         )
 
         result = await self.session.execute(query)
-        movies = result.scalars().all()
+        return result.all()
 
-        if not movies:
-            raise HTTPException(status_code=404, detail=f"Movie '{title}' not found")
+    @traced
+    async def get_top_rated(self, limit: int, min_votes: int) -> Sequence[Row]:
+        # The literal threshold lets the planner use the partial covering index
+        # even when the statement is prepared with generic parameters
+        query = (
+            select(*MOVIE_COLUMNS)
+            .where(Movie.num_votes >= literal_column(str(TOP_RATED_MIN_VOTES)))
+            .where(Movie.num_votes >= min_votes)
+            .order_by(Movie.average_rating.desc(), Movie.num_votes.desc())
+            .limit(limit)
+        )
 
-        return movies
+        result = await self.session.execute(query)
+        return result.all()
+
+    @traced
+    async def stream_episodes(self, tconst: str) -> AsyncIterator[Sequence[Row]]:
+        parent_id = int(tconst[2:])
+        if parent_id > MAX_PARENT_ID:
+            raise HTTPException(status_code=404, detail=f"Episodes of '{tconst}' not found")
+
+        episode_tconst = tconst_from_id(Episode.episode_id)
+
+        # Served by one range scan of idx_episodes_parent, which the table is clustered on
+        query = (
+            select(
+                episode_tconst.label("tconst"),
+                Movie.primary_title,
+                Episode.season_number,
+                Episode.episode_number,
+            )
+            .join(Movie, Movie.tconst == episode_tconst)
+            .where(Episode.parent_id == parent_id)
+            .order_by(Episode.season_number, Episode.episode_number)
+            .execution_options(yield_per=EPISODES_BATCH_SIZE)
+        )
+
+        result = await self.session.stream(query)
+        found = False
+        async for rows in result.partitions():
+            found = True
+            yield rows
+
+        if not found:
+            raise HTTPException(
+                status_code=404, detail=f"Episodes of '{tconst}' not found"
+            )
@@ -1,11 +1,30 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
+from typing import Annotated, Optional
 
 from src.movies.service import MovieService
-from src.movies.repository import MovieRepository
-from src.movies.schemas import MovieBase
+from src.movies.repository import MovieRepository, TOP_RATED_MIN_VOTES
+from src.movies.schemas import EpisodeBase, MovieBase, MovieBatchResult, MovieBatchSearch
 from core.database import get_session
+from core.batch import split_ids
+from core.cache import (
+    EntityCache,
+    ResultCache,
+    get_movie_cache,
+    get_search_cache,
+)
+from core.conditional import cache_headers, entity_tag, not_modified
+from core.normalization import normalize_text
+from core.pagination import DEFAULT_LIMIT, MAX_LIMIT
+from core.serialization import dump_json, join_json_array
+from core.streaming import (
+    NDJSON_MEDIA_TYPE,
+    accepts_ndjson,
+    prefetch,
+    stream_json_array,
+    stream_ndjson,
+)
 from core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -23,12 +42,126 @@ async def search_movie(
     title: Annotated[
         str, Query(min_length=1, description="Title of the movie to search")
     ],
+    request: Request,
+    akas: Annotated[
+        bool, Query(description="Also search the localized titles of the movies")
+    ] = True,
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_LIMIT, description="Number of movies to return")
+    ] = DEFAULT_LIMIT,
+    cursor: Annotated[
+        Optional[str], Query(description="X-Next-Cursor header of the previous page")
+    ] = None,
     service: MovieService = Depends(get_movie_service),
+    cache: ResultCache = Depends(get_search_cache),
 ) -> list[MovieBase]:
     """Search Movie by title"""
     try:
-        movies = await service.get_movie_by_title(title)
-        return movies
+        if accepts_ndjson(request):
+            batches = await prefetch(service.stream_movies_by_title(title, akas))
+            return StreamingResponse(stream_ndjson(batches), media_type=NDJSON_MEDIA_TYPE)
+
+        key = cache.key("movies", normalize_text(title), akas, limit, cursor)
+        etag = entity_tag(cache.version, key)
+        if (response := not_modified(request, etag)) is not None:
+            return response
+
+        cached = cache.get(key)
+        if cached is None:
+            cached = cache.set(key, await service.search_movies(title, akas, limit, cursor))
+        response = cached.to_response()
+        response.headers.update(cache_headers(etag))
+        return response
     except Exception as e:
         logger.error(f"Error searching movie by title '{title}': {e}")
         raise
+
+
+@router.post("/search:batch")
+async def search_movies_batch(
+    batch: MovieBatchSearch,
+    service: MovieService = Depends(get_movie_service),
+) -> list[MovieBatchResult]:
+    """Search many titles in one request, the results grouped by title"""
+    try:
+        results = await service.search_movies_batch(batch.queries, batch.akas)
+        return Response(dump_json(results), media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error searching a batch of {len(batch.queries)} titles: {e}")
+        raise
+
+
+@router.get("/top")
+async def top_rated_movies(
+    limit: Annotated[
+        int, Query(ge=1, le=1000, description="Number of movies to return")
+    ] = 10,
+    min_votes: Annotated[
+        int,
+        Query(ge=TOP_RATED_MIN_VOTES, description="Minimum number of votes of a movie"),
+    ] = TOP_RATED_MIN_VOTES,
+    service: MovieService = Depends(get_movie_service),
+) -> list[MovieBase]:
+    """Top rated movies"""
+    try:
+        movies = await service.get_top_rated_movies(limit, min_votes)
+        return Response(dump_json(movies), media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error getting top rated movies: {e}")
+        raise
+
+
+@router.get("/{tconst}/episodes", response_model=list[EpisodeBase])
+async def list_episodes(
+    tconst: Annotated[
+        str, Path(pattern=r"^tt\d+$", description="IMDb ID of the series")
+    ],
+    service: MovieService = Depends(get_movie_service),
+) -> StreamingResponse:
+    """Episodes of a series ordered by season and episode"""
+    try:
+        batches = await prefetch(service.stream_episodes(tconst))
+        return StreamingResponse(
+            stream_json_array(batches), media_type="application/json"
+        )
+    except Exception as e:
+        logger.error(f"Error listing episodes of '{tconst}': {e}")
+        raise
+
+
+@router.get("")
+async def get_movies(
+    ids: Annotated[
+        str,
+        Query(
+            pattern=r"^tt\d+(,tt\d+)*$",
+            description="Comma separated IMDb IDs of the movies",
+        ),
+    ],
+    service: MovieService = Depends(get_movie_service),
+    cache: EntityCache = Depends(get_movie_cache),
+) -> list[MovieBase]:
+    """Movies by IMDb ID, in the order of the IDs, leaving out the ones that do not exist"""
+    try:
+        movies = await service.get_movies(split_ids(ids), cache)
+        return Response(join_json_array(movies), media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error getting movies '{ids}': {e}")
+        raise
+
+
+@router.get("/{tconst}")
+async def get_movie(
+    tconst: Annotated[
+        str, Path(pattern=r"^tt\d+$", description="IMDb ID of the movie")
+    ],
+    service: MovieService = Depends(get_movie_service),
+    cache: EntityCache = Depends(get_movie_cache),
+) -> MovieBase:
+    """Movie by IMDb ID"""
+    try:
+        movie = await service.get_movie(tconst, cache)
+        return Response(movie, media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error getting movie '{tconst}': {e}")
+        raise
@@ -1,5 +1,7 @@
 from typing import Optional
 from pydantic import BaseModel, ConfigDict, Field
+from core.batch import MAX_BATCH_LIMIT, MAX_BATCH_QUERIES
+from core.pagination import DEFAULT_LIMIT
 
 
 class MovieBase(BaseModel):
@@ -9,3 +11,34 @@ class MovieBase(BaseModel):
     primary_title: str = Field(...)
     original_title: Optional[str] = Field(None)
     genres: Optional[str] = Field(None)
+    average_rating: Optional[float] = Field(None)
+    num_votes: Optional[int] = Field(None)
+
+
+class EpisodeBase(BaseModel):
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+    tconst: str
+    primary_title: str = Field(...)
+    season_number: Optional[int] = Field(None)
+    episode_number: Optional[int] = Field(None)
+
+
+class MovieQuery(BaseModel):
+    title: str = Field(..., min_length=1)
+    limit: int = Field(DEFAULT_LIMIT, ge=1, le=MAX_BATCH_LIMIT)
+
+
+class MovieBatchSearch(BaseModel):
+    queries: list[MovieQuery] = Field(..., min_length=1, max_length=MAX_BATCH_QUERIES)
+    akas: bool = Field(True)
+
+
+class MovieBatchResult(BaseModel):
+    title: str
+    results: list[MovieBase]
+
+
+# Columns selected for the responses, in the order of the schemas
+MOVIE_FIELDS = tuple(MovieBase.model_fields)
+EPISODE_FIELDS = tuple(EpisodeBase.model_fields)
@@ -1,5 +1,14 @@
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException
+from core.cache import CachedResponse, EntityCache, ResultCache
+from core.loader import movie_loader
+from core.normalization import normalize_text
+from core.pagination import DEFAULT_LIMIT, Page, page_headers
+from core.serialization import dump_json, row_dicts
+from core.singleflight import search_flights
+from core.tracing import traced
 from src.movies.repository import MovieRepository
-from src.movies.schemas import MovieBase
+from src.movies.schemas import EPISODE_FIELDS, MOVIE_FIELDS, MovieQuery
 
 
 class MovieService:
@@ -7,6 +16,94 @@ class MovieService:
     def __init__(self, repository: MovieRepository):
         self.repository = repository
 
-    async def get_movie_by_title(self, movie_title: str) -> list[MovieBase]:
-        movies = await self.repository.get_by_title(movie_title)
-        return [MovieBase.model_validate(movie) for movie in movies]
+    @traced
+    async def search_movies(
+        self,
+        movie_title: str,
+        include_akas: bool = True,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+    ) -> CachedResponse:
+        """Serialized page of a search, run once for the identical concurrent searches"""
+        key = ResultCache.key("movies", normalize_text(movie_title), include_akas, limit, cursor)
+
+        async def search() -> CachedResponse:
+            page = await self.get_movie_by_title(movie_title, include_akas, limit, cursor)
+            return CachedResponse(dump_json(page.items), page_headers(page))
+
+        return await search_flights.do(key, search)
+
+    @traced
+    async def get_movie_by_title(
+        self,
+        movie_title: str,
+        include_akas: bool = True,
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+    ) -> Page[dict]:
+        page = await self.repository.get_by_title(movie_title, include_akas, limit, cursor)
+
+        # The planner estimate is only needed when the first page is not everything
+        estimated_total = None
+        if cursor is None:
+            estimated_total = len(page.items)
+            if page.next_cursor:
+                estimated_total = await self.repository.estimate_by_title(
+                    movie_title, include_akas
+                )
+
+        return Page(row_dicts(page.items, MOVIE_FIELDS), page.next_cursor, estimated_total)
+
+    @traced
+    async def stream_movies_by_title(
+        self, movie_title: str, include_akas: bool = True
+    ) -> AsyncIterator[list[dict]]:
+        async for rows in self.repository.stream_by_title(movie_title, include_akas):
+            yield row_dicts(rows, MOVIE_FIELDS)
+
+    @traced
+    async def search_movies_batch(
+        self, queries: list[MovieQuery], include_akas: bool = True
+    ) -> list[dict]:
+        groups = await self.repository.search_batch(
+            [query.title for query in queries],
+            [query.limit for query in queries],
+            include_akas,
+        )
+        return [
+            {"title": query.title, "results": row_dicts(rows, MOVIE_FIELDS)}
+            for query, rows in zip(queries, groups)
+        ]
+
+    @traced
+    async def get_top_rated_movies(self, limit: int, min_votes: int) -> list[dict]:
+        rows = await self.repository.get_top_rated(limit, min_votes)
+        return row_dicts(rows, MOVIE_FIELDS)
+
+    @traced
+    async def stream_episodes(self, tconst: str) -> AsyncIterator[list[dict]]:
+        async for rows in self.repository.stream_episodes(tconst):
+            yield row_dicts(rows, EPISODE_FIELDS)
+
+    @traced
+    async def get_movie(self, tconst: str, cache: EntityCache) -> bytes:
+        movies = await self.get_movies([tconst], cache)
+        if not movies:
+            raise HTTPException(status_code=404, detail=f"Movie '{tconst}' not found")
+        return movies[0]
+
+    @traced
+    async def get_movies(self, tconsts: list[str], cache: EntityCache) -> list[bytes]:
+        """Serialized movies in the order of the IDs, the ones that do not exist left out"""
+        movies = await cache.get_many(
+            tconsts, lambda missing: movie_loader.load_many(missing, self._load_movies)
+        )
+        return [movies[tconst] for tconst in tconsts if tconst in movies]
+
+    @traced
+    async def _load_movies(self, tconsts: list[str]) -> dict[str, bytes]:
+        rows = await self.repository.get_by_ids(tconsts)
+        return {
+            movie["tconst"]: dump_json(movie)
+            for movie in row_dicts(rows, MOVIE_FIELDS)
+        }
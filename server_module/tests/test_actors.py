@@ -1,8 +1,14 @@
+from collections import namedtuple
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, MagicMock
 from fastapi import HTTPException
 from src.actors.repository import ActorRepository
-from src.actors.models import Actor
+from src.actors.service import ActorService
+from src.actors.schemas import ACTOR_FIELDS
+
+ActorRow = namedtuple(
+    "ActorRow", ACTOR_FIELDS + ("search_rank", "exact_match"), defaults=(None,) * 5 + (1,)
+)
 
 
 class TestActorRepository(IsolatedAsyncioTestCase):
@@ -14,31 +20,27 @@ class TestActorRepository(IsolatedAsyncioTestCase):
     
     async def test_get_by_name_returns_actors(self):
         """Test successful actor search returns list of actors."""
-        mock_actor1 = Actor(
-            nconst=1,
+        mock_actor1 = ActorRow(
+            nconst="nm0000158",
             primary_name="Tom Hanks",
             birth_year=1956,
             primary_profession="actor,producer"
         )
         
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = [mock_actor1]
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = [mock_actor1]
         self.mock_session.execute.return_value = mock_result
         
         result = await self.actor_repository.get_by_name("Tom")
         
-        self.assertEqual(len(result), 1)
-        self.assertEqual(result[0].primary_name, "Tom Hanks")
+        self.assertEqual(len(result.items), 1)
+        self.assertEqual(result.items[0].primary_name, "Tom Hanks")
         self.mock_session.execute.assert_called_once()
     
     async def test_get_by_name_not_found_raises_404(self):
         """Test that non-existent actor raises HTTPException 404."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = []
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = []
         self.mock_session.execute.return_value = mock_result
         
         with self.assertRaises(HTTPException) as context:
@@ -46,3 +48,86 @@ class TestActorRepository(IsolatedAsyncioTestCase):
         
         self.assertEqual(context.exception.status_code, 404)
         self.assertIn("not found", context.exception.detail.lower())
+
+    async def test_get_by_name_compares_normalized_name(self):
+        """Test the search folds accents and case and ranks on the precomputed column."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            ActorRow(nconst="nm0004851", primary_name="Penélope Cruz")
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        await self.actor_repository.get_by_name("Penélope Cruz")
+
+        query = self.mock_session.execute.call_args[0][0].compile()
+        self.assertIn("actors.primary_name_normalized = ", str(query))
+        self.assertIn("penelope cruz", query.params.values())
+        self.assertNotIn("lower(", str(query))
+
+    async def test_get_by_name_reads_top_k_by_search_rank(self):
+        """Test exact and other matches are each read in rank order and limited."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            ActorRow(nconst="nm0000158", primary_name="Tom Hanks", search_rank=7)
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        await self.actor_repository.get_by_name("Tom Hanks")
+
+        query = str(self.mock_session.execute.call_args[0][0].compile())
+        self.assertIn("UNION ALL", query)
+        self.assertEqual(query.count("ORDER BY actors.search_rank\n LIMIT"), 2)
+        self.assertNotIn("length(", query)
+
+    async def test_get_known_for_uses_single_query(self):
+        """Test the titles of all the actors are fetched with one query."""
+        forrest_gump = ["tt0109830", "Forrest Gump", None, None, None, None]
+        inception = ["tt1375666", "Inception", None, None, None, None]
+
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            ("nm0000158", *forrest_gump),
+            ("nm0000138", *inception),
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        result = await self.actor_repository.get_known_for(
+            ["nm0000158", "nm0000138", "nm0000001"]
+        )
+
+        self.assertEqual(
+            result,
+            {"nm0000158": [forrest_gump], "nm0000138": [inception], "nm0000001": []},
+        )
+        self.mock_session.execute.assert_called_once()
+        query = str(self.mock_session.execute.call_args[0][0].compile())
+        self.assertIn("JOIN movies ON movies.tconst = actor_titles.tconst", query)
+        self.assertIn("actor_titles.nconst IN", query)
+
+    async def test_get_titles_not_found_raises_404(self):
+        """Test an actor without titles raises HTTPException 404."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = []
+        self.mock_session.execute.return_value = mock_result
+
+        with self.assertRaises(HTTPException) as context:
+            await ActorService(self.actor_repository).get_actor_titles("nm0000001")
+
+        self.assertEqual(context.exception.status_code, 404)
+
+    async def test_search_batch_uses_one_lateral_query(self):
+        """Test a batch of names is searched with one statement and grouped by name."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            MagicMock(nconst="nm0000158", position=2),
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        groups = await self.actor_repository.search_batch(["Nobody", "Tom Hanks"], [1, 1])
+
+        self.assertEqual([[row.nconst for row in rows] for rows in groups], [[], ["nm0000158"]])
+        self.mock_session.execute.assert_called_once()
+        query = str(self.mock_session.execute.call_args[0][0].compile())
+        self.assertIn("unnest(", query)
+        self.assertIn("JOIN LATERAL", query)
+        self.assertIn("actors.search_vector @@ websearch_to_tsquery(", query)
@@ -0,0 +1,67 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+from fastapi import HTTPException
+from sqlalchemy.exc import DBAPIError
+from core.admission import AdmissionController
+
+
+class TestAdmissionController(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """Setup before each test."""
+        self.admission = AdmissionController(
+            max_concurrent=1, max_queue=1, queue_timeout=0.05, retry_after=2
+        )
+
+    async def test_queued_request_runs_after_release(self):
+        """Test a request over the limit waits in the queue until a slot is released."""
+        await self.admission.acquire()
+        waiting = asyncio.create_task(self.admission.acquire())
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.admission.stats()["queue_depth"], 1)
+        self.admission.release()
+        await waiting
+
+        stats = self.admission.stats()
+        self.assertEqual(stats["active"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["admitted"], 2)
+
+    async def test_full_queue_rejects_with_retry_after(self):
+        """Test a request is rejected right away with 503 when the queue is full."""
+        await self.admission.acquire()
+        waiting = asyncio.create_task(self.admission.acquire())
+        await asyncio.sleep(0)
+
+        with self.assertRaises(HTTPException) as context:
+            await self.admission.acquire()
+
+        self.assertEqual(context.exception.status_code, 503)
+        self.assertEqual(context.exception.headers, {"Retry-After": "2"})
+        self.assertEqual(self.admission.stats()["rejected"], 1)
+        self.admission.release()
+        await waiting
+
+    async def test_queue_timeout_rejects(self):
+        """Test a request waiting longer than the queue timeout gets a 503."""
+        await self.admission.acquire()
+
+        with self.assertRaises(HTTPException) as context:
+            await self.admission.acquire()
+
+        self.assertEqual(context.exception.status_code, 503)
+        stats = self.admission.stats()
+        self.assertEqual(stats["queue_timeouts"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["active"], 1)
+
+    def test_statement_timeout_is_overloaded(self):
+        """Test only statements cancelled by statement_timeout become a 503."""
+        cancelled = DBAPIError("SELECT 1", {}, MagicMock(sqlstate="57014"))
+        failed = DBAPIError("SELECT 1", {}, MagicMock(sqlstate="42P01"))
+
+        self.assertEqual(self.admission.statement_timeout(cancelled).status_code, 503)
+        self.assertIsNone(self.admission.statement_timeout(failed))
+        self.assertEqual(self.admission.stats()["statement_timeouts"], 1)
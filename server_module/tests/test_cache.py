@@ -0,0 +1,143 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.exc import ProgrammingError
+from core.cache import (
+    ENTRY_OVERHEAD_BYTES,
+    CachedResponse,
+    DatasetVersion,
+    EntityCache,
+    ResultCache,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestResultCache(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """Setup before each test."""
+        self.clock = FakeClock()
+        entry_size = 100 + ENTRY_OVERHEAD_BYTES + 1
+        self.cache = ResultCache(max_bytes=2 * entry_size, ttl=60, clock=self.clock)
+
+    def test_get_returns_cached_bytes(self):
+        """Test a stored response is returned with its headers."""
+        self.cache.set("a", CachedResponse(b"x" * 100, {"X-Next-Cursor": "c"}))
+
+        entry = self.cache.get("a")
+
+        self.assertEqual(entry.body, b"x" * 100)
+        self.assertEqual(entry.to_response().headers["X-Next-Cursor"], "c")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_evicts_least_recently_used_over_budget(self):
+        """Test the least recently used entry is evicted when the byte budget is exceeded."""
+        self.cache.set("a", CachedResponse(b"x" * 100))
+        self.cache.set("b", CachedResponse(b"x" * 100))
+        self.cache.get("a")
+        self.cache.set("c", CachedResponse(b"x" * 100))
+
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+        self.assertLessEqual(self.cache.stats()["bytes"], self.cache.max_bytes)
+
+    def test_expires_after_ttl(self):
+        """Test entries are not returned after their TTL."""
+        self.cache.set("a", CachedResponse(b"x"))
+        self.clock.now = 61
+
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+        self.assertEqual(self.cache.stats()["bytes"], 0)
+
+    def test_version_change_clears_cache(self):
+        """Test a new dataset version drops every entry."""
+        self.cache.set_version("v1")
+        self.cache.set("a", CachedResponse(b"x"))
+        self.cache.set_version("v1")
+        self.assertEqual(len(self.cache), 1)
+
+        self.cache.set_version("v2")
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats()["dataset_version"], "v2")
+
+    def test_hit_ratio(self):
+        """Test the hit ratio counts hits over lookups."""
+        self.cache.set("a", CachedResponse(b"x"))
+        self.cache.get("a")
+        self.cache.get("a")
+        self.cache.get("b")
+
+        self.assertAlmostEqual(self.cache.stats()["hit_ratio"], 2 / 3)
+
+    async def test_dataset_version_is_read_once_per_interval(self):
+        """Test the version table is not queried again within the check interval."""
+        clock = FakeClock()
+        version = DatasetVersion(check_interval=30, clock=clock)
+        session = AsyncMock()
+        session.execute.return_value = MagicMock(scalar_one_or_none=MagicMock(return_value="v1"))
+
+        self.assertEqual(await version.get(session), "v1")
+        self.assertEqual(await version.get(session), "v1")
+        clock.now = 31
+        await version.get(session)
+
+        self.assertEqual(session.execute.call_count, 2)
+
+    async def test_dataset_version_missing_table(self):
+        """Test a database without the version table has no version."""
+        version = DatasetVersion(check_interval=30)
+        session = AsyncMock()
+        session.execute.side_effect = ProgrammingError("SELECT", {}, Exception("no table"))
+
+        self.assertIsNone(await version.get(session))
+        session.rollback.assert_awaited_once()
+
+
+class TestEntityCache(IsolatedAsyncioTestCase):
+
+    async def test_get_many_loads_only_misses(self):
+        """Test cached entities are not loaded again and misses are loaded in one call."""
+        cache = EntityCache(max_entries=10)
+        load = AsyncMock(side_effect=lambda ids: {i: i.encode() for i in ids if i != "tt0"})
+
+        await cache.get_many(["tt1", "tt2"], load)
+        result = await cache.get_many(["tt1", "tt3", "tt0"], load)
+
+        self.assertEqual(result, {"tt1": b"tt1", "tt3": b"tt3"})
+        self.assertEqual(load.await_count, 2)
+        load.assert_awaited_with(["tt3", "tt0"])
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    async def test_evicts_least_recently_used(self):
+        """Test the number of entities is bounded, the least recently used evicted first."""
+        cache = EntityCache(max_entries=2)
+        load = AsyncMock(side_effect=lambda ids: {i: i.encode() for i in ids})
+
+        await cache.get_many(["a", "b"], load)
+        await cache.get_many(["a"], load)
+        await cache.get_many(["c"], load)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        await cache.get_many(["a", "b"], load)
+        load.assert_awaited_with(["b"])
+
+    async def test_version_change_clears_entities(self):
+        """Test a new dataset version drops the cached entities."""
+        cache = EntityCache(max_entries=10)
+        load = AsyncMock(side_effect=lambda ids: {i: i.encode() for i in ids})
+        cache.set_version("v1")
+        await cache.get_many(["a"], load)
+
+        cache.set_version("v2")
+
+        self.assertEqual(len(cache), 0)
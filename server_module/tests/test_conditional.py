@@ -0,0 +1,73 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock
+from core.cache import CachedResponse, ResultCache
+from core.conditional import cache_headers, entity_tag, not_modified
+from src.movies.routes import search_movie
+
+
+def make_request(if_none_match: str = "") -> MagicMock:
+    request = MagicMock()
+    request.headers = {"accept": "application/json", "if-none-match": if_none_match}
+    return request
+
+
+class TestConditional(IsolatedAsyncioTestCase):
+
+    def test_entity_tag(self):
+        """Test the ETag changes with the dataset version and the request."""
+        etag = entity_tag("v1", "movies\x1fmatrix")
+
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(etag, entity_tag("v1", "movies\x1fmatrix"))
+        self.assertNotEqual(etag, entity_tag("v2", "movies\x1fmatrix"))
+        self.assertNotEqual(etag, entity_tag("v1", "movies\x1fshrek"))
+        self.assertIsNone(entity_tag(None, "movies\x1fmatrix"))
+
+    def test_cache_headers(self):
+        """Test responses without a dataset version are not cached by clients."""
+        self.assertEqual(cache_headers(None), {"Cache-Control": "no-cache"})
+
+        headers = cache_headers('W/"abc"')
+        self.assertEqual(headers["ETag"], 'W/"abc"')
+        self.assertIn("max-age=", headers["Cache-Control"])
+
+    def test_not_modified(self):
+        """Test If-None-Match is compared weakly and accepts lists and *."""
+        etag = 'W/"abc"'
+        for if_none_match, expected in [
+            ('W/"abc"', True),
+            ('"abc"', True),
+            ('"xyz", W/"abc"', True),
+            ("*", True),
+            ('W/"xyz"', False),
+            ("", False),
+        ]:
+            response = not_modified(make_request(if_none_match), etag)
+            self.assertEqual(response is not None, expected, if_none_match)
+
+        self.assertEqual(not_modified(make_request('W/"abc"'), etag).status_code, 304)
+        self.assertIsNone(not_modified(make_request("*"), None))
+
+    async def test_search_revalidation_skips_query(self):
+        """Test a matching If-None-Match is answered with 304 without searching."""
+        cache = ResultCache(max_bytes=1024 * 1024, ttl=60)
+        cache.set_version("v1")
+        service = AsyncMock()
+        service.search_movies.return_value = CachedResponse(
+            b'[{"tconst":"tt0133093","primary_title":"The Matrix"}]'
+        )
+
+        response = await search_movie(
+            "Matrix", make_request(), True, 10, None, service, cache
+        )
+        etag = response.headers["ETag"]
+        self.assertEqual(response.status_code, 200)
+
+        cache.clear()
+        response = await search_movie(
+            "Matrix", make_request(etag), True, 10, None, service, cache
+        )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        service.search_movies.assert_awaited_once()
@@ -0,0 +1,121 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+from core.database import (
+    STATEMENT_TIMEOUT_MS,
+    PoolStats,
+    _set_statement_timeout,
+    max_workers,
+    statement_timeout_ms,
+    warm_up_pool,
+    worker_pool_size,
+)
+from src.movies.repository import MovieRepository
+
+
+class TestDatabase(IsolatedAsyncioTestCase):
+
+    def test_pool_stats(self):
+        """Test the average and maximum checkout wait times."""
+        stats = PoolStats()
+        stats.record(0.01)
+        stats.record(0.03)
+
+        result = stats.as_dict()
+
+        self.assertEqual(result["checkouts"], 2)
+        self.assertAlmostEqual(result["wait_seconds_avg"], 0.02)
+        self.assertAlmostEqual(result["wait_seconds_max"], 0.03)
+
+    def test_worker_pool_keeps_sizes_within_budget(self):
+        """Test the configured pool is kept when every worker fits in the budget."""
+        self.assertEqual(worker_pool_size(4, 80, 10, 5, reserved=1), (10, 5))
+
+    def test_worker_pool_cuts_overflow_then_size(self):
+        """Test the overflow is cut before the pool when the workers do not fit."""
+        self.assertEqual(worker_pool_size(8, 80, 10, 5, reserved=1), (9, 0))
+        self.assertEqual(worker_pool_size(16, 80, 10, 5), (5, 0))
+        self.assertEqual(worker_pool_size(6, 80, 10, 5), (10, 3))
+
+    def test_worker_pool_too_many_workers(self):
+        """Test more workers than the budget allows is refused."""
+        with self.assertRaises(ValueError):
+            worker_pool_size(80, 80, 10, 5, reserved=1)
+
+    def test_max_workers_fit_budget(self):
+        """Test the most workers that still get a pooled connection each."""
+        self.assertEqual(max_workers(80, reserved=1), 40)
+        self.assertEqual(max_workers(80), 80)
+        workers = max_workers(80, reserved=1)
+        self.assertEqual(worker_pool_size(workers, 80, 10, 5, reserved=1), (1, 0))
+
+    def test_statement_timeout_of_route(self):
+        """Test routes use their own timeout and the others the default."""
+        search = MagicMock(scope={"route": MagicMock(path="/movies/search")})
+        top = MagicMock(scope={"route": MagicMock(path="/movies/top")})
+
+        self.assertEqual(statement_timeout_ms(search), 3000)
+        self.assertEqual(statement_timeout_ms(top), 5000)
+
+    def test_search_timeout_is_connection_default(self):
+        """Test the searches run under the timeout of the connection, without set_config."""
+        connection = MagicMock()
+
+        for path in ("/actors/search", "/movies/search"):
+            request = MagicMock(scope={"route": MagicMock(path=path)})
+            session = MagicMock(info={STATEMENT_TIMEOUT_MS: statement_timeout_ms(request)})
+            _set_statement_timeout(session, None, connection)
+
+        connection.execute.assert_not_called()
+
+    def test_statement_timeout_set_only_when_not_default(self):
+        """Test the transaction only runs set_config for timeouts other than the default."""
+        connection = MagicMock()
+
+        _set_statement_timeout(MagicMock(info={STATEMENT_TIMEOUT_MS: 3000}), None, connection)
+        connection.execute.assert_not_called()
+
+        _set_statement_timeout(MagicMock(info={STATEMENT_TIMEOUT_MS: 5000}), None, connection)
+        statement, params = connection.execute.call_args[0]
+        self.assertIn("set_config('statement_timeout'", str(statement))
+        self.assertEqual(params, {"timeout": "5000"})
+
+    async def test_warm_up_checks_out_every_connection(self):
+        """Test every connection is open before the statements run on each of them."""
+        sessions = [AsyncMock() for _ in range(3)]
+        warm_up = AsyncMock()
+
+        with patch("core.database.async_session", side_effect=sessions):
+            await warm_up_pool(3, warm_up)
+
+        for session in sessions:
+            session.connection.assert_awaited_once()
+            warm_up.assert_any_await(session)
+            session.close.assert_awaited_once()
+
+    async def test_warm_up_failure_is_logged(self):
+        """Test the API starts when the database is not reachable."""
+        session = AsyncMock()
+        session.connection.side_effect = ConnectionRefusedError()
+        warm_up = AsyncMock()
+
+        with patch("core.database.async_session", return_value=session), \
+             self.assertLogs("core.database", level="WARNING"):
+            await warm_up_pool(1, warm_up)
+
+        warm_up.assert_not_awaited()
+        session.close.assert_awaited_once()
+
+    async def test_repository_warm_up_prepares_searches(self):
+        """Test the warm up runs the page and estimate statements of both searches."""
+        session = AsyncMock()
+        session.execute.return_value = MagicMock(
+            all=MagicMock(return_value=[]),
+            scalar=MagicMock(return_value=[{"Plan": {"Plan Rows": 1}}]),
+        )
+
+        await MovieRepository(session).warm_up()
+
+        statements = [str(call[0][0].compile()) for call in session.execute.call_args_list]
+        self.assertEqual(len(statements), 4)
+        self.assertEqual(sum("movie_akas" in statement for statement in statements), 2)
+        self.assertEqual(sum(statement.startswith("EXPLAIN") for statement in statements), 2)
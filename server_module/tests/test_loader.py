@@ -0,0 +1,86 @@
+import asyncio
+from collections import namedtuple
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+from core.cache import EntityCache
+from core.loader import BatchLoader
+from src.movies.schemas import MOVIE_FIELDS
+from src.movies.service import MovieService
+
+MovieRow = namedtuple("MovieRow", MOVIE_FIELDS, defaults=(None,) * 5)
+
+
+class TestBatchLoader(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """Setup before each test."""
+        self.loader = BatchLoader(window=0.01, max_ids=3)
+        self.loads = []
+
+    async def _load(self, ids):
+        self.loads.append(ids)
+        return {id_: id_.upper() for id_ in ids if id_ != "missing"}
+
+    async def test_concurrent_lookups_share_one_load(self):
+        """Test lookups within the window are loaded with one call and get their own IDs."""
+        results = await asyncio.gather(
+            self.loader.load_many(["a", "b"], self._load),
+            self.loader.load_many(["b"], self._load),
+            self.loader.load_many(["missing"], self._load),
+        )
+
+        self.assertEqual(self.loads, [["a", "b", "missing"]])
+        self.assertEqual(results, [{"a": "A", "b": "B"}, {"b": "B"}, {}])
+        self.assertEqual(self.loader.stats()["lookups_per_batch"], 3)
+
+    async def test_full_batch_starts_a_new_one(self):
+        """Test a lookup that would go over max_ids opens its own batch."""
+        await asyncio.gather(
+            self.loader.load_many(["a", "b"], self._load),
+            self.loader.load_many(["c", "d"], self._load),
+        )
+
+        self.assertEqual(sorted(self.loads), [["a", "b"], ["c", "d"]])
+
+    async def test_exception_is_shared(self):
+        """Test every lookup of the batch gets the error of the load."""
+        load = AsyncMock(side_effect=ConnectionError())
+
+        results = await asyncio.gather(
+            self.loader.load_many(["a"], load),
+            self.loader.load_many(["b"], load),
+            return_exceptions=True,
+        )
+
+        self.assertTrue(all(isinstance(result, ConnectionError) for result in results))
+        load.assert_awaited_once()
+
+    async def test_cancelled_leader_hands_over(self):
+        """Test the waiting lookups load their IDs when the first lookup goes away."""
+        leader = asyncio.create_task(self.loader.load_many(["a"], self._load))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(self.loader.load_many(["b"], self._load))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+
+        self.assertEqual(await follower, {"b": "B"})
+        self.assertEqual(self.loads, [["b"]])
+
+    async def test_service_lookups_are_batched(self):
+        """Test concurrent lookups by ID of different requests run one query."""
+        repository = AsyncMock()
+        repository.get_by_ids.return_value = [
+            MovieRow(tconst="tt0133093", primary_title="The Matrix"),
+            MovieRow(tconst="tt0111161", primary_title="The Shawshank Redemption"),
+        ]
+        cache = EntityCache(max_entries=10)
+
+        matrix, shawshank = await asyncio.gather(
+            MovieService(repository).get_movie("tt0133093", cache),
+            MovieService(repository).get_movie("tt0111161", cache),
+        )
+
+        repository.get_by_ids.assert_awaited_once_with(["tt0133093", "tt0111161"])
+        self.assertIn(b'"The Matrix"', matrix)
+        self.assertIn(b'"The Shawshank Redemption"', shawshank)
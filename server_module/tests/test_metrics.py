@@ -0,0 +1,92 @@
+from unittest import IsolatedAsyncioTestCase, TestCase
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from core.metrics import (
+    CallbackMetric,
+    Histogram,
+    MetricsMiddleware,
+    REQUEST_SECONDS,
+    RESPONSE_BYTES,
+    Registry,
+    RequestTiming,
+    current_timing,
+    record,
+    record_statement,
+)
+
+
+class TestHistogram(TestCase):
+
+    def test_buckets_are_cumulative(self):
+        """Test each bucket counts the observations up to its bound."""
+        histogram = Histogram("latency_seconds", "Latency", (0.1, 1), ("route",))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, "/movies")
+
+        self.assertEqual(histogram.samples(), [
+            'latency_seconds_bucket{route="/movies",le="0.1"} 1',
+            'latency_seconds_bucket{route="/movies",le="1"} 2',
+            'latency_seconds_bucket{route="/movies",le="+Inf"} 3',
+            'latency_seconds_sum{route="/movies"} 5.55',
+            'latency_seconds_count{route="/movies"} 3',
+        ])
+
+    def test_render_text_format(self):
+        """Test the registry renders HELP and TYPE lines before the samples."""
+        registry = Registry()
+        registry.register(CallbackMetric(
+            "queue_depth", "Requests queued", "gauge", ("state",), lambda: {("queued",): 2}
+        ))
+
+        self.assertEqual(registry.render(), (
+            "# HELP queue_depth Requests queued\n"
+            "# TYPE queue_depth gauge\n"
+            'queue_depth{state="queued"} 2\n'
+        ))
+
+
+class TestRequestTiming(IsolatedAsyncioTestCase):
+
+    async def test_phases_recorded_into_current_request(self):
+        """Test statements and phases are added to the timing of the current request."""
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            record_statement(0.002, 10)
+            record_statement(0.003, -1)
+            record("serialize", 0.001)
+        finally:
+            current_timing.reset(token)
+
+        self.assertAlmostEqual(timing.seconds["db"], 0.005)
+        self.assertEqual(timing.statements, 2)
+        self.assertEqual(timing.rows, 10)
+        header = timing.server_timing()
+        self.assertIn('db;dur=5.00;desc="2 statements, 10 rows"', header)
+        self.assertIn("serialize;dur=1.00", header)
+
+
+class TestMetricsMiddleware(TestCase):
+
+    def test_middleware_adds_server_timing_and_records_route(self):
+        """Test responses carry Server-Timing and are recorded under their route template."""
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: str):
+            record("serialize", 0.002)
+            return Response(b"12345")
+
+        response = TestClient(app).get("/items/abc")
+
+        self.assertIn("serialize;dur=2.00", response.headers["Server-Timing"])
+        self.assertIn("total;dur=", response.headers["Server-Timing"])
+        self.assertIn(
+            'imdb_http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"} 1',
+            REQUEST_SECONDS.samples(),
+        )
+        self.assertIn(
+            'imdb_http_response_size_bytes_sum{route="/items/{item_id}"} 5.0',
+            RESPONSE_BYTES.samples(),
+        )
@@ -1,8 +1,13 @@
+from collections import namedtuple
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, MagicMock
 from fastapi import HTTPException
 from src.movies.repository import MovieRepository
-from src.movies.models import Movie
+from src.movies.schemas import MOVIE_FIELDS
+
+MovieRow = namedtuple(
+    "MovieRow", MOVIE_FIELDS + ("search_rank", "exact_match"), defaults=(None,) * 6 + (1,)
+)
 
 
 class TestMovieRepository(IsolatedAsyncioTestCase):
@@ -14,7 +19,7 @@ class TestMovieRepository(IsolatedAsyncioTestCase):
     
     async def test_get_by_title_returns_movies(self):
         """Test successful movie search returns list of movies."""
-        mock_movie1 = Movie(
+        mock_movie1 = MovieRow(
             tconst="tt0111161",
             primary_title="The Shawshank Redemption",
             original_title="The Shawshank Redemption",
@@ -22,23 +27,19 @@ class TestMovieRepository(IsolatedAsyncioTestCase):
         )
         
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = [mock_movie1]
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = [mock_movie1]
         self.mock_session.execute.return_value = mock_result
         
         result = await self.movie_repository.get_by_title("Shawshank")
         
-        self.assertEqual(len(result), 1)
-        self.assertEqual(result[0].primary_title, "The Shawshank Redemption")
+        self.assertEqual(len(result.items), 1)
+        self.assertEqual(result.items[0].primary_title, "The Shawshank Redemption")
         self.mock_session.execute.assert_called_once()
     
     async def test_get_by_title_not_found_raises_404(self):
         """Test that non-existent movie raises HTTPException 404."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = []
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = []
         self.mock_session.execute.return_value = mock_result
         
         with self.assertRaises(HTTPException) as context:
@@ -46,3 +47,267 @@ class TestMovieRepository(IsolatedAsyncioTestCase):
         
         self.assertEqual(context.exception.status_code, 404)
         self.assertIn("not found", context.exception.detail.lower())
+
+    async def test_get_by_title_compares_normalized_title(self):
+        """Test the search folds accents and case and ranks on the precomputed column."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            MovieRow(tconst="tt0118799", primary_title="La vita è bella")
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        await self.movie_repository.get_by_title("La Vita è Bella")
+
+        query = self.mock_session.execute.call_args[0][0].compile()
+        self.assertIn("movies.primary_title_normalized = ", str(query))
+        self.assertIn("la vita e bella", query.params.values())
+        self.assertNotIn("lower(", str(query))
+
+    async def test_get_by_title_reads_top_k_by_search_rank(self):
+        """Test exact and other matches are each read in rank order and limited."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            MovieRow(tconst="tt0133093", primary_title="The Matrix", search_rank=1)
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        await self.movie_repository.get_by_title("Matrix", include_akas=False)
+
+        query = str(self.mock_session.execute.call_args[0][0].compile())
+        self.assertIn("UNION ALL", query)
+        self.assertEqual(query.count("ORDER BY movies.search_rank\n LIMIT"), 2)
+        self.assertIn("(movies.primary_title_normalized = :primary_title_normalized_1) IS NOT true", query)
+        self.assertNotIn("num_votes DESC", query)
+
+    async def test_get_by_title_pushes_limit_and_returns_cursor(self):
+        """Test the limit is applied in SQL and a cursor is returned when more rows exist."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            MovieRow(tconst="tt0133093", primary_title="The Matrix", search_rank=15),
+            MovieRow(tconst="tt0234215", primary_title="The Matrix Reloaded", search_rank=96),
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        page = await self.movie_repository.get_by_title("Matrix", limit=1)
+
+        self.assertEqual([movie.tconst for movie in page.items], ["tt0133093"])
+        self.assertIsNotNone(page.next_cursor)
+        query = self.mock_session.execute.call_args[0][0].compile()
+        self.assertIn(" LIMIT ", str(query))
+        self.assertIn(2, query.params.values())
+
+        await self.movie_repository.get_by_title("Matrix", limit=1, cursor=page.next_cursor)
+
+        query = self.mock_session.execute.call_args[0][0].compile()
+        self.assertIn("movies.search_rank > ", str(query))
+        self.assertIn(15, query.params.values())
+
+    async def test_get_by_title_empty_page_after_cursor(self):
+        """Test running past the last page returns no movies instead of 404."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            MovieRow(tconst="tt0133093", primary_title="The Matrix", search_rank=15),
+            MovieRow(tconst="tt0234215", primary_title="The Matrix Reloaded", search_rank=96),
+        ]
+        self.mock_session.execute.return_value = mock_result
+        page = await self.movie_repository.get_by_title("Matrix", limit=1)
+
+        mock_result.all.return_value = []
+        page = await self.movie_repository.get_by_title(
+            "Matrix", limit=1, cursor=page.next_cursor
+        )
+
+        self.assertEqual(page.items, [])
+        self.assertIsNone(page.next_cursor)
+
+    async def test_estimate_by_title_uses_planner_rows(self):
+        """Test the total is the planner estimate of the search, not a count."""
+        mock_result = MagicMock()
+        mock_result.scalar.return_value = [{"Plan": {"Plan Rows": 553}}]
+        self.mock_session.execute.return_value = mock_result
+
+        result = await self.movie_repository.estimate_by_title("Iron Man")
+
+        self.assertEqual(result, 553)
+        query = str(self.mock_session.execute.call_args[0][0].compile())
+        self.assertTrue(query.startswith("EXPLAIN (FORMAT JSON) SELECT"))
+        self.assertNotIn("count(", query)
+
+    async def test_get_top_rated_uses_partial_index_threshold(self):
+        """Test the top rated query keeps the literal partial index predicate."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            MovieRow(tconst="tt0111161", primary_title="The Shawshank Redemption", average_rating=9.3)
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        result = await self.movie_repository.get_top_rated(10, 50000)
+
+        self.assertEqual(result[0].average_rating, 9.3)
+        query = self.mock_session.execute.call_args[0][0].compile()
+        self.assertIn("movies.num_votes >= 25000", str(query))
+        self.assertIn("ORDER BY movies.average_rating DESC, movies.num_votes DESC", str(query))
+        self.assertIn(50000, query.params.values())
+
+    async def test_get_by_title_searches_akas(self):
+        """Test localized titles are searched with a language neutral configuration."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            MovieRow(tconst="tt0245429", primary_title="Spirited Away")
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        await self.movie_repository.get_by_title("千と千尋の神隠し")
+
+        query = self.mock_session.execute.call_args[0][0].compile()
+        self.assertIn("simple", query.params.values())
+
+    async def test_get_by_title_probes_akas_in_rank_order(self):
+        """Test the akas are probed per movie read in rank order, not matched as a whole set."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            MovieRow(tconst="tt0245429", primary_title="Spirited Away", search_rank=1)
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        await self.movie_repository.get_by_title("Spirited Away")
+
+        query = str(self.mock_session.execute.call_args[0][0].compile())
+        self.assertEqual(query.count("ORDER BY movies.search_rank\n LIMIT"), 4)
+        self.assertEqual(query.count("WHERE movie_akas.tconst = movies.tconst AND"), 2)
+        self.assertNotIn("movies.tconst IN", query)
+        self.assertNotIn("UNION ALL", query)
+
+    async def test_stream_by_title_matches_akas_as_a_set(self):
+        """Test the whole result set reads the titles and the akas from their own indexes."""
+        self._mock_stream([[MovieRow(tconst="tt0245429", primary_title="Spirited Away")]])
+
+        [rows async for rows in self.movie_repository.stream_by_title("Spirited Away")]
+
+        query = str(self.mock_session.stream.call_args[0][0].compile())
+        self.assertIn("movies.tconst IN (SELECT movies.tconst", query)
+        self.assertIn("UNION SELECT movie_akas.tconst", query)
+
+    async def test_get_by_title_without_akas(self):
+        """Test the akas can be left out of the search."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            MovieRow(tconst="tt0245429", primary_title="Spirited Away")
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        await self.movie_repository.get_by_title("Spirited Away", include_akas=False)
+
+        query = str(self.mock_session.execute.call_args[0][0].compile())
+        self.assertNotIn("movie_akas", query)
+
+    async def test_search_batch_uses_one_lateral_query(self):
+        """Test a batch of titles is searched with one statement and grouped by title."""
+        BatchRow = namedtuple("BatchRow", ["tconst", "primary_title", "position"])
+        mock_result = MagicMock()
+        mock_result.all.return_value = [
+            BatchRow("tt0133093", "The Matrix", 1),
+            BatchRow("tt0234215", "The Matrix Reloaded", 1),
+            BatchRow("tt0126029", "Shrek", 3),
+        ]
+        self.mock_session.execute.return_value = mock_result
+
+        groups = await self.movie_repository.search_batch(
+            ["The Matrix", "Nothing", "Shrek"], [2, 1, 1]
+        )
+
+        self.assertEqual(
+            [[row.tconst for row in rows] for rows in groups],
+            [["tt0133093", "tt0234215"], [], ["tt0126029"]],
+        )
+        self.mock_session.execute.assert_called_once()
+        query = self.mock_session.execute.call_args[0][0].compile()
+        self.assertIn("WITH ORDINALITY", str(query))
+        self.assertIn("JOIN LATERAL", str(query))
+        self.assertIn("LIMIT anon_2.row_limit", str(query))
+        self.assertIn(["the matrix", "nothing", "shrek"], query.params.values())
+
+    async def test_search_batch_reads_top_k_per_title(self):
+        """Test the search of each title reads its branches in rank order instead of sorting."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = []
+        self.mock_session.execute.return_value = mock_result
+
+        await self.movie_repository.search_batch(["The Matrix", "Shrek"], [2, 1])
+
+        query = str(self.mock_session.execute.call_args[0][0].compile())
+        self.assertEqual(query.count("ORDER BY movies.search_rank\n LIMIT anon_2.row_limit"), 4)
+        self.assertNotIn("CASE WHEN", query)
+        # The branches read the terms of the outer query instead of unnesting them again
+        self.assertEqual(query.count("unnest("), 1)
+
+    async def test_get_by_ids_uses_any_array(self):
+        """Test the IDs are looked up with one primary key query bound to an array."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [MovieRow(tconst="tt0133093", primary_title="The Matrix")]
+        self.mock_session.execute.return_value = mock_result
+
+        rows = await self.movie_repository.get_by_ids(["tt0133093", "tt0000000"])
+
+        self.assertEqual(rows[0].tconst, "tt0133093")
+        query = self.mock_session.execute.call_args[0][0].compile()
+        self.assertIn("movies.tconst = ANY (", str(query))
+        self.assertIn(["tt0133093", "tt0000000"], query.params.values())
+
+    def _mock_stream(self, partitions):
+        """Mock a streamed result yielding the given partitions."""
+        async def iterate():
+            for rows in partitions:
+                yield rows
+
+        mock_result = MagicMock()
+        mock_result.partitions.return_value = iterate()
+        self.mock_session.stream.return_value = mock_result
+
+    async def test_stream_by_title_uses_server_side_cursor(self):
+        """Test streamed searches read every match in batches from a server-side cursor."""
+        batch = [MovieRow(tconst="tt0133093", primary_title="The Matrix")]
+        self._mock_stream([batch])
+
+        batches = [rows async for rows in self.movie_repository.stream_by_title("Matrix")]
+
+        self.assertEqual(batches, [batch])
+        query = self.mock_session.stream.call_args[0][0]
+        self.assertEqual(query.get_execution_options()["yield_per"], 1000)
+        self.assertIn("movies.search_rank ASC", str(query.compile()))
+        self.assertNotIn("LIMIT", str(query.compile()))
+
+    async def test_stream_episodes_yields_batches(self):
+        """Test episodes come from one ordered query streamed in batches."""
+        self._mock_stream([["episode 1", "episode 2"], ["episode 3"]])
+
+        batches = [rows async for rows in self.movie_repository.stream_episodes("tt0903747")]
+
+        self.assertEqual(batches, [["episode 1", "episode 2"], ["episode 3"]])
+        self.mock_session.stream.assert_called_once()
+        query = self.mock_session.stream.call_args[0][0]
+        compiled = query.compile()
+        self.assertIn("episodes.parent_id = :parent_id_1", str(compiled))
+        self.assertIn(
+            "ORDER BY episodes.season_number, episodes.episode_number", str(compiled)
+        )
+        self.assertIn(903747, compiled.params.values())
+
+    async def test_stream_episodes_out_of_range_id_raises_404(self):
+        """Test an ID past the int4 parent_id range raises 404 without querying."""
+        with self.assertRaises(HTTPException) as context:
+            async for _ in self.movie_repository.stream_episodes("tt99999999999"):
+                pass
+
+        self.assertEqual(context.exception.status_code, 404)
+        self.mock_session.stream.assert_not_called()
+
+    async def test_stream_episodes_not_found_raises_404(self):
+        """Test a title without episodes raises HTTPException 404."""
+        self._mock_stream([])
+
+        with self.assertRaises(HTTPException) as context:
+            async for _ in self.movie_repository.stream_episodes("tt0111161"):
+                pass
+
+        self.assertEqual(context.exception.status_code, 404)
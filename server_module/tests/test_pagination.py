@@ -0,0 +1,93 @@
+from collections import namedtuple
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import HTTPException
+from sqlalchemy import select
+from core.pagination import (
+    SortKey,
+    decode_cursor,
+    encode_cursor,
+    paginate_ranked,
+    ranked,
+)
+from src.movies.models import Movie
+
+RankedRow = namedtuple("RankedRow", ("tconst", "search_rank", "exact_match"))
+
+
+class TestPagination(TestCase):
+
+    def setUp(self):
+        """Setup before each test."""
+        self.keys = [
+            SortKey(
+                Movie.num_votes,
+                lambda movie: movie.num_votes,
+                descending=True,
+                nulls_last=True,
+            ),
+            SortKey(Movie.tconst, lambda movie: movie.tconst, value_type=str),
+        ]
+
+    def test_cursor_round_trip(self):
+        """Test a cursor decodes to the values it was built from."""
+        cursor = encode_cursor([2100000, "tt0133093"])
+
+        self.assertEqual(decode_cursor(cursor, self.keys), [2100000, "tt0133093"])
+
+    def test_invalid_cursor_raises_400(self):
+        """Test malformed cursors and cursors of other keys raise HTTPException 400."""
+        for cursor in ["not a cursor", encode_cursor([1]), encode_cursor(["a", "b"])]:
+            with self.assertRaises(HTTPException) as context:
+                decode_cursor(cursor, self.keys)
+
+            self.assertEqual(context.exception.status_code, 400)
+
+
+class TestPaginateRanked(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """Setup before each test."""
+        self.mock_session = AsyncMock()
+        self.mock_result = MagicMock()
+        self.mock_session.execute.return_value = self.mock_result
+        self.query = select(Movie.tconst, Movie.search_rank)
+        self.exact = Movie.primary_title_normalized == "matrix"
+
+    async def _paginate(self, limit, cursor=None):
+        page = await paginate_ranked(
+            self.mock_session, self.query, self.exact, Movie.search_rank, limit, cursor
+        )
+        return page, str(self.mock_session.execute.call_args[0][0].compile())
+
+    async def test_cursor_points_past_last_row(self):
+        """Test the cursor holds the group and rank of the last row of the page."""
+        self.mock_result.all.return_value = [
+            RankedRow("tt0133093", 15, 0),
+            RankedRow("tt0234215", 96, 1),
+        ]
+
+        page, _ = await self._paginate(limit=1)
+
+        self.assertEqual(page.items, [RankedRow("tt0133093", 15, 0)])
+        _, keys = ranked(self.query, self.exact, Movie.search_rank)
+        self.assertEqual(decode_cursor(page.next_cursor, keys), [0, 15])
+
+    async def test_cursor_in_exact_matches_reads_both_groups(self):
+        """Test a cursor within the exact matches only filters that group by rank."""
+        self.mock_result.all.return_value = []
+
+        _, query = await self._paginate(limit=5, cursor=encode_cursor([0, 15]))
+
+        self.assertIn("UNION ALL", query)
+        self.assertEqual(query.count("movies.search_rank > "), 1)
+
+    async def test_cursor_in_other_matches_skips_exact_group(self):
+        """Test a cursor past the exact matches only reads the other matches."""
+        self.mock_result.all.return_value = []
+
+        _, query = await self._paginate(limit=5, cursor=encode_cursor([1, 96]))
+
+        self.assertNotIn("UNION ALL", query)
+        self.assertIn("IS NOT true", query)
+        self.assertIn("movies.search_rank > ", query)
@@ -0,0 +1,52 @@
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+from pydantic import TypeAdapter
+from core.serialization import dump_json, dump_json_lines, row_dicts
+from src.actors.schemas import ActorBase
+from src.actors.service import ActorService
+from src.movies.schemas import MOVIE_FIELDS, MovieBase
+
+MATRIX = ("tt0133093", "The Matrix", "The Matrix", "Action,Sci-Fi", 8.7, 2100000)
+SHREK = ("tt0126029", "Shrek", "Shrek", None, None, None)
+
+
+class TestSerialization(IsolatedAsyncioTestCase):
+
+    def test_row_dicts_drops_sort_columns(self):
+        """Test the columns after the response fields are left out."""
+        rows = [MATRIX + (0,)]
+
+        self.assertEqual(row_dicts(rows, MOVIE_FIELDS), [dict(zip(MOVIE_FIELDS, MATRIX))])
+
+    def test_dump_json_matches_pydantic(self):
+        """Test rows serialize to the same bytes as the validated schemas."""
+        movies = row_dicts([MATRIX, SHREK], MOVIE_FIELDS)
+
+        expected = TypeAdapter(list[MovieBase]).dump_json(
+            [MovieBase.model_validate(movie) for movie in movies]
+        )
+        self.assertEqual(dump_json(movies), expected)
+
+    def test_dump_json_lines(self):
+        """Test every item is written on its own line."""
+        body = dump_json_lines(row_dicts([MATRIX, SHREK], MOVIE_FIELDS))
+
+        self.assertEqual(body.count(b"\n"), 2)
+        self.assertTrue(body.endswith(b"}\n"))
+
+    async def test_actor_titles_match_pydantic(self):
+        """Test actors with their known for titles serialize like the validated schemas."""
+        repository = AsyncMock()
+        actor = ("nm0000206", "Keanu Reeves", 1964, "actor,producer", False, 0)
+        repository.get_by_name.return_value.items = [actor]
+        repository.get_by_name.return_value.next_cursor = None
+        repository.get_known_for.return_value = {"nm0000206": [MATRIX]}
+
+        page = await ActorService(repository).get_actor_by_name("Keanu", include_titles=True)
+
+        expected = TypeAdapter(list[ActorBase]).dump_json(
+            [ActorBase.model_validate(actor) for actor in page.items]
+        )
+        self.assertEqual(dump_json(page.items), expected)
+        self.assertEqual(page.items[0]["known_for"][0]["tconst"], "tt0133093")
+        repository.get_known_for.assert_awaited_once_with(["nm0000206"])
@@ -0,0 +1,94 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+from fastapi import HTTPException
+from core.singleflight import SingleFlight
+from src.movies.service import MovieService
+
+
+class TestSingleFlight(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """Setup before each test."""
+        self.flights = SingleFlight()
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def _slow_call(self):
+        self.calls += 1
+        await self.release.wait()
+        return b"result"
+
+    async def _in_flight(self, *calls):
+        tasks = [asyncio.create_task(call) for call in calls]
+        await asyncio.sleep(0)
+        self.release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def test_identical_calls_share_one_execution(self):
+        """Test concurrent calls with the same key run the function once."""
+        results = await self._in_flight(
+            *(self.flights.do("actors\x1fjohn", self._slow_call) for _ in range(5))
+        )
+
+        self.assertEqual(results, [b"result"] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.flights.stats()["shared"], 4)
+        self.assertEqual(len(self.flights), 0)
+
+    async def test_different_keys_run_separately(self):
+        """Test calls with other keys do not share the execution."""
+        await self._in_flight(
+            self.flights.do("actors\x1fjohn", self._slow_call),
+            self.flights.do("actors\x1fjane", self._slow_call),
+        )
+
+        self.assertEqual(self.calls, 2)
+
+    async def test_exception_is_shared(self):
+        """Test the waiting calls get the exception of the shared execution."""
+        async def not_found():
+            await self.release.wait()
+            raise HTTPException(status_code=404)
+
+        results = await self._in_flight(
+            self.flights.do("actors\x1fnobody", not_found),
+            self.flights.do("actors\x1fnobody", not_found),
+        )
+
+        self.assertTrue(all(isinstance(result, HTTPException) for result in results))
+        self.assertEqual(self.flights.stats()["executions"], 1)
+
+    async def test_cancelled_leader_hands_over(self):
+        """Test a waiting call runs the function itself when the first caller goes away."""
+        leader = asyncio.create_task(self.flights.do("actors\x1fjohn", self._slow_call))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(self.flights.do("actors\x1fjohn", self._slow_call))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(await follower, b"result")
+        self.assertEqual(self.calls, 2)
+
+    async def test_service_searches_are_coalesced(self):
+        """Test identical concurrent searches run one query and share the serialized page."""
+        repository = AsyncMock()
+
+        async def get_by_title(*args):
+            await self.release.wait()
+            return AsyncMock(items=[], next_cursor=None)
+
+        repository.get_by_title.side_effect = get_by_title
+        service = MovieService(repository)
+
+        results = await self._in_flight(
+            *(service.search_movies("The Matrix", True, 10) for _ in range(3)),
+            service.search_movies("the MATRIX", True, 10),
+        )
+
+        self.assertEqual(repository.get_by_title.await_count, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(results[0].body, b"[]")
@@ -0,0 +1,99 @@
+import logging
+import orjson
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, MagicMock
+from core.metrics import RequestTiming, current_timing
+from core.slow_queries import SlowQueryLog, normalize_query
+
+PLAN = [{
+    "Plan": {"Node Type": "Limit", "Shared Hit Blocks": 120, "Shared Read Blocks": 4500},
+    "Planning Time": 0.4,
+    "Execution Time": 812.5,
+}]
+
+STATEMENT = """SELECT movies.tconst
+FROM movies
+WHERE movies.primary_title_normalized = $1"""
+
+
+class TestSlowQueryLog(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """Setup before each test."""
+        self.explain = AsyncMock(return_value=PLAN)
+        self.file_logger = MagicMock(spec=logging.Logger)
+        self.log = SlowQueryLog(
+            threshold_ms=500,
+            explain_ratio=1.0,
+            explain_interval=300,
+            explain=self.explain,
+            file_logger=self.file_logger,
+        )
+
+    def test_normalize_query(self):
+        """Test the statement is put on one line."""
+        self.assertEqual(
+            normalize_query(STATEMENT),
+            "SELECT movies.tconst FROM movies WHERE movies.primary_title_normalized = $1",
+        )
+
+    def test_fast_statements_ignored(self):
+        """Test statements under the threshold are not recorded."""
+        self.log.observe(STATEMENT, ("love",), 0.2, 20)
+
+        self.assertEqual(self.log.stats()["slow"], 0)
+        self.assertEqual(self.log.stats()["queued"], 0)
+
+    def test_slow_statement_recorded_with_route(self):
+        """Test a slow statement is kept with its route and summarized by query."""
+        timing = RequestTiming({"route": MagicMock(path="/movies/search")})
+        token = current_timing.set(timing)
+        try:
+            self.log.observe(STATEMENT, ("love",), 0.8, 20)
+            self.log.observe(STATEMENT, ("life",), 0.6, 20)
+        finally:
+            current_timing.reset(token)
+
+        stats = self.log.stats()
+        self.assertEqual(stats["slow"], 2)
+        self.assertEqual(stats["recent"][0]["parameters"], ("life",))
+        self.assertEqual(stats["recent"][0]["route"], "/movies/search")
+        self.assertEqual(len(stats["queries"]), 1)
+        self.assertEqual(stats["queries"][0]["count"], 2)
+        self.assertAlmostEqual(stats["queries"][0]["max_ms"], 800)
+
+    def test_explain_once_per_interval(self):
+        """Test the same query is only explained once per interval."""
+        self.log.observe(STATEMENT, ("love",), 0.8, 20)
+        self.log.observe(STATEMENT, ("life",), 0.8, 20)
+
+        first = self.log._queue.get_nowait()
+        second = self.log._queue.get_nowait()
+        self.assertTrue(first[1])
+        self.assertFalse(second[1])
+
+    async def test_process_logs_plan(self):
+        """Test a sampled entry is logged with its plan and buffers."""
+        self.log.observe(STATEMENT, ("love",), 0.8, 20)
+        entry, explain = self.log._queue.get_nowait()
+
+        await self.log.process(entry, explain)
+
+        self.explain.assert_awaited_once_with(normalize_query(STATEMENT), ("love",))
+        logged = orjson.loads(self.file_logger.info.call_args.args[0])
+        self.assertEqual(logged["plan"], PLAN)
+        self.assertEqual(logged["execution_ms"], 812.5)
+        self.assertEqual(logged["shared_read_blocks"], 4500)
+        self.assertEqual(self.log.stats()["explained"], 1)
+
+    async def test_explain_failure_still_logged(self):
+        """Test an entry whose EXPLAIN fails is logged with the error."""
+        self.explain.side_effect = RuntimeError("canceling statement due to statement timeout")
+        self.log.observe(STATEMENT, ("love",), 0.8, 20)
+        entry, explain = self.log._queue.get_nowait()
+
+        await self.log.process(entry, explain)
+
+        logged = orjson.loads(self.file_logger.info.call_args.args[0])
+        self.assertIsNone(logged["plan"])
+        self.assertIn("statement timeout", logged["explain_error"])
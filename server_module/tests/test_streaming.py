@@ -0,0 +1,41 @@
+import json
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+from core.streaming import accepts_ndjson, stream_json_array, stream_ndjson
+
+
+async def batches():
+    yield [{"tconst": "tt0133093", "primary_title": "The Matrix"}]
+    yield []
+    yield [{"tconst": "tt0234215", "primary_title": "The Matrix Reloaded"}]
+
+
+class TestStreaming(IsolatedAsyncioTestCase):
+
+    def test_accepts_ndjson(self):
+        """Test NDJSON is only chosen when listed in the Accept header."""
+        for accept, expected in [
+            ("application/x-ndjson", True),
+            ("application/json;q=0.5, application/x-ndjson", True),
+            ("application/json", False),
+            ("", False),
+        ]:
+            request = MagicMock()
+            request.headers = {"accept": accept}
+
+            self.assertEqual(accepts_ndjson(request), expected)
+
+    async def test_stream_ndjson(self):
+        """Test every batch is flushed as one chunk of JSON lines."""
+        chunks = [chunk async for chunk in stream_ndjson(batches())]
+
+        self.assertEqual(len(chunks), 2)
+        self.assertTrue(chunks[0].startswith(b'{"tconst":"tt0133093"'))
+        self.assertTrue(chunks[0].endswith(b"}\n"))
+
+    async def test_stream_json_array(self):
+        """Test the batches form a single JSON array."""
+        body = b"".join([chunk async for chunk in stream_json_array(batches())])
+
+        movies = json.loads(body)
+        self.assertEqual([movie["tconst"] for movie in movies], ["tt0133093", "tt0234215"])
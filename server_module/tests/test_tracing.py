@@ -0,0 +1,179 @@
+import orjson
+import tempfile
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from core import tracing
+from core.database import _record_statement, _start_statement
+from core.tracing import (
+    FileSpanExporter,
+    STATUS_ERROR,
+    Tracer,
+    TracingMiddleware,
+    parameter_shape,
+    statement_span,
+    traced,
+)
+
+
+class RecordingProcessor:
+    """Keeps the finished spans instead of exporting them"""
+
+    def __init__(self):
+        self.spans = []
+
+    def on_end(self, span):
+        self.spans.append(span)
+
+
+class Repository:
+
+    @traced
+    async def get(self, fail: bool = False):
+        span = statement_span("SELECT 1", ("term", [1, 2, 3]), False)
+        tracing.tracer.end_span(span)
+        if fail:
+            raise ValueError("no rows")
+        return "row"
+
+    @traced
+    async def stream(self):
+        yield 1
+        yield 2
+
+
+class Service:
+
+    def __init__(self):
+        self.repository = Repository()
+
+    @traced
+    async def get(self):
+        return await self.repository.get()
+
+
+class TestTracing(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """Setup before each test."""
+        self.processor = RecordingProcessor()
+        self.tracer = Tracer(self.processor, sample_ratio=1.0)
+        for target in ("core.tracing.tracer", "core.database.tracer"):
+            patcher = patch(target, self.tracer)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _span(self, name):
+        return next(span for span in self.processor.spans if span.name == name)
+
+    async def test_spans_nest_across_layers(self):
+        """Test the service, repository and statement spans form one trace."""
+        self.assertEqual(await Service().get(), "row")
+
+        service = self._span("Service.get")
+        repository = self._span("Repository.get")
+        statement = self._span("db.statement")
+        self.assertIsNone(service.parent_id)
+        self.assertEqual(repository.parent_id, service.span_id)
+        self.assertEqual(statement.parent_id, repository.span_id)
+        self.assertEqual({span.trace_id for span in self.processor.spans}, {service.trace_id})
+        self.assertEqual(statement.attributes["db.statement"], "SELECT 1")
+        self.assertEqual(statement.attributes["db.parameters.shape"], "(str, list[3])")
+
+    async def test_error_recorded_on_span(self):
+        """Test an exception marks the span as failed with its message."""
+        with self.assertRaises(ValueError):
+            await Repository().get(fail=True)
+
+        span = self._span("Repository.get")
+        self.assertEqual(span.status, STATUS_ERROR)
+        self.assertEqual(span.message, "ValueError: no rows")
+
+    async def test_generator_span_lasts_until_iteration_ends(self):
+        """Test an async generator span ends once the items are consumed."""
+        items = [item async for item in Repository().stream()]
+
+        self.assertEqual(items, [1, 2])
+        span = self._span("Repository.stream")
+        self.assertGreaterEqual(span.end_ns, span.start_ns)
+
+    async def test_unsampled_trace_records_nothing(self):
+        """Test no span of a trace left out by sampling reaches the processor."""
+        self.tracer.sample_ratio = 0.0
+
+        await Service().get()
+
+        self.assertEqual(self.processor.spans, [])
+
+    def test_sampled_traceparent_forces_trace(self):
+        """Test a request with a sampled traceparent is traced and continues its trace."""
+        self.tracer.sample_ratio = 0.0
+        app = FastAPI()
+        app.add_middleware(TracingMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: str):
+            return {}
+
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        response = TestClient(app).get(
+            "/items/abc", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+        )
+
+        span = self._span("GET /items/{item_id}")
+        self.assertEqual(span.trace_id, trace_id)
+        self.assertEqual(span.parent_id, "00f067aa0ba902b7")
+        self.assertEqual(span.attributes["http.status_code"], 200)
+        self.assertEqual(response.headers["traceparent"], span.traceparent())
+
+    def test_unsampled_traceparent_is_followed(self):
+        """Test a request whose caller did not sample its trace is not traced."""
+        self.tracer.sample_ratio = 1.0
+        app = FastAPI()
+        app.add_middleware(TracingMiddleware)
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: str):
+            return {}
+
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        TestClient(app).get(
+            "/items/abc", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-00"}
+        )
+
+        self.assertEqual(self.processor.spans, [])
+
+    def test_cursor_events_record_statement_span(self):
+        """Test the engine hooks end the statement span with its row count."""
+        connection = MagicMock(info={})
+
+        _start_statement(connection, None, "SELECT 1", ("matrix",), None, False)
+        _record_statement(connection, MagicMock(rowcount=20), "SELECT 1", ("matrix",), None, False)
+
+        span = self._span("db.statement")
+        self.assertEqual(span.attributes["db.rows"], 20)
+        self.assertEqual(span.attributes["db.parameters.shape"], "(str)")
+        self.assertEqual(connection.info["statement_span"], [])
+
+    def test_parameter_shape_hides_values(self):
+        """Test parameters are described by type and array length only."""
+        self.assertEqual(parameter_shape({"term": "matrix", "limit": 20}), "{term: str, limit: int}")
+        self.assertEqual(parameter_shape((["tt1", "tt2"],)), "(list[2])")
+
+    async def test_file_exporter_writes_otlp_lines(self):
+        """Test each batch is written as one OTLP/JSON line."""
+        await Service().get()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "traces.jsonl"
+            FileSpanExporter(str(path)).export([span.to_otlp() for span in self.processor.spans])
+            lines = path.read_bytes().splitlines()
+
+        request = orjson.loads(lines[0])
+        spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(
+            {span["name"] for span in spans}, {"Service.get", "Repository.get", "db.statement"}
+        )